@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Train the statistical language classifier shipped in src/nxlc_data/.
+
+The training corpus is pinned in scripts/classifier_corpus.json: a list of
+release archives, each with its URL and sha256. They are downloaded once into
+the NXLC cache directory, verified and unpacked, so every run samples exactly
+the same files.
+
+Files in the corpus are labelled with NXLC's own rule-based detection
+(special filenames and the extension index). Conflicted extensions and
+non-code buckets are skipped, and each language is trained on the head buffer
+of at most --max-files files, the same slice the classifier sees at runtime.
+Languages with fewer than --min-files samples are left out of the model, so
+the classifier abstains on them instead of guessing.
+
+Usage:
+    python3 scripts/train_classifier.py [--corpus PATH] [--output PATH]
+    python3 scripts/train_classifier.py ROOT [ROOT ...]   # ad-hoc experiments
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tarfile
+import urllib.request
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+DEFAULT_CORPUS = Path(__file__).parent / 'classifier_corpus.json'
+
+# Buckets that are not programming languages, plus extensions that are
+# heavily polluted in typical corpora (go.mod for Modula-2, .inc/.pp for
+# Pascal) and notebooks, which are classified structurally
+EXCLUDED_LANGUAGES = {
+    'Unknown', 'Text', 'README', 'Configuration', 'Modula-2', 'Pascal',
+    'Jupyter Notebook',
+}
+
+# Version-control and cache directories; vendored trees such as node_modules
+# are deliberately sampled since they are a rich source of real code
+SKIPPED_DIRS = {'.git', '.hg', '.svn', '__pycache__'}
+
+
+def sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def unpack(archive: Path, target: Path) -> None:
+    """Unpack a tarball or wheel, refusing members that escape ``target``."""
+    root = target.resolve()
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            zf.extractall(target)
+        return
+    with tarfile.open(archive) as tf:
+        members = []
+        for member in tf.getmembers():
+            if not (member.isfile() or member.isdir()):
+                continue
+            destination = str((target / member.name).resolve())
+            if os.path.commonpath([destination, str(root)]) != str(root):
+                raise ValueError(f"{archive.name}: unsafe member {member.name!r}")
+            members.append(member)
+        tf.extractall(target, members=members)
+
+
+def fetch_corpus(corpus: Path, cache_dir: Path):
+    """Download, verify and unpack the pinned archives; return their roots."""
+    with open(corpus, encoding='utf-8') as f:
+        archives = json.load(f)['archives']
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    roots = []
+    for entry in archives:
+        filename = entry['url'].rsplit('/', 1)[-1]
+        archive = cache_dir / filename
+        if not archive.exists() or sha256_of(archive) != entry['sha256']:
+            print(f"Downloading {filename}", file=sys.stderr)
+            partial = archive.with_name(filename + '.part')
+            with urllib.request.urlopen(entry['url']) as response, open(partial, 'wb') as out:
+                while True:
+                    chunk = response.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            if sha256_of(partial) != entry['sha256']:
+                partial.unlink()
+                raise ValueError(f"{filename}: sha256 mismatch")
+            partial.replace(archive)
+        target = cache_dir / (filename + '.d')
+        if not target.is_dir():
+            staging = cache_dir / (filename + '.tmp')
+            unpack(archive, staging)
+            staging.replace(target)
+        roots.append(target)
+    return roots
+
+
+def label(path: Path) -> str:
+    """Label a training file by filename rules and extension only."""
+    defs = nxlc.LanguageDefinitions
+    language = defs.FILENAME_RULE_SET.match(path.name)
+    if language is not None:
+        return language
+    ext = path.suffix.lower()
+    if not ext or ext in defs.CONFLICT_EXTENSIONS:
+        return 'Unknown'
+    return defs.DETECTION_INDEX.lookup(path.name, ext) or 'Unknown'
+
+
+def collect(roots, max_files: int, seed: int):
+    """Return ``{language: [path, ...]}`` sampled from the corpus roots."""
+    by_language = defaultdict(list)
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+            for name in sorted(filenames):
+                path = Path(dirpath) / name
+                language = label(path)
+                if language not in EXCLUDED_LANGUAGES and path.is_file() and not path.is_symlink():
+                    by_language[language].append(path)
+    rng = random.Random(seed)
+    for language, paths in sorted(by_language.items()):
+        rng.shuffle(paths)
+        del paths[max_files:]
+    return by_language
+
+
+def read_head(path: Path) -> str:
+    """Read the runtime head buffer of a file."""
+    with open(path, 'rb') as f:
+        return f.read(nxlc.LineCounter.HEAD_SIZE).decode('utf-8', errors='ignore')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Train the NXLC language classifier')
+    parser.add_argument('roots', nargs='*',
+                        help='Sample these directories instead of the pinned corpus')
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS),
+                        help='Pinned corpus manifest (default: %(default)s)')
+    parser.add_argument('--cache-dir', default=str(nxlc.get_cache_dir() / 'classifier-corpus'),
+                        help='Where corpus archives are downloaded and unpacked')
+    parser.add_argument('--output', default=str(nxlc.LanguageClassifier.MODEL_PATH),
+                        help='Model path (default: the shipped model)')
+    parser.add_argument('--min-files', type=int, default=20,
+                        help='Drop languages with fewer sample files')
+    parser.add_argument('--max-files', type=int, default=400,
+                        help='Maximum sample files per language')
+    parser.add_argument('--tokens', type=int, default=300,
+                        help='Tokens kept per language')
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help='Fraction of files held out to report accuracy')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    roots = args.roots or fetch_corpus(Path(args.corpus), Path(args.cache_dir))
+    sampled = collect(roots, args.max_files, args.seed)
+    train, test = {}, {}
+    for language, paths in sorted(sampled.items()):
+        if len(paths) < args.min_files:
+            continue
+        split = int(len(paths) * args.holdout)
+        test[language] = paths[:split]
+        train[language] = [read_head(p) for p in paths[split:]]
+
+    model = nxlc.LanguageClassifier.train(train, args.tokens)
+    classifier = nxlc.LanguageClassifier(model)
+
+    correct = total = abstained = 0
+    for language, paths in test.items():
+        hits = 0
+        for path in paths:
+            guess = classifier.classify(read_head(path))
+            hits += guess == language
+            abstained += guess == 'Unknown'
+        correct += hits
+        total += len(paths)
+        print(f"{language:20} {hits:4}/{len(paths):<4}")
+    if total:
+        mislabeled = total - correct - abstained
+        print(f"Held-out: {correct / total:.1%} correct, {abstained / total:.1%} abstained, "
+              f"{mislabeled / total:.1%} mislabeled ({total} files)")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(model, f, separators=(',', ':'), sort_keys=True)
+    print(f"Wrote {len(model['languages'])} languages to {output} ({output.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
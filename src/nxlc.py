@@ -9,16 +9,28 @@ import sys
 import argparse
 import subprocess
 import re
+import json
+import hashlib
+import math
 import shutil
 import threading
 import platform
 import logging
 import functools
+import itertools
+import codecs
+import io
+import builtins
+import bisect
+import types
 from abc import ABC, abstractmethod
 from pathlib import Path
 from collections import defaultdict, OrderedDict
 from typing import Dict, List, Tuple, Set, Optional, Any, Callable, TypeVar, Protocol, Generic
 import fnmatch
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # ============================================================================
 # HIERARCHICAL IGNORE SUPPORT (INTEGRATED)
@@ -37,7 +49,15 @@ class PatternMatcher(Protocol):
 
 
 class CacheStrategy(ABC):
-    """Abstract base for different caching strategies."""
+    """Abstract base for different caching strategies.
+    
+    Implementations count ``hits`` and ``misses`` of ``get`` and the
+    ``evictions`` made room for by ``set``; ``stats`` reports them.
+    """
+    
+    hits = 0
+    misses = 0
+    evictions = 0
     
     @abstractmethod
     def get(self, key: str) -> Optional[bool]:
@@ -53,6 +73,10 @@ class CacheStrategy(ABC):
     def clear(self) -> None:
         """Clear the cache."""
         pass
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts so far."""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
 
 
 class LRUCacheStrategy(CacheStrategy):
@@ -68,7 +92,9 @@ class LRUCacheStrategy(CacheStrategy):
             if key in self.cache:
                 # Move to end (most recently used)
                 self.cache.move_to_end(key)
+                self.hits += 1
                 return self.cache[key]
+            self.misses += 1
             return None
     
     def set(self, key: str, value: bool) -> None:
@@ -79,6 +105,7 @@ class LRUCacheStrategy(CacheStrategy):
                 if len(self.cache) >= self.max_size:
                     # Remove least recently used
                     self.cache.popitem(last=False)
+                    self.evictions += 1
                 self.cache[key] = value
     
     def clear(self) -> None:
@@ -91,6 +118,131 @@ class LRUCacheStrategy(CacheStrategy):
             return len(self.cache)
 
 
+class SingleThreadLRUCacheStrategy(CacheStrategy):
+    """``LRUCacheStrategy`` without the lock, for caches used by one thread only."""
+    
+    def __init__(self, max_size: int = 1000):
+        self.cache = OrderedDict()
+        self.max_size = max_size
+    
+    def get(self, key: str) -> Optional[bool]:
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: str, value: bool) -> None:
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        else:
+            if len(self.cache) >= self.max_size:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+            self.cache[key] = value
+    
+    def clear(self) -> None:
+        self.cache.clear()
+    
+    def size(self) -> int:
+        """Get current cache size."""
+        return len(self.cache)
+
+
+class BoundedDictCacheStrategy(CacheStrategy):
+    """LRU over a plain dict, in the manner of ``functools.lru_cache``.
+    
+    A hit re-inserts the key to mark it recently used, and the oldest keys in
+    insertion order are evicted when full, an eighth of them at a time:
+    finding the first key of a dict skips the slots freed at its front, so
+    evicting one key per insert would make that scan the dominant cost.
+    Each step is a single dict operation, so there is no lock: concurrent
+    use is safe but may report a spurious miss, and the counters are
+    approximate.
+    """
+    
+    def __init__(self, max_size: int = 1000):
+        self.cache: Dict[str, bool] = {}
+        self.max_size = max_size
+        self._batch = max(1, max_size // 8)
+    
+    def get(self, key: str) -> Optional[bool]:
+        value = self.cache.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+        self.cache[key] = value
+        self.hits += 1
+        return value
+    
+    def set(self, key: str, value: bool) -> None:
+        cache = self.cache
+        if key not in cache and len(cache) >= self.max_size:
+            try:
+                oldest = list(itertools.islice(cache, self._batch))
+            except RuntimeError:
+                oldest = []  # Another thread changed the dict first
+            for old_key in oldest:
+                if cache.pop(old_key, None) is not None:
+                    self.evictions += 1
+        cache[key] = value
+    
+    def clear(self) -> None:
+        self.cache.clear()
+    
+    def size(self) -> int:
+        """Get current cache size."""
+        return len(self.cache)
+
+
+class ShardedLRUCacheStrategy(CacheStrategy):
+    """Thread-safe LRU split into shards by key hash, each with its own lock.
+    
+    Threads working on different keys rarely wait for each other; the
+    shards split ``max_size`` between them (at least one entry each) and
+    evict on their own.
+    """
+    
+    def __init__(self, max_size: int = 1000, shards: int = 16):
+        self.max_size = max_size
+        base, extra = divmod(max_size, shards)
+        self.shards = [SingleThreadLRUCacheStrategy(max(1, base + (index < extra))) for index in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+    
+    def get(self, key: str) -> Optional[bool]:
+        shard = hash(key) % len(self.shards)
+        with self._locks[shard]:
+            return self.shards[shard].get(key)
+    
+    def set(self, key: str, value: bool) -> None:
+        shard = hash(key) % len(self.shards)
+        with self._locks[shard]:
+            self.shards[shard].set(key, value)
+    
+    def clear(self) -> None:
+        for lock, shard in zip(self._locks, self.shards):
+            with lock:
+                shard.clear()
+    
+    def size(self) -> int:
+        """Get current cache size across shards."""
+        return sum(shard.size() for shard in self.shards)
+    
+    @property
+    def hits(self) -> int:
+        return sum(shard.hits for shard in self.shards)
+    
+    @property
+    def misses(self) -> int:
+        return sum(shard.misses for shard in self.shards)
+    
+    @property
+    def evictions(self) -> int:
+        return sum(shard.evictions for shard in self.shards)
+
+
 class IgnoreFileReader:
     """Reusable component for reading ignore files across different systems."""
     
@@ -134,6 +286,692 @@ class IgnoreFileReader:
         return patterns
 
 
+def literal_prefix(pattern: str, special) -> str:
+    """The leading directories of a '/'-separated pattern up to the first one ``special`` finds in."""
+    literal = []
+    for component in pattern.split('/')[:-1]:
+        if not component or special.search(component):
+            break
+        literal.append(component)
+    return '/'.join(literal)
+
+
+class PatternIndex:
+    """Ordered ignore patterns indexed for last-match-wins lookup.
+
+    In the spirit of git's exclude hashing, patterns that are a literal
+    path, basename, ``*.ext`` extension or path component are kept in
+    dicts that hold the last pattern index per key, and patterns that start
+    with literal directories (``src/gen/*.py``) are bucketed by them, so they
+    are only tried on paths below those directories. Only the remaining
+    patterns go through shared regexes: consecutive
+    ones of the same polarity form a run, compiled into one regex per target
+    with their tokens merged into a prefix tree.
+
+    A path's verdict is the polarity of the highest-index pattern matching
+    it, so negations stay exact: runs older than the best indexed match are
+    never tried, and a run straddling it only tries its newer patterns.
+    ``below`` answers the same question for everything below a directory.
+    """
+
+    __slots__ = ('flags', 'fold', 'ignored', 'paths', 'names', 'extensions', 'components', 'subtrees',
+                 'prefixes', 'runs', 'any_run', '_residual', '_members', '_anywhere', '_below', '_prefix_last')
+
+    def __init__(self, flags: int = re.DOTALL):
+        self.flags = flags
+        self.fold = bool(flags & re.IGNORECASE)  # Literal keys are lower-cased too
+        self.ignored: List[bool] = []  # Polarity by pattern index
+        # Literal keys -> last pattern index, for any path and for directories only
+        self.paths: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self.names: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self.extensions: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self.components: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        self.subtrees: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        # Literal leading directories -> [(pattern index, directory_only, compiled alternatives)]
+        self.prefixes: Dict[str, List[Tuple[int, bool, List[Tuple]]]] = {}
+        # (ignored, first index, last index, compiled alternatives, members), last run first
+        self.runs: List[Tuple] = []
+        self.any_run: Optional[List[Tuple]] = None
+        self._residual: List[Tuple[int, bool, List[Tuple[str, bool, List[str]]]]] = []
+        self._members: Dict[int, List[Tuple]] = {}
+        # Last negating and ignoring pattern index that may match below any
+        # directory, below a given directory, and below a given prefix key
+        self._anywhere = [-1, -1]
+        self._below: Dict[str, List[int]] = {}
+        self._prefix_last: Dict[str, List[int]] = {}
+
+    def add(self, ignored: bool, directory_only: bool, kind: str, key: Optional[str] = None,
+            alternatives: Optional[List[Tuple[str, List[str]]]] = None) -> None:
+        """Append a pattern.
+
+        ``kind`` is 'path', 'name', 'extension' or 'component' for a literal ``key``,
+        'subtree' for every path below the literal directories ``key`` ('a/b'),
+        'prefix' for ``alternatives`` that can only match paths below them,
+        or 'regex'. ``alternatives`` are
+        ``(target, tokens)`` pairs, any of which may match; the target is
+        'path', 'name' or 'component' (any path component).
+        """
+        index = len(self.ignored)
+        self.ignored.append(ignored)
+        if kind == 'regex':
+            self._residual.append((index, ignored, [(target, directory_only, tokens)
+                                                    for target, tokens in alternatives]))
+            self._anywhere[ignored] = index
+            return
+        if self.fold:
+            key = key.lower()
+        if kind == 'prefix':
+            compiled = [(target, directory_only, re.compile(self._emit(self._trie([tokens])), self.flags))
+                        for target, tokens in alternatives]
+            self.prefixes.setdefault(key, []).append((index, directory_only, compiled))
+        else:
+            getattr(self, kind + 's')[directory_only][key] = index
+        if kind in ('prefix', 'subtree'):
+            self._prefix_last.setdefault(key, [-1, -1])[ignored] = index
+        if kind in ('path', 'prefix', 'subtree'):
+            # Only paths below the key's ancestors can match; below the key
+            # itself too, unless it is a literal path
+            directories = [''] + [key[:slash] for slash, c in enumerate(key) if c == '/']
+            if kind != 'path':
+                directories.append(key)
+            for directory in directories:
+                self._below.setdefault(directory, [-1, -1])[ignored] = index
+        else:
+            self._anywhere[ignored] = index
+
+    def compile(self) -> 'PatternIndex':
+        """Compile the runs of regex patterns; call once after the last ``add``."""
+        runs: List[List] = []
+        for index, ignored, alternatives in self._residual:
+            if not runs or runs[-1][0] != ignored:
+                runs.append([ignored, index, index, []])
+            runs[-1][2] = index
+            runs[-1][3].append((index, alternatives))
+        self.runs = [(ignored, first, last, self._compile([alt for _, alts in members for alt in alts]), members)
+                     for ignored, first, last, members in reversed(runs)]
+        if len(runs) > 1:
+            self.any_run = self._compile([alt for _, _, alts in self._residual for alt in alts])
+        self._residual = []
+        return self
+
+    def last_match(self, subject: str, name: str, parts, is_dir: bool = False,
+                   floor: int = -1) -> Optional[bool]:
+        """Polarity of the last pattern matching a path, or None if none does.
+
+        ``subject`` is the path string that 'path' alternatives match, and
+        ``parts`` its components. ``floor`` is the index of a pattern known
+        to match (see ``below``); older patterns are not tried.
+        """
+        keys = [part.lower() for part in parts] if self.fold else parts
+        key = name.lower() if self.fold else name
+        folded = subject.lower() if self.fold else subject
+        kinds = (0, 1) if is_dir else (0,)
+        best = floor
+        for directory_only in kinds:
+            best = max(best, self.paths[directory_only].get(folded, -1), self.names[directory_only].get(key, -1))
+            extensions = self.extensions[directory_only]
+            if extensions:
+                dot = key.find('.')
+                while dot >= 0:
+                    best = max(best, extensions.get(key[dot:], -1))
+                    dot = key.find('.', dot + 1)
+            components = self.components[directory_only]
+            if components:
+                for part in keys:
+                    best = max(best, components.get(part, -1))
+        subtrees = [self.subtrees[directory_only] for directory_only in kinds if self.subtrees[directory_only]]
+        if self.prefixes or subtrees:
+            candidates: List[Tuple[int, bool, List[Tuple]]] = []
+            slash = folded.find('/')
+            while slash >= 0:
+                directory = folded[:slash]
+                for below in subtrees:
+                    best = max(best, below.get(directory, -1))
+                candidates.extend(self.prefixes.get(directory, ()))
+                slash = folded.find('/', slash + 1)
+            # Newest candidates first; the first that matches is the best of them
+            for index, directory_only, alternatives in sorted(candidates, key=lambda c: c[0], reverse=True):
+                if index <= best:
+                    break
+                if (is_dir or not directory_only) and self._matches(alternatives, subject, name, parts, is_dir):
+                    best = index
+                    break
+        if self.runs and self.runs[0][2] > best and (
+                self.any_run is None or self._matches(self.any_run, subject, name, parts, is_dir)):
+            for ignored, first, last, alternatives, members in self.runs:
+                if last < best:
+                    break
+                if not self._matches(alternatives, subject, name, parts, is_dir):
+                    continue
+                if first > best:
+                    return ignored
+                # Only the run's patterns newer than the best match can override it
+                for index, member in reversed(members):
+                    if index <= best:
+                        break
+                    if self._matches(self._member(index, member), subject, name, parts, is_dir):
+                        return ignored
+                break
+        return self.ignored[best] if best >= 0 else None
+
+    def below(self, subject: str, parts, floor: int = -1) -> Tuple[int, Optional[bool]]:
+        """What the patterns decide for every path below a directory.
+
+        Returns ``(floor, verdict)``. ``floor`` is the index of the last
+        pattern matching every path below the directory (a component or
+        subtree pattern), at least the ``floor`` found for its parent, or -1.
+        ``verdict`` is whether all those paths are ignored when no later
+        pattern of the other polarity can match any of them, else None.
+        """
+        keys = [part.lower() for part in parts] if self.fold else parts
+        folded = subject.lower() if self.fold else subject
+        for components in self.components:
+            if components:
+                for part in keys:
+                    floor = max(floor, components.get(part, -1))
+        ancestors = [folded[:slash] for slash, c in enumerate(folded) if c == '/'] + ([folded] if folded else [])
+        if self.subtrees[0]:
+            for directory in ancestors:
+                floor = max(floor, self.subtrees[0].get(directory, -1))
+        floor = self._component_floor(parts, floor)
+        # Last pattern of each polarity that may match some path below
+        later = list(self._anywhere)
+        for last in [self._below.get(folded)] + [self._prefix_last.get(directory) for directory in ancestors[:-1]]:
+            if last is not None:
+                later = [max(later[0], last[0]), max(later[1], last[1])]
+        verdict = floor >= 0 and self.ignored[floor]
+        return floor, (verdict if later[not verdict] <= floor else None)
+
+    def _component_floor(self, parts, floor: int) -> int:
+        """Index of the last run pattern matching one of ``parts`` as a component, if above ``floor``."""
+        for ignored, first, last, alternatives, members in self.runs:
+            if last <= floor:
+                break
+            components = [alternative for alternative in alternatives if alternative[0] == 'component']
+            if not components or not self._matches(components, '', '', parts, True):
+                continue
+            for index, member in reversed(members):
+                if index <= floor:
+                    break
+                if any(target == 'component' for target, _, _ in member) and self._matches(
+                        [alternative for alternative in self._member(index, member) if alternative[0] == 'component'],
+                        '', '', parts, True):
+                    return index
+        return floor
+
+    def _member(self, index: int, alternatives: List[Tuple[str, bool, List[str]]]) -> List[Tuple]:
+        """Compiled alternatives of one run member, compiled when first needed."""
+        compiled = self._members.get(index)
+        if compiled is None:
+            compiled = self._members[index] = [
+                (target, directory_only, re.compile(self._emit(self._trie([tokens])), self.flags))
+                for target, directory_only, tokens in alternatives]
+        return compiled
+
+    @staticmethod
+    def _matches(alternatives: List[Tuple], subject: str, name: str, parts, is_dir: bool) -> bool:
+        for target, directory_only, regex in alternatives:
+            if directory_only and not is_dir:
+                continue
+            if target == 'path':
+                if regex.match(subject):
+                    return True
+            elif target == 'name':
+                if regex.match(name):
+                    return True
+            elif any(map(regex.match, parts)):
+                return True
+        return False
+
+    def _compile(self, alternatives: List[Tuple[str, bool, List[str]]]) -> List[Tuple]:
+        """One regex per target and directory flag matching any of ``alternatives``."""
+        groups: Dict[Tuple[str, bool], List[List[str]]] = {}
+        for target, directory_only, tokens in alternatives:
+            groups.setdefault((target, directory_only), []).append(tokens)
+        return [(target, directory_only, re.compile(self._emit(self._trie(token_lists)), self.flags))
+                for (target, directory_only), token_lists in groups.items()]
+
+    @staticmethod
+    def _trie(token_lists: List[List[str]]) -> Dict[Optional[str], Dict]:
+        trie: Dict[Optional[str], Dict] = {}
+        for tokens in token_lists:
+            node = trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = {}
+        return trie
+
+    @classmethod
+    def _emit(cls, node: Dict[Optional[str], Dict]) -> str:
+        """Regex source of a token prefix tree; None marks the end of a pattern."""
+        prefix = []
+        while len(node) == 1:
+            token, node = next(iter(node.items()))
+            if token is None:
+                return ''.join(prefix) + r'\Z'
+            prefix.append(token)
+        branches = [r'\Z' if token is None else token + cls._emit(child) for token, child in node.items()]
+        return ''.join(prefix) + '(?:' + '|'.join(branches) + ')'
+
+
+class IgnoreMatcher:
+    """``.nxlcignore``-style patterns compiled once for matching many paths.
+
+    Patterns keep the semantics of the per-pattern matching they replace:
+    ``dir/`` and ``**/dir/`` match any path component, ``**/pat`` matches
+    the basename, and other patterns match the whole relative path or the
+    basename with ``fnmatch`` wildcards. Later patterns win, and
+    ``!pattern`` re-includes what earlier patterns excluded. Lookup goes
+    through a ``PatternIndex``.
+    """
+
+    # Matchers compiled for callers that pass plain pattern lists
+    MAX_CACHE_SIZE = 64
+    _cache: Dict[Tuple[str, ...], 'IgnoreMatcher'] = {}
+
+    # Regex body of a translated bracket expression
+    _CLASS_BODY = re.compile(r'\(\?s:(.*)\)\\[Zz]\Z', re.DOTALL)
+
+    # Characters that make an fnmatch glob more than a literal
+    _WILDCARDS = re.compile(r'[*?\[]')
+
+    __slots__ = ('patterns', 'index', '_atomic')
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self.index = PatternIndex(re.DOTALL | (re.IGNORECASE if os.path.normcase('A') != 'A' else 0))
+        self._atomic = 0
+        for pattern in self.patterns:
+            pattern = pattern.replace('\\', '/')
+            ignored = not pattern.startswith('!')
+            if not ignored:
+                pattern = pattern[1:]
+            if '**/' in pattern:
+                # Only leading '**/' patterns have ever matched
+                if pattern.startswith('**/'):
+                    if pattern.endswith('/'):
+                        self._add(ignored, pattern[3:-1], 'component')
+                    else:
+                        self._add(ignored, pattern[3:], 'name')
+            elif pattern.endswith('/'):
+                self._add(ignored, pattern.rstrip('/'), 'component')
+            elif '/' in pattern and '[' not in pattern:
+                # Only the whole path can match: literally, or below the pattern's literal directories
+                if not self._WILDCARDS.search(pattern):
+                    self.index.add(ignored, False, 'path', pattern)
+                    continue
+                prefix = literal_prefix(pattern, self._WILDCARDS)
+                if prefix and pattern[len(prefix):].strip('*') == '/':
+                    self.index.add(ignored, False, 'subtree', prefix)
+                elif prefix:
+                    self.index.add(ignored, False, 'prefix', prefix, [('path', self._tokens(pattern))])
+                else:
+                    self.index.add(ignored, False, 'regex', alternatives=[('path', self._tokens(pattern))])
+            else:
+                self._add(ignored, pattern, 'path')
+        self.index.compile()
+
+    def _add(self, ignored: bool, glob: str, target: str) -> None:
+        """Index a '/'-free glob matched against a component, a basename, or the path and basename."""
+        if not self._WILDCARDS.search(glob):
+            # A literal path without '/' equals the path only if it equals the basename
+            self.index.add(ignored, False, 'component' if target == 'component' else 'name', glob)
+        elif target != 'component' and glob.startswith('*.') and not self._WILDCARDS.search(glob, 1):
+            self.index.add(ignored, False, 'extension', glob[1:])
+        else:
+            tokens = self._tokens(glob)
+            alternatives = [(target, tokens)] + ([('name', tokens)] if target == 'path' else [])
+            self.index.add(ignored, False, 'regex', alternatives=alternatives)
+
+    @classmethod
+    def compile(cls, patterns) -> 'IgnoreMatcher':
+        """Return a matcher for a pattern list, reusing one compiled earlier."""
+        if isinstance(patterns, IgnoreMatcher):
+            return patterns
+        key = tuple(patterns)
+        matcher = cls._cache.get(key)
+        if matcher is None:
+            if len(cls._cache) >= cls.MAX_CACHE_SIZE:
+                cls._cache.clear()
+            matcher = cls._cache[key] = cls(key)
+        return matcher
+
+    def matches(self, path: Path) -> bool:
+        """Whether ``path``, relative to the ignore file's directory, is ignored."""
+        return self.index.last_match(str(path).replace('\\', '/'), path.name, path.parts) is True
+
+    def matches_relative(self, relative: str, floor: int = -1) -> bool:
+        """``matches`` for a POSIX relative path, trying only patterns after ``floor``."""
+        return self.index.last_match(relative, relative.rpartition('/')[2], relative.split('/'), floor=floor) is True
+
+    def below(self, directory: str, floor: int = -1) -> Tuple[int, Optional[bool]]:
+        """``PatternIndex.below`` for a POSIX relative directory ('' for the ignore file's own)."""
+        return self.index.below(directory, directory.split('/') if directory else [], floor)
+
+    def _tokens(self, glob: str) -> List[str]:
+        """Regex sources of the wildcards and characters of an fnmatch glob."""
+        tokens = []
+        i, n = 0, len(glob)
+        while i < n:
+            c = glob[i]
+            i += 1
+            if c == '*':
+                while i < n and glob[i] == '*':
+                    i += 1
+                tokens.append('.*')
+            elif c == '?':
+                tokens.append('.')
+            elif c == '[':
+                # Bracket expressions end where fnmatch ends them and are translated by it
+                j = i
+                if j < n and glob[j] == '!':
+                    j += 1
+                if j < n and glob[j] == ']':
+                    j += 1
+                while j < n and glob[j] != ']':
+                    j += 1
+                if j >= n:
+                    tokens.append('\\[')
+                else:
+                    tokens.append(self._CLASS_BODY.match(fnmatch.translate(glob[i - 1:j + 1])).group(1))
+                    i = j + 1
+            else:
+                tokens.append(re.escape(c))
+        # As in fnmatch, every '*' but the last takes the shortest run up to
+        # its literal tail atomically, so many stars cannot backtrack
+        # exponentially (lookahead and backreference emulate (?>...)). Group
+        # names are unique per matcher, as tokens share regexes.
+        stars = [i for i, token in enumerate(tokens) if token == '.*']
+        for start, end in reversed(list(zip(stars, stars[1:]))):
+            tail = ''.join(tokens[start + 1:end])
+            tokens[start:end] = [f'(?=(?P<a{self._atomic}>.*?{tail}))(?P=a{self._atomic})']
+            self._atomic += 1
+        return tokens
+
+
+def translate_git_pattern(pattern: str) -> Tuple[str, bool]:
+    """Translate a gitignore/gitattributes pattern into a regex source.
+    
+    Returns ``(regex, directory_only)``; see ``git_pattern_tokens``.
+    """
+    tokens, directory_only = git_pattern_tokens(pattern)
+    return ''.join(tokens), directory_only
+
+
+def git_pattern_tokens(pattern: str) -> Tuple[List[str], bool]:
+    """Translate a gitignore/gitattributes pattern into regex source tokens.
+    
+    Returns ``(tokens, directory_only)``. The joined tokens match POSIX paths
+    relative to the directory of the file declaring the pattern: patterns
+    containing a slash are anchored there, others match a basename at any
+    depth. ``*`` and ``?`` do not cross ``/``; ``**/``, ``/**/`` and a
+    trailing ``/**`` span directories; ``[...]`` classes (with ``!``
+    negation) and backslash escapes are supported. A trailing ``/`` marks a
+    directory-only pattern.
+    """
+    directory_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    
+    regex = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/'):
+                if i + 2 == n:
+                    regex.append('.*')  # Trailing '/**': everything below
+                    i += 2
+                    continue
+                if pattern[i + 2] == '/':
+                    regex.append('(?:.*/)?')  # '**/': zero or more directories
+                    i += 3
+                    continue
+            while i < n and pattern[i] == '*':
+                i += 1
+            regex.append('[^/]*')
+            continue
+        if c == '?':
+            regex.append('[^/]')
+        elif c == '[':
+            start = i + 2 if pattern[i + 1:i + 2] in ('!', '^') else i + 1
+            # A ']' right after '[' (or '[!') is a member, not the end of the class
+            end = pattern.find(']', start + 1 if pattern[start:start + 1] == ']' else start)
+            if end == -1:
+                regex.append(re.escape(c))
+            else:
+                body = pattern[start:end].replace('\\', '\\\\').replace('[', '\\[')
+                if body.startswith(']'):
+                    body = '\\' + body
+                regex.append('[' + ('^' if start == i + 2 else '') + body + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    
+    if not anchored:
+        regex.insert(0, '(?:.*/)?')
+    return regex, directory_only
+
+
+class GitAttributes:
+    """Linguist attributes declared in one or more ``.gitattributes`` files.
+    
+    Only the attributes NXLC acts on are kept. Each rule is compiled once,
+    relative to the directory of the file that declared it; later rules (and
+    deeper files, merged after their parents) override earlier ones, as in git.
+    """
+    
+    ATTRIBUTES = ('linguist-vendored', 'linguist-generated', 'linguist-language')
+    BOOLEAN_ATTRIBUTES = ('linguist-vendored', 'linguist-generated')
+    
+    __slots__ = ('rules', 'unset')
+    
+    def __init__(self, rules: Optional[List[Tuple[str, Any, bool, Dict[str, Any]]]] = None):
+        self.rules = rules or []  # (base prefix, compiled regex, directory_only, attributes)
+        # Attributes some rule unsets; directories are never pruned on those
+        self.unset = {name for _, _, _, attrs in self.rules
+                      for name, value in attrs.items() if value is False or value is None}
+    
+    @classmethod
+    def parse(cls, path: Path) -> 'GitAttributes':
+        """Parse the linguist attributes of a ``.gitattributes`` file."""
+        base = path.parent.as_posix().rstrip('/') + '/'
+        rules = []
+        for line in IgnoreFileReader.read_ignore_file(path):
+            fields = line.split()
+            pattern = fields[0]
+            if pattern.startswith('"') and pattern.endswith('"') and len(pattern) > 1:
+                pattern = pattern[1:-1]
+            # Macro definitions and negative patterns are not valid attribute rules
+            if pattern.startswith('[attr]') or pattern.startswith('!'):
+                continue
+            attrs = {}
+            for field in fields[1:]:
+                if field.startswith('-'):
+                    name, value = field[1:], False
+                elif field.startswith('!'):
+                    name, value = field[1:], None
+                elif '=' in field:
+                    name, value = field.split('=', 1)
+                else:
+                    name, value = field, True
+                if name not in cls.ATTRIBUTES:
+                    continue
+                if name in cls.BOOLEAN_ATTRIBUTES and isinstance(value, str):
+                    value = value.lower() not in ('false', '0', 'no')
+                attrs[name] = value
+            if attrs:
+                regex, directory_only = translate_git_pattern(pattern)
+                try:
+                    compiled = re.compile(regex + r'\Z', re.DOTALL)
+                except re.error as e:
+                    logging.warning(f"Skipping invalid attribute pattern {pattern!r} in {path}: {e}")
+                    continue
+                rules.append((base, compiled, directory_only, attrs))
+        return cls(rules)
+    
+    @classmethod
+    def merge(cls, parent: 'GitAttributes', local: 'GitAttributes') -> 'GitAttributes':
+        """Combine a parent directory's rules with a deeper file's (which win)."""
+        return cls(parent.rules + local.rules)
+    
+    def lookup(self, path: Path, is_dir: bool = False) -> Dict[str, Any]:
+        """Return the attributes in effect for an absolute ``path``."""
+        path_str = path.as_posix()
+        result: Dict[str, Any] = {}
+        for base, regex, directory_only, attrs in self.rules:
+            if not path_str.startswith(base) or (directory_only and not is_dir):
+                continue
+            relative = path_str[len(base):]
+            # A directory also matches patterns covering everything below it ('dir/**')
+            if regex.match(relative) or (is_dir and regex.match(relative + '/')):
+                result.update(attrs)
+        return result
+    
+    def prunes(self, directory: Path, attribute: str) -> bool:
+        """True if ``attribute`` is set on ``directory`` and no rule can unset it below."""
+        return attribute not in self.unset and self.lookup(directory, is_dir=True).get(attribute) is True
+
+
+class GitIgnore:
+    """Exclude rules of a git work tree, compiled once per source file.
+
+    Sources are merged in git's precedence order, lowest first:
+    ``core.excludesFile``, ``.git/info/exclude``, then every ``.gitignore``
+    from the root down. Patterns match paths relative to the directory of
+    the ``.gitignore`` declaring them (the work-tree root for the other two
+    sources). Within the deepest source that matches a path, its last
+    matching pattern decides, so ``!pattern`` re-includes. As in git,
+    nothing below an excluded directory can be re-included, because the
+    walk never enters it.
+    """
+
+    # Characters that make a git pattern more than a literal
+    SPECIAL = re.compile(r'[*?\[\\]')
+
+    __slots__ = ('levels',)
+
+    def __init__(self, levels: Optional[List[Tuple[str, PatternIndex]]] = None):
+        # (base prefix, compiled patterns), lowest precedence first
+        self.levels = levels or []
+
+    @classmethod
+    def parse(cls, path: Path) -> 'GitIgnore':
+        """Compile a ``.gitignore`` file relative to its directory."""
+        return cls.from_patterns(path.parent, IgnoreFileReader.read_ignore_file(path))
+
+    @classmethod
+    def from_patterns(cls, directory: Path, patterns: List[str]) -> 'GitIgnore':
+        """Compile ``patterns`` matching relative to ``directory``."""
+        index = PatternIndex()
+        for pattern in patterns:
+            ignored = not pattern.startswith('!')
+            if not ignored:
+                pattern = pattern[1:]
+            tokens, directory_only = git_pattern_tokens(pattern)
+            body = pattern.rstrip('/')
+            if cls.SPECIAL.search(body):
+                try:
+                    re.compile(''.join(tokens))
+                except re.error as e:
+                    logging.warning(f"Skipping invalid ignore pattern {pattern!r} in {directory}: {e}")
+                    continue
+            if '/' not in body:
+                # Basename patterns: literal names and '*.ext' need no regex
+                if not cls.SPECIAL.search(body):
+                    index.add(ignored, directory_only, 'name', body)
+                    continue
+                if body.startswith('*.') and not cls.SPECIAL.search(body, 1):
+                    index.add(ignored, directory_only, 'extension', body[1:])
+                    continue
+            else:
+                body = body.lstrip('/')
+                if not cls.SPECIAL.search(body):
+                    index.add(ignored, directory_only, 'path', body)
+                    continue
+                prefix = literal_prefix(body, cls.SPECIAL)
+                if prefix:
+                    index.add(ignored, directory_only, 'prefix', prefix, [('path', tokens)])
+                    continue
+            index.add(ignored, directory_only, 'regex', alternatives=[('path', tokens)])
+        if not index.ignored:
+            return cls()
+        return cls([(directory.as_posix().rstrip('/') + '/', index.compile())])
+
+    @classmethod
+    def for_repository(cls, root: Path) -> 'GitIgnore':
+        """Rules of ``core.excludesFile`` and ``.git/info/exclude`` for the work tree at ``root``."""
+        result = cls()
+        sources = [cls.excludes_file(root)]
+        git_dir = cls.git_dir(root)
+        if git_dir is not None:
+            sources.append(git_dir / 'info' / 'exclude')
+        for source in sources:
+            if source is not None and source.is_file():
+                result = cls.merge(result, cls.from_patterns(root, IgnoreFileReader.read_ignore_file(source)))
+        return result
+
+    @staticmethod
+    def git_dir(root: Path) -> Optional[Path]:
+        """The common git directory of the work tree at ``root`` (linked worktrees included)."""
+        git_dir = root / '.git'
+        if git_dir.is_file():
+            try:
+                line = git_dir.read_text(encoding='utf-8', errors='ignore').strip()
+            except OSError:
+                return None
+            if not line.startswith('gitdir:'):
+                return None
+            git_dir = (root / line[len('gitdir:'):].strip()).resolve()
+        if not git_dir.is_dir():
+            return None
+        # Linked worktrees share info/exclude with the main repository
+        commondir = git_dir / 'commondir'
+        if commondir.is_file():
+            try:
+                git_dir = (git_dir / commondir.read_text(encoding='utf-8', errors='ignore').strip()).resolve()
+            except OSError:
+                pass
+        return git_dir
+
+    @staticmethod
+    def excludes_file(root: Path) -> Optional[Path]:
+        """The global excludes file: ``core.excludesFile``, or git's XDG default."""
+        git = shutil.which('git')
+        if git:
+            try:
+                completed = subprocess.run([git, 'config', '--path', '--get', 'core.excludesFile'],
+                                           cwd=str(root), capture_output=True, text=True, timeout=10)
+                if completed.returncode == 0 and completed.stdout.strip():
+                    return Path(completed.stdout.strip())
+            except (OSError, subprocess.SubprocessError):
+                pass
+        xdg_config = os.environ.get('XDG_CONFIG_HOME')
+        return (Path(xdg_config) if xdg_config else Path.home() / '.config') / 'git' / 'ignore'
+
+    @classmethod
+    def merge(cls, parent: 'GitIgnore', local: 'GitIgnore') -> 'GitIgnore':
+        """Combine a parent directory's rules with a deeper source's (which win)."""
+        return cls(parent.levels + local.levels)
+
+    def ignored(self, path: Path, is_dir: bool = False) -> bool:
+        """Whether git ignores the absolute ``path``."""
+        path_str = path.as_posix()
+        for base, index in reversed(self.levels):
+            if not path_str.startswith(base):
+                continue
+            relative = path_str[len(base):]
+            verdict = index.last_match(relative, relative.rpartition('/')[2], relative.split('/'), is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+
 class IgnoreContext:
     """Manages ignore patterns at a specific directory level."""
     
@@ -163,6 +1001,7 @@ class IgnoreContext:
         self.pattern_matcher = pattern_matcher
         self.parent = parent_context
         self.patterns = []  # Local patterns from this dir's .nxlcignore
+        self.compiled_patterns = self.patterns  # Matcher-specific compiled form
         self.cache = cache_strategy or LRUCacheStrategy()
         
         # Auto-detect case sensitivity if not specified
@@ -186,6 +1025,9 @@ class IgnoreContext:
                 logging.warning(f"Failed to stat .nxlcignore file {nxlcignore_path}: {e}")
                 return
             self.patterns = self.pattern_matcher.process_ignore_file(nxlcignore_path)
+            # Matchers that can compile patterns do so once per ignore file
+            compile_patterns = getattr(self.pattern_matcher, 'compile_patterns', None)
+            self.compiled_patterns = compile_patterns(self.patterns) if compile_patterns else self.patterns
     
     def should_ignore(self, path: Path) -> bool:
         """Check if path should be ignored based on current and parent patterns."""
@@ -220,7 +1062,7 @@ class IgnoreContext:
             return cached_result, self if cached_result else None
         
         # Check local patterns first (more specific)
-        if self.pattern_matcher.matches_patterns(relative_path, self.patterns):
+        if self.pattern_matcher.matches_patterns(relative_path, self.compiled_patterns):
             self.cache.set(cache_key, True)
             return True, self
         
@@ -235,32 +1077,138 @@ class IgnoreContext:
         return False, None
 
 
+class DirectoryIgnoreState:
+    """What the ``.nxlcignore`` contexts decide for the entries of one directory.
+
+    Computed once per directory from its parent's state as the walk
+    descends, instead of caching a verdict per path. A context whose
+    patterns give every path below the directory the same verdict drops
+    out; if that verdict is "ignored", so is every entry (``ignored`` is
+    True). When no context is left, no entry is ignored (``ignored`` is
+    False). Otherwise (``ignored`` is None) entries are checked against
+    the remaining ``levels``: ``(context, directory prefix relative to it,
+    floor)``, where patterns up to ``floor`` cannot change the verdict.
+    """
+
+    __slots__ = ('ignored', 'levels')
+
+    def __init__(self, ignored: Optional[bool] = False, levels: Tuple = ()):
+        self.ignored = ignored
+        self.levels = levels
+
+    @classmethod
+    def for_context(cls, directory: Path, context: Optional[IgnoreContext]) -> 'DirectoryIgnoreState':
+        """State for ``directory`` under ``context`` and the contexts above it."""
+        levels = []
+        resolved = directory.resolve()
+        while context is not None:
+            try:
+                relative = resolved.relative_to(context.directory).as_posix()
+                levels.append((context, '' if relative == '.' else relative + '/', -1))
+            except ValueError:
+                pass
+            context = context.parent
+        return cls._decide(levels)
+
+    def descend(self, directory: Path, context: Optional[IgnoreContext] = None) -> 'DirectoryIgnoreState':
+        """State for subdirectory ``directory``; ``context`` is that of its own ``.nxlcignore``."""
+        if self.ignored or (context is None and self.ignored is not None):
+            return self  # Nothing new can change the verdict: it carries down
+        levels = [(level, prefix + directory.name + '/', floor) for level, prefix, floor in self.levels]
+        if context is not None:
+            levels.insert(0, (context, '', -1))
+        return self._decide(levels)
+
+    @classmethod
+    def _decide(cls, levels: List[Tuple]) -> 'DirectoryIgnoreState':
+        undecided = []
+        for context, prefix, floor in levels:
+            patterns = context.compiled_patterns
+            if isinstance(patterns, IgnoreMatcher):
+                floor, verdict = patterns.below(prefix[:-1], floor)
+                if verdict:
+                    return cls(True, ((context, prefix, floor),))
+                if verdict is None:
+                    undecided.append((context, prefix, floor))
+            elif patterns:
+                undecided.append((context, prefix, floor))
+        return cls(None if undecided else False, tuple(undecided))
+
+    def ignoring_context(self, name: str) -> Optional[IgnoreContext]:
+        """The context ignoring entry ``name`` of the directory, or None."""
+        if self.ignored is not None:
+            return self.levels[0][0] if self.ignored else None
+        for context, prefix, floor in self.levels:
+            patterns = context.compiled_patterns
+            if isinstance(patterns, IgnoreMatcher):
+                if patterns.matches_relative(prefix + name, floor):
+                    return context
+            elif context.pattern_matcher.matches_patterns(Path(prefix + name), patterns):
+                return context
+        return None
+
+
 class IgnoreContextFactory:
-    """Factory for creating IgnoreContext instances with consistent configuration."""
+    """Factory for creating IgnoreContext instances with consistent configuration.
+    
+    The contexts' caches come from ``cache_strategy_factory``, or from the
+    ``CACHE_STRATEGIES`` entry named by ``cache_strategy`` with
+    ``cache_size`` entries. ``cache_stats`` sums the counters of every
+    cache created. The caches serve ``IgnoreContext.should_ignore`` only:
+    the directory walk decides through ``DirectoryIgnoreState`` and never
+    consults them.
+    """
+    
+    CACHE_STRATEGIES: Dict[str, type] = {
+        'lru': LRUCacheStrategy,
+        'single-thread': SingleThreadLRUCacheStrategy,
+        'bounded-dict': BoundedDictCacheStrategy,
+        'sharded': ShardedLRUCacheStrategy,
+    }
     
     def __init__(self, 
                  pattern_matcher: PatternMatcher,
                  cache_strategy_factory: Callable[[], CacheStrategy] = None,
-                 case_insensitive: Optional[bool] = None):
+                 case_insensitive: Optional[bool] = None,
+                 cache_strategy: Optional[str] = None,
+                 cache_size: int = 1000):
+        if cache_strategy is not None:
+            if cache_strategy_factory is not None:
+                raise ValueError("Pass either cache_strategy or cache_strategy_factory, not both")
+            if cache_strategy not in self.CACHE_STRATEGIES:
+                raise ValueError(f"Unknown cache strategy {cache_strategy!r}; "
+                                 f"expected one of {', '.join(self.CACHE_STRATEGIES)}")
+            cache_strategy_factory = functools.partial(self.CACHE_STRATEGIES[cache_strategy], cache_size)
         self.pattern_matcher = pattern_matcher
         self.cache_strategy_factory = cache_strategy_factory or LRUCacheStrategy
         self.case_insensitive = case_insensitive
+        self.caches: List[CacheStrategy] = []
     
     def create_context(self, 
                       directory: Path, 
                       parent: Optional[IgnoreContext] = None) -> Optional[IgnoreContext]:
         """Create context only if .nxlcignore exists (performance optimization)."""
         nxlcignore_path = directory / '.nxlcignore'
-        if not nxlcignore_path.exists() and parent is None:
+        if not nxlcignore_path.exists():
             return None
         
+        cache = self.cache_strategy_factory()
+        self.caches.append(cache)
         return IgnoreContext(
             directory=directory,
             pattern_matcher=self.pattern_matcher,
             parent_context=parent,
-            cache_strategy=self.cache_strategy_factory(),
+            cache_strategy=cache,
             case_insensitive=self.case_insensitive
         )
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts summed over the caches of all created contexts."""
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0}
+        for cache in self.caches:
+            for name, count in cache.stats().items():
+                totals[name] = totals.get(name, 0) + count
+        return totals
 
 
 class LineCounterPatternAdapter:
@@ -280,8 +1228,12 @@ class LineCounterPatternAdapter:
         """Parse an ignore file using shared reader."""
         return self.file_reader.read_ignore_file(path)
     
-    def matches_patterns(self, path: Path, patterns: List[str]) -> bool:
-        """Check if path matches patterns using LineCounter logic."""
+    def compile_patterns(self, patterns: List[str]) -> IgnoreMatcher:
+        """Compile an ignore file's patterns once for matching."""
+        return IgnoreMatcher(patterns)
+    
+    def matches_patterns(self, path: Path, patterns) -> bool:
+        """Check if path matches patterns (a list or compiled) using LineCounter logic."""
         return self.line_counter.is_nxlcignored(path, patterns)
 
 
@@ -332,6 +1284,924 @@ class HierarchicalConfigContext(Generic[T]):
 # CONFIGURATION AND LANGUAGE DEFINITIONS
 # ============================================================================
 
+class DetectionIndex:
+    """Precompiled extension and filename lookup tables for language detection.
+
+    Built once from ``LANGUAGE_EXTENSIONS`` so detecting a file's language is a
+    single dict lookup rather than a scan over every language. Extensions (or
+    filenames) claimed by more than one language must name an explicit winner
+    in ``EXTENSION_DEFAULTS``; the full candidate list is kept in ``ambiguous``.
+    """
+
+    __slots__ = ('extensions', 'filenames', 'ambiguous')
+
+    def __init__(self, language_extensions: Dict[str, List[str]],
+                 extension_defaults: Dict[str, str]):
+        candidates: Dict[str, List[str]] = {}
+        for language, entries in language_extensions.items():
+            for entry in entries:
+                claimants = candidates.setdefault(entry.lower(), [])
+                if language not in claimants:
+                    claimants.append(language)
+
+        self.extensions: Dict[str, str] = {}
+        self.filenames: Dict[str, str] = {}
+        self.ambiguous: Dict[str, Tuple[str, ...]] = {}
+
+        for key, claimants in candidates.items():
+            if len(claimants) > 1:
+                winner = extension_defaults.get(key)
+                if winner not in claimants:
+                    raise ValueError(
+                        f"Ambiguous entry {key!r} claimed by {', '.join(claimants)} "
+                        f"needs an explicit default in EXTENSION_DEFAULTS"
+                    )
+                self.ambiguous[key] = tuple(claimants)
+            else:
+                winner = claimants[0]
+
+            if key.startswith('.'):
+                self.extensions[key] = winner
+            else:
+                self.filenames[key] = winner
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON-serializable compiled tables."""
+        return {'extensions': self.extensions, 'filenames': self.filenames,
+                'ambiguous': {key: list(claimants) for key, claimants in self.ambiguous.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DetectionIndex':
+        """Rebuild an index from ``to_dict()`` output without re-validating it."""
+        index = cls.__new__(cls)
+        index.extensions = dict(data['extensions'])
+        index.filenames = dict(data['filenames'])
+        index.ambiguous = {key: tuple(claimants) for key, claimants in data['ambiguous'].items()}
+        return index
+
+    def lookup(self, filename: str, suffix: str) -> Optional[str]:
+        """Return the language for an exact filename or (lowercased) suffix, if indexed."""
+        language = self.filenames.get(filename.lower())
+        if language is None and suffix:
+            language = self.extensions.get(suffix)
+        return language
+
+
+class FilenameRuleSet:
+    """Special-filename rules compiled into one dispatch structure.
+    
+    Rules are ``(kind, value, language)`` tuples where kind is one of
+    ``exact``, ``prefix``, ``suffix`` or ``glob``; matching is
+    case-insensitive. Exact names are a dict lookup and always win. All other
+    rules are compiled, in declaration order, into a single regex alternation
+    so a filename is checked against every rule in one pass and the earliest
+    declared rule takes precedence.
+    """
+    
+    RULE_KINDS = ('exact', 'prefix', 'suffix', 'glob')
+    
+    __slots__ = ('exact', '_pattern', '_languages')
+    
+    def __init__(self, rules: List[Tuple[str, str, str]]):
+        self.exact: Dict[str, str] = {}
+        self._languages: List[str] = []
+        alternatives = []
+        
+        for kind, value, language in rules:
+            value = value.lower()
+            if kind == 'exact':
+                self.exact.setdefault(value, language)
+                continue
+            if kind == 'prefix':
+                regex = re.escape(value) + '.*'
+            elif kind == 'suffix':
+                regex = '.*' + re.escape(value)
+            elif kind == 'glob':
+                regex = fnmatch.translate(value)
+            else:
+                raise ValueError(f"Unknown filename rule kind {kind!r} (expected one of {self.RULE_KINDS})")
+            alternatives.append(f"(?P<r{len(self._languages)}>{regex})")
+            self._languages.append(language)
+        
+        self._pattern = re.compile('|'.join(alternatives), re.DOTALL) if alternatives else None
+    
+    def match(self, filename: str) -> Optional[str]:
+        """Return the language of the highest-precedence rule matching ``filename``."""
+        name = filename.lower()
+        language = self.exact.get(name)
+        if language is None and self._pattern is not None:
+            match = self._pattern.fullmatch(name)
+            if match:
+                language = self._languages[int(match.lastgroup[1:])]
+        return language
+
+
+class ConflictScorer:
+    """Keyword scorer for one conflicted extension.
+    
+    All candidate keywords are compiled into a single regex alternation with
+    one named group per language, so the head buffer is scanned once and each
+    hit is attributed to its language.
+    """
+    
+    __slots__ = ('languages', '_pattern')
+    
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.languages = list(keywords)
+        alternatives = [f"(?P<l{i}>{'|'.join(fragments)})"
+                        for i, fragments in enumerate(keywords.values())]
+        self._pattern = re.compile('|'.join(alternatives), re.MULTILINE)
+    
+    def score(self, content: str) -> Dict[str, int]:
+        """Count keyword hits per candidate language."""
+        scores = dict.fromkeys(self.languages, 0)
+        for match in self._pattern.finditer(content):
+            scores[self.languages[int(match.lastgroup[1:])]] += 1
+        return scores
+
+
+class ShebangParser:
+    """Compiled shebang and editor-modeline parser.
+    
+    Interpreters are matched on their basename with any version suffix
+    removed (``/usr/bin/python3.12`` -> ``python``), after unwrapping
+    ``env`` and ``env -S`` invocations, so path components such as
+    ``/nix/store/abc-shellutils/bin/lua`` cannot cause false matches.
+    Results are memoized by interpreter string.
+    """
+    
+    SHEBANG = re.compile(r'#![ \t]*([^\r\n]*)')
+    VERSION_SUFFIX = re.compile(r'[-_]?\d+(?:\.\d+)*$')
+    VIM_MODELINE = re.compile(
+        r'(?:^|\s)(?:vi|vim|ex)(?:[<=>]?\d+)?:(?:.*?[\s:])?(?:ft|filetype|syntax)=([\w.+#-]+)',
+        re.MULTILINE)
+    EMACS_MODELINE = re.compile(r'-\*-(.+?)-\*-')
+    EMACS_MODE = re.compile(r'(?:^|;)\s*mode:\s*([\w.+#-]+)', re.IGNORECASE)
+    
+    # env options that consume the following argument
+    ENV_OPTIONS_WITH_ARG = {'-u', '--unset', '-C', '--chdir', '-P'}
+    
+    MODELINE_LINES = 5
+    MAX_CACHE_SIZE = 1024
+    
+    def __init__(self, interpreters: Dict[str, str], modeline_names: Dict[str, str],
+                 language_names: Dict[str, List[str]]):
+        self.interpreters = interpreters
+        # Modeline names fall back to interpreter names and plain language names
+        self.modeline_names = {name.lower(): name for name in language_names}
+        self.modeline_names.update(interpreters)
+        self.modeline_names.update(modeline_names)
+        self._cache: Dict[str, str] = {}
+    
+    def interpreter(self, command: str) -> Optional[str]:
+        """Return the interpreter basename of a shebang command line, unwrapping ``env``."""
+        tokens = command.split()
+        if not tokens:
+            return None
+        program = tokens[0]
+        if program.rsplit('/', 1)[-1] == 'env':
+            program = None
+            args = iter(tokens[1:])
+            for token in args:
+                if token == '-S' or token == '--split-string':
+                    continue
+                if token.startswith('-S'):
+                    program = token[2:]
+                    break
+                if token in self.ENV_OPTIONS_WITH_ARG:
+                    next(args, None)
+                    continue
+                if token.startswith('-') or ('=' in token):
+                    continue
+                program = token
+                break
+            if not program:
+                return None
+        name = program.rsplit('/', 1)[-1].lower()
+        if name.endswith('.exe'):
+            name = name[:-4]
+        return name
+    
+    def language_for_interpreter(self, name: str) -> str:
+        """Map an interpreter basename (possibly versioned) to a language."""
+        language = self.interpreters.get(name)
+        if language is None:
+            language = self.interpreters.get(self.VERSION_SUFFIX.sub('', name), 'Unknown')
+        return language
+    
+    def detect_shebang(self, first_line: str) -> str:
+        """Detect language from a shebang line (``Unknown`` when absent)."""
+        match = self.SHEBANG.match(first_line)
+        if not match:
+            return 'Unknown'
+        command = match.group(1).strip()
+        language = self._cache.get(command)
+        if language is None:
+            name = self.interpreter(command)
+            language = self.language_for_interpreter(name) if name else 'Unknown'
+            if len(self._cache) >= self.MAX_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[command] = language
+        return language
+    
+    def detect_modeline(self, head: str, tail: str = '') -> str:
+        """Detect language from vim modelines (first/last lines) or an emacs ``-*-`` line."""
+        lines = head.split('\n', self.MODELINE_LINES)[:self.MODELINE_LINES]
+        
+        # Emacs only honours the first line, or the second after a shebang
+        emacs_lines = lines[:2] if lines and lines[0].startswith('#!') else lines[:1]
+        for line in emacs_lines:
+            match = self.EMACS_MODELINE.search(line)
+            if match:
+                body = match.group(1)
+                mode = self.EMACS_MODE.search(body) if ':' in body else None
+                name = mode.group(1) if mode else body.strip()
+                language = self._modeline_language(name)
+                if language != 'Unknown':
+                    return language
+        
+        candidates = lines + (tail or head).rsplit('\n', self.MODELINE_LINES + 1)[-self.MODELINE_LINES - 1:]
+        for line in candidates:
+            match = self.VIM_MODELINE.search(line)
+            if match:
+                language = self._modeline_language(match.group(1))
+                if language != 'Unknown':
+                    return language
+        return 'Unknown'
+    
+    def _modeline_language(self, name: str) -> str:
+        name = name.lower()
+        if name.endswith('-mode'):
+            name = name[:-5]
+        return self.modeline_names.get(name, 'Unknown')
+
+
+class LanguageTable:
+    """Language names interned to small integer IDs.
+    
+    IDs are dense and append-only: names known at definition-load time are
+    numbered first, and names only met during a scan (Linguist output,
+    ``linguist-language`` values) are added on first use, so an ID never
+    changes once handed out.
+    """
+    
+    __slots__ = ('names', 'ids', '_lock')
+    
+    def __init__(self, names: Optional[List[str]] = None):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for name in names or ():
+            self.intern(name)
+    
+    def intern(self, name: str) -> int:
+        """Return the ID of ``name``, assigning the next free one if it is new."""
+        language_id = self.ids.get(name)
+        if language_id is None:
+            with self._lock:
+                language_id = self.ids.get(name)
+                if language_id is None:
+                    language_id = len(self.names)
+                    self.names.append(name)
+                    self.ids[name] = language_id
+        return language_id
+
+
+class CommentClassifier:
+    """Comment rules of one language, compiled into a line-classifying scanner.
+    
+    A line is blank when it is whitespace only, a comment when all of its
+    other content lies inside comments (or docstrings), and code otherwise.
+    Comments are found by a single-pass state machine over code,
+    block-comment and string states, so comment markers inside string
+    literals are ignored and block comments end at their end marker.
+    
+    The string syntax comes from the language's scanner family (see
+    ``LanguageDefinitions.STRING_SYNTAX``). A triple-quoted string that opens
+    a line in the ``python`` family is a docstring and counts as comment;
+    elsewhere string contents count as code.
+    
+    The scanner runs over the whole file buffer. Substring searches for
+    comment and docstring openers jump to the next candidate; only when a
+    string starts before it on its line (or anywhere, in languages with
+    multi-line strings) does one regex consume plain code together with
+    complete string literals up to the next token. A second regex
+    alternation then identifies that token, consuming line comments and
+    non-nested block comments whole. Lines are classified from the
+    resulting comment spans. ``classify`` is bound to a function specialized
+    for the syntax the language has: no comments at all, single-line
+    comments and strings only (a line is a comment exactly when it starts
+    with a marker; see ``single_line_counter``), or the full scanner.
+    Buffers that contain no character a comment or docstring can start
+    with skip classification entirely.
+    """
+    
+    # Token kinds: a complete comment, an opened block comment, a complete
+    # string and an unterminated string
+    COMMENT, BLOCK, STRING, OPEN_STRING = range(4)
+    
+    NONSPACE = re.compile(r'\S')
+    
+    __slots__ = ('single', 'single_first', 'single_match', 'skip_match', 'skip_to_line_end', 'stop_markers',
+                 'string_first', 'token_match', 'tokens', 'comment_first', 'multiline', 'classify')
+    
+    def __init__(self, patterns: Dict[str, List[str]], strings: Optional[List[Tuple]] = None,
+                 nested: bool = False, line_start_markers: Optional[Set[str]] = None,
+                 spaced_markers: bool = False):
+        """Compile ``patterns`` (a ``COMMENT_PATTERNS`` entry).
+        
+        ``strings`` are ``(delimiter, escapes, multiline, docstring)``
+        tuples; ``nested`` makes block comments nest; markers in
+        ``line_start_markers`` only count at the start of a line; and
+        ``spaced_markers`` requires single-line markers elsewhere to follow
+        whitespace (``#`` in ``${#var}`` is not a shell comment).
+        """
+        line_start_markers = line_start_markers or set()
+        single = list(patterns.get('single', ()))
+        blocks = list(zip(patterns.get('multi_start', ()), patterns.get('multi_end', ())))
+        strings = list(strings or ())
+        docstrings = {delimiter for delimiter, _, _, docstring in strings if docstring}
+        blocks = [(start, end) for start, end in blocks if start not in docstrings]
+        comment_markers = set(single) | {start for start, _ in blocks}
+        strings = [spec for spec in strings if spec[0] not in comment_markers]
+        
+        self.single = tuple(single)
+        self.single_first = frozenset(marker[0] for marker in single)
+        self.single_match = re.compile(r'\s*(?:' + '|'.join(
+            re.escape(marker[0]) + self._marker_rest(marker, spaced_markers) for marker in single) + ')').match
+        
+        # Branches as (marker, priority, first character, opener pattern,
+        # group pattern, kind, data). Longer markers win at the same
+        # position, comments win over strings, and complete forms are tried
+        # before bare openers.
+        branches = []
+        for marker in single:
+            rest = self._marker_rest(marker, spaced_markers)
+            branches.append((marker, 0, marker[0], rest, rest + r'[^\n]*', self.COMMENT, None))
+        for start, end in blocks:
+            rest = self._marker_rest(start)
+            nests, anchored = nested and start != end, end in line_start_markers
+            if not nests and not anchored:
+                # Matched whole; the bare opener below only catches unterminated comments
+                branches.append((start, 1, start[0], rest, rest + self._block_body(end), self.COMMENT, None))
+            branches.append((start, 2, start[0], rest, rest, self.BLOCK,
+                             (self._block_finder(start, end, nests, anchored), nests)))
+        for delimiter, escapes, multiline, docstring in strings:
+            rest = re.escape(delimiter[1:])
+            branches.append((delimiter, 3, delimiter[0], rest, rest + self._string_body(delimiter, escapes, multiline),
+                             self.STRING, docstring))
+            branches.append((delimiter, 4, delimiter[0], rest, rest, self.OPEN_STRING,
+                             (multiline, docstring, re.compile(self._string_body(delimiter, escapes, multiline)).match)))
+        branches.sort(key=lambda branch: (-len(branch[0]), branch[1]))
+        
+        # Group numbers index the token table through match.lastindex
+        self.skip_match = self.token_match = None
+        self.comment_first = tuple({first for _, _, first, _, _, kind, data in branches
+                                    if kind in (self.COMMENT, self.BLOCK)
+                                    or (kind == self.STRING and data) or (kind == self.OPEN_STRING and data[1])})
+        self.tokens = [(None, None, False)] + [(kind, data, marker in line_start_markers)
+                                               for marker, _, _, _, _, kind, data in branches]
+        if branches:
+            self.token_match = re.compile('|'.join(
+                f'{re.escape(first)}({pattern})' for _, _, first, _, pattern, _, _ in branches)).match
+            
+            # Code skipper: runs of characters no token starts with, complete
+            # strings that cannot be docstrings, and token first characters
+            # that start nothing here. It stops where Python has to decide,
+            # which only needs the openers of those tokens.
+            first_chars = '[' + ''.join(sorted({re.escape(branch[2]) for branch in branches})) + ']'
+            stops = '|'.join(sorted({f'{re.escape(first)}{opener}'
+                                     for marker, _, first, opener, _, kind, data in branches
+                                     if kind in (self.COMMENT, self.BLOCK) or marker in line_start_markers
+                                     or (kind == self.STRING and data)}, key=len, reverse=True))
+            openers = '|'.join(re.escape(marker) for marker, _, _, _, _, kind, _ in branches
+                               if kind == self.OPEN_STRING)
+            complete = '|'.join(f'{re.escape(first)}{pattern}' for marker, _, first, _, pattern, kind, data in branches
+                                if kind == self.STRING and not data)
+            stop = f'(?!{stops})' if stops else ''
+            parts = [f'[^{first_chars[1:-1]}]+']
+            if complete:
+                parts.append(f'{stop}(?:{complete})')
+            parts.append(f'(?!{"|".join(filter(None, (stops, openers)))}){first_chars}')
+            self.skip_match = re.compile('(?:' + '|'.join(parts) + ')*').match
+        
+        # Openers of everything the skipper stops at; the scanner jumps
+        # between their occurrences, found with plain substring searches,
+        # and the token regex rejects those that fail a word or spacing
+        # rule. A marker with another marker as its prefix adds nothing.
+        openers = {marker for marker, _, _, _, _, kind, data in branches
+                   if kind in (self.COMMENT, self.BLOCK) or marker in line_start_markers
+                   or (kind == self.STRING and data)}
+        self.stop_markers = tuple(sorted(marker for marker in openers
+                                         if not any(other != marker and marker.startswith(other) for other in openers)))
+        # Unless a multi-line string that is not a stop can hide an opener,
+        # the skipper is only needed when a string starts before the opener
+        # on its line, and stops at the line end; otherwise it runs from
+        # token to token over the whole buffer
+        self.skip_to_line_end = not any(multiline and not docstring for _, _, multiline, docstring in strings)
+        self.string_first = tuple({delimiter[0] for delimiter, _, _, _ in strings})
+        
+        self.multiline = bool(blocks) or any(multiline for _, _, multiline, _ in strings)
+        if self.multiline:
+            self.classify = self._count_scan
+        elif single:
+            self.classify = self.single_line_counter(self.single)
+        else:
+            self.classify = self._count_code
+    
+    @staticmethod
+    def _marker_rest(marker: str, spaced: bool = False) -> str:
+        """Regex for a marker after its first character.
+        
+        Word markers (``REM``, ``comment``) need word boundaries, and spaced
+        markers must follow whitespace; the boundary before the marker is a
+        lookbehind over its first character so every branch can still start
+        with a literal.
+        """
+        first = re.escape(marker[0])
+        pattern = ''
+        if marker[0].isalnum() or marker[0] == '_':
+            pattern = rf'(?<!\w{first})'
+        elif spaced:
+            pattern = rf'(?<!\S{first})'
+        pattern += re.escape(marker[1:])
+        if marker[-1].isalnum() or marker[-1] == '_':
+            pattern += r'(?!\w)'
+        return pattern
+    
+    @classmethod
+    def _block_finder(cls, start: str, end: str, nested: bool, anchored: bool) -> Callable:
+        """``search`` function for the inside of a block comment.
+        
+        Group 1 is the end marker and, for nested comments, group 2 another
+        start marker. Anchored end markers only match at the start of a line.
+        """
+        end_pattern = re.escape(end[0]) + cls._marker_rest(end)
+        if anchored:
+            return re.compile(rf'^[ \t]*({end_pattern})', re.MULTILINE).search
+        if nested:
+            return re.compile(f'({end_pattern})|({re.escape(start[0]) + cls._marker_rest(start)})').search
+        return re.compile(f'({end_pattern})').search
+    
+    @classmethod
+    def _block_body(cls, end: str) -> str:
+        """Regex for the rest of a non-nested block comment, through its end marker.
+        
+        Punctuation end markers are unrolled into runs of a negated class,
+        which the regex engine consumes far faster than a lazy ``[\\s\\S]*?``.
+        """
+        first, rest = re.escape(end[0]), re.escape(end[1:])
+        if end[0].isalnum() or end[0] == '_' or end[-1].isalnum() or end[-1] == '_':
+            return r'[\s\S]*?' + first + cls._marker_rest(end)
+        if not rest:
+            return f'[^{first}]*{first}'
+        return f'[^{first}]*(?:{first}(?!{rest})[^{first}]*)*{first}{rest}'
+    
+    @staticmethod
+    def _string_body(delimiter: str, escapes: bool, multiline: bool) -> str:
+        """Regex for the rest of a string after its opening delimiter, through the closing one.
+        
+        Single-line strings cannot run past the end of their line unless
+        the newline is escaped.
+        """
+        first, rest = re.escape(delimiter[0]), re.escape(delimiter[1:])
+        excluded = first + ('\\\\' if escapes else '') + ('' if multiline else '\\n')
+        body = f'[^{excluded}]'
+        inner = [r'\\[\s\S]'] if escapes else []
+        if rest:
+            inner.append(f'{first}(?!{rest})')
+        if inner:
+            return f'{body}*(?:(?:{"|".join(inner)}){body}*)*{re.escape(delimiter)}'
+        return f'{body}*{re.escape(delimiter)}'
+    
+    def count_buffer(self, text: str) -> Tuple[int, int, int]:
+        """Return (total, code, comment) lines of a whole file buffer."""
+        if not text:
+            return (0, 0, 0)
+        code, comment = self.classify(text)
+        return (text.count('\n') + (text[-1] != '\n'), code, comment)
+    
+    def count(self, lines: List[str]) -> Tuple[int, int]:
+        """Return (code, comment) for a file's lines."""
+        return self.classify(''.join(lines))
+    
+    @staticmethod
+    def _nonblank_lines(text: str) -> int:
+        """Number of lines of ``text`` with non-whitespace content."""
+        lines = text.split('\n')
+        return len(lines) - lines.count('') - sum(map(str.isspace, lines))
+    
+    def _count_code(self, text: str) -> Tuple[int, int]:
+        """(code, comment) for a language without comment syntax."""
+        return (self._nonblank_lines(text), 0)
+    
+    def _count_single(self, text: str) -> Tuple[int, int]:
+        """(code, comment) for single-line comments and single-line strings only.
+        
+        Without multi-line state a line is a comment exactly when its first
+        non-whitespace token is a comment marker.
+        """
+        if not any(first in text for first in self.single_first):
+            return (self._nonblank_lines(text), 0)
+        prefixes, first, match = self.single, self.single_first, self.single_match
+        code = comment = 0
+        for line in text.split('\n'):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped[0] in first and stripped.startswith(prefixes) and match(stripped):
+                comment += 1
+            else:
+                code += 1
+        return (code, comment)
+    
+    # Source template for generated single-line counters; ``absent`` and
+    # ``condition`` are filled with expressions over inlined marker literals
+    SINGLE_LINE_TEMPLATE = """
+def count_single_line(text):
+    if {absent}:
+        return (sum(1 for line in text.split('\\n') if line and not line.isspace()), 0)
+    code = comment = 0
+    for line in text.split('\\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if {condition}:
+            comment += 1
+        else:
+            code += 1
+    return (code, comment)
+"""
+    
+    # Generated counters by marker signature, shared between languages
+    _generated_counters: Dict[Tuple[str, ...], Callable] = {}
+    
+    @classmethod
+    def single_line_counter(cls, markers: Tuple[str, ...]) -> Callable[[str], Tuple[int, int]]:
+        """Return the generated ``(code, comment)`` counter for a set of single-line markers.
+        
+        Languages with the same markers share one function, whatever their
+        order or duplicates.
+        """
+        signature = tuple(sorted(set(markers)))
+        counter = cls._generated_counters.get(signature)
+        if counter is None:
+            counter = cls._generate_single_line_counter(signature)
+            cls._generated_counters[signature] = counter
+        return counter
+    
+    @classmethod
+    def _generate_single_line_counter(cls, markers: Tuple[str, ...]) -> Callable[[str], Tuple[int, int]]:
+        """Build a specialized ``_count_single`` with the markers inlined as constants.
+        
+        Markers are embedded with ``repr`` so user-defined ones cannot break
+        out of their literals. One-character markers become a membership
+        test on the first character; word markers also check the character
+        after them, as the ``(?!\\w)`` of the regex form does.
+        """
+        def is_word(char: str) -> bool:
+            return char.isalnum() or char == '_'
+        
+        firsts = ''.join(sorted({marker[0] for marker in markers}))
+        chars = [marker for marker in markers if len(marker) == 1 and not is_word(marker)]
+        prefixes = tuple(marker for marker in markers if len(marker) > 1 and not is_word(marker[-1]))
+        terms = []
+        if chars:
+            terms.append(f'stripped[0] in {"".join(chars)!r}')
+        if prefixes:
+            terms.append(f'stripped.startswith({prefixes!r})')
+        for marker in markers:
+            if is_word(marker[-1]):
+                after = f'stripped[{len(marker)}:{len(marker) + 1}]'
+                terms.append(f'(stripped.startswith({marker!r}) and not '
+                             f'({after}.isalnum() or {after} == {"_"!r}))')
+        # The first-character test rejects most code lines before any call
+        condition = f'stripped[0] in {firsts!r}'
+        if len(chars) < len(markers):
+            condition += f' and ({" or ".join(terms)})'
+        source = cls.SINGLE_LINE_TEMPLATE.format(
+            absent=' and '.join(f'{first!r} not in text' for first in firsts) or 'True',
+            condition=condition if markers else 'False')
+        module = compile(source, f'<nxlc single-line counter {markers!r}>', 'exec')
+        code = next(const for const in module.co_consts if isinstance(const, types.CodeType))
+        return types.FunctionType(code, {'__builtins__': builtins})
+    
+    def comment_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return the (start, end) offsets of comments and docstrings in ``text``.
+        
+        Line comments end before their newline; unterminated block comments
+        and multi-line strings run to the end of the buffer.
+        """
+        return self.scan(text)[0]
+    
+    def scan(self, text: str, state: Optional[Tuple[int, int]] = None
+             ) -> Tuple[List[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """Return the comment spans of ``text`` and its exit state.
+        
+        The exit state is None unless ``text`` ends inside a block comment
+        or multi-line string, in which case it is ``(token, depth)`` for a
+        block comment or ``(token, docstring)`` for a string. Passing it as
+        ``state`` scans text that follows a line boundary as the
+        continuation, so a buffer split at lines not ending in a backslash
+        scans piecewise to the same spans.
+        """
+        COMMENT, BLOCK, STRING = self.COMMENT, self.BLOCK, self.STRING
+        skip, token_match, tokens = self.skip_match, self.token_match, self.tokens
+        nonspace = self.NONSPACE.search
+        length = len(text)
+        spans = []
+        pos = 0
+        unterminated = None
+        if state is not None:
+            index, depth = state
+            kind, data, _ = tokens[index]
+            if kind == BLOCK:
+                finder, nested = data
+                while depth:
+                    match = finder(text, pos)
+                    if match is None:
+                        pos, unterminated = length, (index, depth)
+                        break
+                    pos = match.end()
+                    if nested and match.lastindex == 2:
+                        depth += 1
+                    else:
+                        depth -= 1
+            else:
+                match = data[2](text)
+                if match is None:
+                    pos, unterminated = length, state
+                else:
+                    pos = match.end()
+            # The continued comment or docstring; blank lines are never comments
+            if (kind == BLOCK or depth) and nonspace(text, 0, pos):
+                spans.append((0, pos))
+        quotes, bounded = self.string_first, self.skip_to_line_end
+        if bounded:
+            candidates = []
+            for marker in self.stop_markers:
+                found = text.find(marker, pos)
+                while found >= 0:
+                    candidates.append(found)
+                    found = text.find(marker, found + 1)
+            candidates.sort()
+            index = 0
+        while True:
+            if not bounded:
+                # A multi-line string can hide an opener anywhere, so the
+                # skipper consumes everything up to the next token
+                start = skip(text, pos).end()
+                if start >= length:
+                    break
+            else:
+                index = bisect.bisect_left(candidates, pos, index)
+                if index == len(candidates):
+                    break
+                found = start = candidates[index]
+                # Only single-line strings can hide the opener, and they end
+                # at an unescaped newline, so the skipper resumes at its line
+                # and need not look past it
+                cut = text.rfind('\n', pos, found)
+                if cut > pos and text[cut - 1] != '\\':
+                    pos = cut + 1
+                # Unless a string starts before it, the opener is the next token
+                for quote in quotes:
+                    if text.find(quote, pos, found) >= 0:
+                        line_end = text.find('\n', found)
+                        if line_end < 0:
+                            line_end = length
+                        start = skip(text, pos, line_end).end()
+                        break
+                if start != found and start >= line_end:
+                    pos = line_end
+                    continue
+            match = token_match(text, start)
+            if match is None:
+                pos = start + 1
+                continue
+            match_index = match.lastindex
+            kind, data, anchored = tokens[match_index]
+            if anchored and nonspace(text, text.rfind('\n', 0, start) + 1, start):
+                pos = start + 1
+                continue
+            pos = match.end()
+            
+            if kind == COMMENT:
+                spans.append((start, pos))
+            elif kind == BLOCK:
+                finder, nested = data
+                depth = 1
+                while depth:
+                    match = finder(text, pos)
+                    if match is None:
+                        pos, unterminated = length, (match_index, depth)
+                        break
+                    pos = match.end()
+                    if nested and match.lastindex == 2:
+                        depth += 1
+                    else:
+                        depth -= 1
+                spans.append((start, pos))
+            else:
+                multiline = False
+                if kind == STRING:
+                    docstring = data
+                else:
+                    multiline, docstring, _ = data
+                    if multiline:
+                        pos = length
+                    else:
+                        end = text.find('\n', pos)
+                        pos = length if end < 0 else end
+                docstring = docstring and not nonspace(text, text.rfind('\n', 0, start) + 1, start)
+                if docstring:
+                    spans.append((start, pos))
+                if multiline:
+                    unterminated = (match_index, int(docstring))
+        return spans, unterminated
+    
+    def _count_scan(self, text: str) -> Tuple[int, int]:
+        """(code, comment) from the comment spans of the whole buffer."""
+        if not any(first in text for first in self.comment_first):
+            return (self._nonblank_lines(text), 0)
+        return self.count_spans(text, self.scan(text)[0])
+    
+    def classify_piece(self, text: str, state: Optional[Tuple[int, int]] = None
+                       ) -> Tuple[int, int, Optional[Tuple[int, int]]]:
+        """(code, comment, exit state) of a line-aligned piece of a buffer entered in ``state``.
+        
+        Pieces cut by ``last_safe_cut`` classify to the same totals as the
+        whole buffer when each is entered in the previous piece's exit state.
+        """
+        if not self.multiline:
+            code, comment = self.classify(text)
+            return (code, comment, None)
+        spans, state = self.scan(text, state)
+        code, comment = self.count_spans(text, spans)
+        return (code, comment, state)
+    
+    @staticmethod
+    def last_safe_cut(text: str) -> int:
+        """Offset after the last newline of ``text`` that no string can continue past, or 0.
+        
+        A newline escaped by a backslash may be inside a string literal.
+        """
+        cut = text.rfind('\n') + 1
+        while cut > 1 and text[cut - 2] == '\\':
+            cut = text.rfind('\n', 0, cut - 1) + 1
+        return cut
+    
+    def count_spans(self, text: str, spans: List[Tuple[int, int]]) -> Tuple[int, int]:
+        """(code, comment) of ``text`` given its comment spans.
+        
+        Spans separated only by whitespace are merged; every non-blank line
+        a merged span touches is a comment line unless it has code before
+        the span starts (first line) or after it ends (last line).
+        """
+        nonblank = self._nonblank_lines(text)
+        if not spans:
+            return (nonblank, 0)
+        groups = []
+        group_start, group_end = spans[0]
+        for start, end in spans[1:]:
+            if group_end == start or text[group_end:start].isspace():
+                group_end = end
+            else:
+                groups.append((group_start, group_end))
+                group_start, group_end = start, end
+        groups.append((group_start, group_end))
+        
+        comment = 0
+        for start, end in groups:
+            line_start = text.rfind('\n', 0, start) + 1
+            line_end = text.find('\n', end)
+            if line_end < 0:
+                line_end = len(text)
+            first_code = line_start < start and not text[line_start:start].isspace()
+            last_code = end < line_end and not text[end:line_end].isspace()
+            if text.find('\n', start, end) < 0:
+                comment += not (first_code or last_code)
+            else:
+                lines = text[line_start:line_end].split('\n')
+                comment += len(lines) - lines.count('') - sum(map(str.isspace, lines)) - first_code - last_code
+        return (nonblank - comment, comment)
+
+
+class EmbeddedRegions:
+    """Splits a host file into line-aligned regions of embedded languages.
+    
+    One search over the buffer finds the region boundaries (``<script>``
+    and ``<style>`` blocks, ``<?php`` blocks, Markdown code fences), and
+    each region and each piece of host text between them is classified once
+    with its own language's compiled classifier. Lines holding a boundary
+    tag or fence belong to the host. Host comments are skipped while
+    searching, so a commented-out ``<script>`` is not a region. A PHP file
+    without any open tag is a fragment and is PHP throughout.
+    """
+    
+    TAG_OPEN = re.compile(r'<!--[\s\S]*?(?:-->|\Z)|<(script|style)\b([^>]*)>', re.IGNORECASE)
+    TAG_CLOSE = {tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in ('script', 'style')}
+    TAG_ATTRIBUTE = re.compile(r'\b(lang|type)\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+    PHP_OPEN = re.compile(r'<\?(?:php\b|=)', re.IGNORECASE)
+    FENCE_OPEN = re.compile(r'^ {0,3}(`{3,}|~{3,})[ \t]*([^\s`{]*)[^\n]*$', re.MULTILINE)
+    
+    def __init__(self, syntax: str, language: str, definitions: 'LanguageDefinitions'):
+        self.syntax = syntax
+        # Text outside <?php ... ?> blocks is HTML, whatever the host
+        self.host = 'HTML' if syntax == 'php' else language
+        self.definitions = definitions
+        self._finder = {'tags': self._tag_regions, 'php': self._php_regions, 'fences': self._fence_regions}[syntax]
+        self._resolved: Dict[str, Optional[str]] = {}
+    
+    def regions(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return ``(start, end, language)`` for consecutive line-aligned pieces covering ``text``."""
+        pieces = []
+        pos = 0
+        for start, end, language in self._finder(text):
+            if language == self.host:
+                continue
+            if start > pos:
+                pieces.append((pos, start, self.host))
+            pieces.append((start, end, language))
+            pos = end
+        if pos < len(text):
+            pieces.append((pos, len(text), self.host))
+        return pieces
+    
+    def classify(self, text: str) -> Tuple[int, int]:
+        """(code, comment) of ``text``, each region counted with its own language's rules."""
+        code = comment = 0
+        for start, end, language in self.regions(text):
+            region_code, region_comment = self.definitions.comment_classifier(language).classify(text[start:end])
+            code += region_code
+            comment += region_comment
+        return (code, comment)
+    
+    def _language(self, name: str) -> Optional[str]:
+        if name not in self._resolved:
+            self._resolved[name] = self.definitions.embedded_language(name)
+        return self._resolved[name]
+    
+    @staticmethod
+    def _line_after(text: str, pos: int) -> int:
+        """Offset of the line following the one containing ``pos``, or len(text)."""
+        end = text.find('\n', pos)
+        return len(text) if end < 0 else end + 1
+    
+    def _tag_regions(self, text: str):
+        pos = 0
+        while True:
+            match = self.TAG_OPEN.search(text, pos)
+            if match is None:
+                return
+            pos = match.end()
+            if match.group(1) is None:
+                continue  # Host comment
+            tag = match.group(1).lower()
+            attributes = dict((key.lower(), value) for key, value in self.TAG_ATTRIBUTE.findall(match.group(2)))
+            name = attributes.get('lang') or attributes.get('type')
+            language = self._language(name) if name else self.definitions.EMBEDDED_TAG_DEFAULTS[tag]
+            close = self.TAG_CLOSE[tag].search(text, pos)
+            start = self._line_after(text, pos)
+            end = len(text) if close is None else text.rfind('\n', 0, close.start()) + 1
+            pos = len(text) if close is None else close.end()
+            if language and end > start:
+                yield (start, end, language)
+    
+    def _php_regions(self, text: str):
+        # Included fragments often have no open tag at all and are all PHP
+        if self.PHP_OPEN.search(text) is None:
+            yield (0, len(text), 'PHP')
+            return
+        pos = 0
+        while True:
+            match = self.PHP_OPEN.search(text, pos)
+            if match is None:
+                return
+            close = text.find('?>', match.end())
+            start = self._line_after(text, match.end())
+            end = len(text) if close < 0 else text.rfind('\n', 0, close) + 1
+            pos = len(text) if close < 0 else close + 2
+            if end > start:
+                yield (start, end, 'PHP')
+    
+    def _fence_regions(self, text: str):
+        pos = 0
+        while True:
+            match = self.FENCE_OPEN.search(text, pos)
+            if match is None:
+                return
+            fence, info = match.group(1), match.group(2)
+            closing = re.compile(rf'^ {{0,3}}{re.escape(fence[0])}{{{len(fence)},}}[ \t]*$', re.MULTILINE)
+            start = self._line_after(text, match.end())
+            close = closing.search(text, start)
+            end = len(text) if close is None else close.start()
+            pos = len(text) if close is None else close.end()
+            language = self._language(info) if info else None
+            if language and end > start:
+                yield (start, end, language)
+
+
 class LanguageDefinitions:
     """Centralized language definitions and configuration."""
     
@@ -347,32 +2217,182 @@ class LanguageDefinitions:
         '.idea', '.vscode', '.vs',
         'coverage', 'htmlcov', '.coverage',
         '.tis', '.mypy_cache', '.ruff_cache',
-        'mock_vitest',  # TIScore specific
     }
     
+    # Directory names of vendored third-party trees (matched case-insensitively)
+    VENDORED_DIRS = {
+        'vendor', 'vendors', 'third_party', 'third-party', 'thirdparty',
+        'external', 'externals', 'extern', 'pods', 'carthage',
+        'bower_components', 'jspm_packages',
+    }
+    
+    # A nested directory holding one of these license files and a package
+    # manifest outside the root project's namespace is a copied upstream tree
+    LICENSE_FILES = {
+        'license', 'license.txt', 'license.md', 'licence', 'licence.txt', 'licence.md',
+        'copying', 'copying.txt', 'unlicense',
+    }
+    PACKAGE_MANIFESTS = ('package.json', 'composer.json', 'cargo.toml', 'pyproject.toml', 'go.mod')
+    
     # Extensions that have conflicts requiring content analysis
     CONFLICT_EXTENSIONS = {'.h', '.m', '.r', '.pl'}
     
-    # Default language for conflicted extensions (fallback)
+    # Default language for conflicted extensions (fallback) and explicit
+    # winners for extensions listed under several languages below
     EXTENSION_DEFAULTS = {
         '.h': 'C',          # Most common
         '.m': 'Objective-C', # MATLAB usually in matlab/ dirs
         '.r': 'R',          # R more common than Rebol
         '.pl': 'Perl',      # Perl more common than Prolog
+        '.sql': 'SQL',      # Generic SQL over PL/SQL
+        '.ini': 'Configuration',
+        '.cfg': 'Configuration',
+        '.erb': 'Ruby',     # Embedded Ruby templates
     }
     
-    # Shebang patterns for script detection
+    # Content keywords (regex fragments) scored per candidate language when
+    # resolving conflicted extensions. On equal scores the earlier language wins.
+    CONFLICT_KEYWORDS = {
+        '.h': {
+            'C++': [r'\bclass\s', r'\btemplate\s*<', r'\bnamespace\s', r'std::',
+                    r'\bcout\b', r'\bcin\b', r'\b(?:public|private|protected):', r'\bvirtual\s'],
+            'Objective-C': [r'@interface\b', r'@implementation\b', r'@property\b',
+                            r'\bNSString\b', r'@end\b', r'#import\b'],
+        },
+        '.m': {
+            'MATLAB': [r'\bfunction\s', r'^\s*end\s*$', r'\bfprintf\b', r'\bdisp\('],
+            'Objective-C': [r'@interface\b', r'@implementation\b', r'@property\b', r'#import\b'],
+        },
+        '.r': {
+            'R': [r'\blibrary\(', r'\bdata\.frame\b', r'<-', r'\bggplot\b'],
+            'Rebol': [r'\bREBOL\s*\['],
+        },
+        '.pl': {
+            'Perl': [r'\buse\s+strict\b', r'\bmy\s+[$@%]', r'\bprint\s', r'^#!.*\bperl\b'],
+            'Prolog': [r':-', r'\?-', r'\bappend\(\[', r'\bmember\('],
+        },
+    }
+    
+    # Sibling extensions that vote for a language when resolving conflicts.
+    # A directory whose siblings vote for a single language decides the
+    # conflict without reading the file.
+    CONFLICT_PRIORS = {
+        '.h': {
+            'C++': ['.cpp', '.cc', '.cxx', '.c++', '.hpp', '.hh', '.hxx'],
+            'Objective-C': ['.m', '.mm'],
+            'C': ['.c'],
+        },
+        '.m': {
+            'Objective-C': ['.mm', '.h', '.xib', '.storyboard'],
+            'MATLAB': ['.mat', '.fig', '.mlx', '.slx'],
+        },
+        '.r': {
+            'R': ['.rmd', '.rdata', '.rds', '.rproj'],
+        },
+        '.pl': {
+            'Perl': ['.pm', '.t', '.pod', '.xs'],
+            'Prolog': ['.pro', '.lgt'],
+        },
+    }
+    
+    # GitHub Linguist language names that differ from the names used here
+    LINGUIST_ALIASES = {
+        'Protocol Buffer': 'Protocol Buffers',
+        'Tcl': 'TCL',
+        'Cypher': 'Neo4j Cypher',
+        'Fortran': 'FORTRAN',
+        'Fortran Free Form': 'FORTRAN',
+        'PLSQL': 'PL/SQL',
+        'TSQL': 'SQL',
+        'Graphviz (DOT)': 'DOT',
+        'Unix Assembly': 'Assembly',
+        'Jinja': 'Jinja2',
+        'Org': 'Org Mode',
+        'reStructuredText': 'ReStructuredText',
+        'Visual Basic .NET': 'Visual Basic',
+    }
+    
+    # Special filenames checked before extension lookup (case-insensitive).
+    # Exact names win; other rules apply in the order listed.
+    FILENAME_RULES = [
+        ('exact', 'makefile', 'Makefile'),
+        ('exact', 'gnumakefile', 'Makefile'),
+        ('exact', 'dockerfile', 'Dockerfile'),
+        ('exact', 'containerfile', 'Dockerfile'),
+        ('exact', 'readme', 'README'),
+        ('exact', '.gitignore', 'Configuration'),
+        ('exact', '.gitattributes', 'Configuration'),
+        ('exact', '.gitmodules', 'Configuration'),
+        ('exact', '.dockerignore', 'Configuration'),
+        ('exact', '.npmignore', 'Configuration'),
+        ('prefix', 'makefile.', 'Makefile'),      # Makefile.am, Makefile.in
+        ('suffix', 'makefile', 'Makefile'),       # BSDmakefile
+        ('suffix', '.mk', 'Makefile'),
+        ('prefix', 'dockerfile.', 'Dockerfile'),  # Dockerfile.dev
+        ('suffix', 'dockerfile', 'Dockerfile'),   # app.dockerfile
+        ('prefix', 'readme.', 'README'),          # README.md, readme.txt
+        ('suffix', 'readme', 'README'),
+        ('glob', '.env.*', 'Configuration'),      # .env.local, .env.production
+        ('suffix', '.example', 'Configuration'),
+    ]
+    
+    # Interpreter names (basename, version suffix stripped) for shebang detection
     SHEBANG_PATTERNS = {
         'python': 'Python',
-        'perl': 'Perl', 
+        'pypy': 'Python',
+        'perl': 'Perl',
         'ruby': 'Ruby',
         'bash': 'Shell',
         'sh': 'Shell',
         'zsh': 'Shell',
         'fish': 'Shell',
+        'ksh': 'Shell',
+        'dash': 'Shell',
+        'ash': 'Shell',
         'node': 'JavaScript',
+        'nodejs': 'JavaScript',
+        'deno': 'TypeScript',
+        'ts-node': 'TypeScript',
         'php': 'PHP',
         'lua': 'Lua',
+        'luajit': 'Lua',
+        'rscript': 'R',
+        'tclsh': 'TCL',
+        'wish': 'TCL',
+        'pwsh': 'PowerShell',
+        'powershell': 'PowerShell',
+        'julia': 'Julia',
+        'elixir': 'Elixir',
+        'escript': 'Erlang',
+        'crystal': 'Crystal',
+        'runghc': 'Haskell',
+        'runhaskell': 'Haskell',
+        'make': 'Makefile',
+        'gnuplot': 'Gnuplot',
+    }
+    
+    # Editor modeline filetype/mode names that differ from language names
+    MODELINE_LANGUAGES = {
+        'sh': 'Shell',
+        'bash': 'Shell',
+        'zsh': 'Shell',
+        'shell-script': 'Shell',
+        'cperl': 'Perl',
+        'js': 'JavaScript',
+        'cpp': 'C++',
+        'cs': 'C#',
+        'csharp': 'C#',
+        'make': 'Makefile',
+        'makefile': 'Makefile',
+        'dosini': 'INI',
+        'conf': 'Configuration',
+        'tex': 'TeX',
+        'latex': 'TeX',
+        'plaintex': 'TeX',
+        'proto': 'Protocol Buffers',
+        'ps1': 'PowerShell',
+        'tcl': 'TCL',
+        'vb': 'Visual Basic',
     }
     
     # Language extensions mapping (moved from global scope)
@@ -404,6 +2424,7 @@ class LanguageDefinitions:
         'Markdown': ['.md', '.markdown', '.mdown', '.mkd'],
         'YAML': ['.yaml', '.yml'],
         'JSON': ['.json', '.jsonc'],
+        'Jupyter Notebook': ['.ipynb'],
         'XML': ['.xml', '.xsl', '.xslt'],
         'TOML': ['.toml'],
         'Makefile': ['Makefile', 'makefile', 'GNUmakefile', '.mk'],
@@ -525,6 +2546,7 @@ class LanguageDefinitions:
         'XML': {'single': [], 'multi_start': ['<!--'], 'multi_end': ['-->']},
         'YAML': {'single': ['#'], 'multi_start': [], 'multi_end': []},
         'JSON': {'single': [], 'multi_start': [], 'multi_end': []},  # JSON doesn't have comments
+        'Jupyter Notebook': {'single': [], 'multi_start': [], 'multi_end': []},  # Cells use the kernel's rules
         'TOML': {'single': ['#'], 'multi_start': [], 'multi_end': []},
         'Makefile': {'single': ['#'], 'multi_start': [], 'multi_end': []},
         'Dockerfile': {'single': ['#'], 'multi_start': [], 'multi_end': []},
@@ -625,6 +2647,831 @@ class LanguageDefinitions:
         'WSDL': {'single': [], 'multi_start': ['<!--'], 'multi_end': ['-->']},
         'XSD': {'single': [], 'multi_start': ['<!--'], 'multi_end': ['-->']},
     }
+    
+    # Comment scanner families. A family fixes the string literal syntax the
+    # scanner tracks; languages not listed use 'hash' when '#' starts their
+    # line comments and 'c' otherwise.
+    COMMENT_FAMILIES = {
+        'python': ['Python', 'GDScript', 'Julia', 'Nim'],
+        'ml': ['Haskell', 'F#', 'Mathematica', 'Clojure', 'AutoLISP', 'Erlang', 'Lua'],
+        'pascal': ['SQL', 'PL/SQL', 'CQL', 'Pascal', 'Ada', 'VHDL', 'Visual Basic', 'BASIC', 'FORTRAN',
+                   'Modula-2', 'Modula-3', 'Oberon', 'ALGOL', 'COBOL', 'PL/I', 'RPG', 'JCL', 'REXX',
+                   'SAS', 'SPSS', 'Stata'],
+        'markup': ['HTML', 'XML', 'Vue', 'Svelte', 'Plist', 'MediaWiki', 'XAML', 'Glade', 'SVG', 'KML',
+                   'RSS', 'Atom', 'OPML', 'RDF', 'WSDL', 'XSD', 'TeX', 'BibTeX', 'PostScript',
+                   'ReStructuredText', 'AsciiDoc', 'Org Mode', 'Textile', 'Creole', 'Mermaid', 'PlantUML',
+                   'HAML', 'Slim', 'Pug', 'Handlebars', 'Mustache', 'Jinja2', 'Liquid', 'Smarty', 'Twig',
+                   'ERB', 'Markdown', 'Text'],
+    }
+    
+    # String literals tracked per family as (delimiter, backslash escapes,
+    # may span lines, docstring). 'pascal' strings escape quotes by doubling
+    # them, which scans as two adjacent strings; 'ml' apostrophes are type
+    # variables or quotes; markup quotes are prose.
+    STRING_SYNTAX = {
+        'c': [('"', True, False, False), ("'", True, False, False)],
+        'hash': [('"', True, False, False), ("'", True, False, False)],
+        'python': [('"""', True, True, True), ("'''", True, True, True),
+                   ('"', True, False, False), ("'", True, False, False)],
+        'ml': [('"', True, False, False)],
+        'pascal': [("'", False, False, False), ('"', False, False, False)],
+        'markup': [],
+    }
+    
+    # Additional (multi-line) string literals of individual languages
+    LANGUAGE_STRING_SYNTAX = {
+        'JavaScript': [('`', True, True, False)],
+        'TypeScript': [('`', True, True, False)],
+        'Go': [('`', False, True, False)],
+        'Kotlin': [('"""', False, True, False)],
+        'Scala': [('"""', False, True, False)],
+        'Swift': [('"""', True, True, False)],
+        'Dart': [('"""', True, True, False), ("'''", True, True, False)],
+    }
+    
+    # Languages whose block comments nest
+    NESTED_COMMENT_LANGUAGES = {'Haskell', 'F#', 'Mathematica', 'Julia', 'Nim', 'Rust', 'Swift',
+                                'Kotlin', 'Scala', 'Dart', 'Modula-2', 'Modula-3', 'Oberon'}
+    
+    # Comment markers that only start (or end) a comment at the beginning of
+    # a line; elsewhere they are operators, words or part of other syntax
+    LINE_START_MARKERS = {'*', 'C', 'c', 'REM', '//*', '..', '/', '-#', '=begin', '=end', '=pod', '=cut',
+                          '////', '###.'}
+    
+    # Families whose single-line markers must follow whitespace when not at
+    # the start of a line (``${#var}``, ``url: a#b``)
+    SPACED_MARKER_FAMILIES = {'hash'}
+    
+    # Host languages whose files embed other languages, by region syntax:
+    # 'tags' for <script>/<style> blocks, 'php' for <?php ... ?> blocks in
+    # HTML, and 'fences' for Markdown code fences
+    EMBEDDING_HOSTS = {'HTML': 'tags', 'Vue': 'tags', 'Svelte': 'tags', 'PHP': 'php', 'Markdown': 'fences'}
+    
+    # Language of <script>/<style> blocks without a lang or type attribute
+    EMBEDDED_TAG_DEFAULTS = {'script': 'JavaScript', 'style': 'CSS'}
+    
+    # lang/type attribute values and fence info strings that are neither a
+    # language name nor a known extension
+    EMBEDDED_LANGUAGE_ALIASES = {
+        'javascript': 'JavaScript', 'text/javascript': 'JavaScript', 'application/javascript': 'JavaScript',
+        'module': 'JavaScript', 'text/babel': 'JavaScript', 'text/typescript': 'TypeScript',
+        'typescript': 'TypeScript', 'application/json': 'JSON', 'application/ld+json': 'JSON',
+        'importmap': 'JSON', 'text/css': 'CSS', 'postcss': 'CSS', 'stylus': 'CSS',
+        'text/x-template': 'HTML', 'text/html': 'HTML',
+        'shell': 'Shell', 'console': 'Shell', 'shell-session': 'Shell', 'python3': 'Python',
+        'golang': 'Go', 'c++': 'C++', 'objective-c': 'Objective-C', 'objc': 'Objective-C',
+        'dockerfile': 'Dockerfile', 'make': 'Makefile', 'makefile': 'Makefile', 'ps1': 'PowerShell',
+    }
+    
+    # Extension/filename -> language index, built once at class creation
+    DETECTION_INDEX = DetectionIndex(LANGUAGE_EXTENSIONS, EXTENSION_DEFAULTS)
+    
+    # Compiled special-filename rules
+    FILENAME_RULE_SET = FilenameRuleSet(FILENAME_RULES)
+    
+    # Compiled shebang/modeline parser
+    SHEBANG_PARSER = ShebangParser(SHEBANG_PATTERNS, MODELINE_LANGUAGES, LANGUAGE_EXTENSIONS)
+    
+    # Compiled keyword scorers for conflicted extensions
+    CONFLICT_SCORERS = {ext: ConflictScorer(keywords) for ext, keywords in CONFLICT_KEYWORDS.items()}
+    
+    # Language names in aggregation ID order (see ``language_table``). The
+    # synthetic buckets are numbered first so their IDs are fixed.
+    LANGUAGE_NAMES = tuple(dict.fromkeys(['Unknown', 'Generated', 'Vendored',
+                                          *LANGUAGE_EXTENSIONS, *COMMENT_PATTERNS]))
+    
+    # Generated files recognized by name alone, labelled by generator kind.
+    # Matched before any content is read.
+    GENERATED_FILE_RULES = [
+        # Dependency lockfiles
+        ('exact', 'package-lock.json', 'lockfile'),
+        ('exact', 'npm-shrinkwrap.json', 'lockfile'),
+        ('exact', 'yarn.lock', 'lockfile'),
+        ('exact', 'pnpm-lock.yaml', 'lockfile'),
+        ('exact', 'poetry.lock', 'lockfile'),
+        ('exact', 'pipfile.lock', 'lockfile'),
+        ('exact', 'uv.lock', 'lockfile'),
+        ('exact', 'cargo.lock', 'lockfile'),
+        ('exact', 'gemfile.lock', 'lockfile'),
+        ('exact', 'composer.lock', 'lockfile'),
+        ('exact', 'go.sum', 'lockfile'),
+        ('exact', 'mix.lock', 'lockfile'),
+        ('exact', 'pubspec.lock', 'lockfile'),
+        ('exact', 'podfile.lock', 'lockfile'),
+        ('exact', 'flake.lock', 'lockfile'),
+        # Protocol Buffers / gRPC / Thrift outputs
+        ('suffix', '.pb.go', 'protobuf'),
+        ('suffix', '.pb.gw.go', 'protobuf'),
+        ('suffix', '_pb2.py', 'protobuf'),
+        ('suffix', '_pb2.pyi', 'protobuf'),
+        ('suffix', '_pb2_grpc.py', 'protobuf'),
+        ('suffix', '.pb.cc', 'protobuf'),
+        ('suffix', '.pb.h', 'protobuf'),
+        ('suffix', '.pb.swift', 'protobuf'),
+        ('suffix', '_pb.js', 'protobuf'),
+        ('suffix', '_pb.d.ts', 'protobuf'),
+        ('suffix', '_grpc_pb.js', 'protobuf'),
+        # Other code generators
+        ('glob', 'zz_generated*.go', 'codegen'),
+        ('suffix', '_generated.go', 'codegen'),
+        ('suffix', '.g.dart', 'codegen'),
+        ('suffix', '.freezed.dart', 'codegen'),
+        ('suffix', '.designer.cs', 'codegen'),
+        ('suffix', '.g.cs', 'codegen'),
+        ('suffix', '.generated.cs', 'codegen'),
+        # Minified and bundled assets
+        ('suffix', '.min.js', 'minified'),
+        ('suffix', '.min.mjs', 'minified'),
+        ('suffix', '.min.css', 'minified'),
+        ('suffix', '.bundle.js', 'minified'),
+    ]
+    
+    # Header markers (regex fragments) searched in the first GENERATED_HEADER_LINES
+    # lines of the shared head buffer, labelled by generator kind
+    GENERATED_MARKERS = {
+        'protobuf': [r'Generated by the protocol buffer compiler', r'\bprotoc-gen-\w+'],
+        'thrift': [r'Autogenerated by Thrift Compiler'],
+        'codegen': [r'^\W*Code generated .* DO NOT EDIT\.', r'@generated\b',
+                    r'<auto-generated\b', r'(?i:\bthis file (?:is|was|has been) (?:automatically|auto-?)\s?generated\b)'],
+    }
+    GENERATED_HEADER_LINES = 20
+    
+    # Languages whose files are checked for minification, and the head-buffer
+    # average line length (in characters) above which a file counts as minified
+    MINIFIABLE_LANGUAGES = {'JavaScript', 'TypeScript', 'CSS', 'JSON', 'HTML'}
+    MINIFIED_LINE_LENGTH = 500
+    
+    # Compiled generated-file name rules and header marker scorer
+    GENERATED_RULE_SET = FilenameRuleSet(GENERATED_FILE_RULES)
+    GENERATED_MARKER_SCORER = ConflictScorer(GENERATED_MARKERS)
+    
+    # Per-repository language definition files, looked up in the scanned root
+    USER_DEFINITION_FILES = ('.nxlc-languages.toml', '.nxlc-languages.json')
+    
+    # Keys accepted for each user-defined language; all take lists of strings
+    USER_DEFINITION_KEYS = ('extensions', 'interpreters', 'single', 'multi_start', 'multi_end')
+    
+    # Bumped whenever the cached compiled form changes shape
+    USER_DEFINITIONS_CACHE_VERSION = 1
+    
+    _builtin_fingerprint: Optional[str] = None
+    
+    # Compiled comment classifiers by language, built on first use
+    _comment_classifiers: Dict[str, CommentClassifier] = {}
+    
+    # Embedded-region splitters by host language, built on first use
+    _embedded_regions: Dict[str, 'EmbeddedRegions'] = {}
+    
+    # Language -> comment scanner family, from COMMENT_FAMILIES
+    _comment_family = {language: family for family, languages in COMMENT_FAMILIES.items()
+                       for language in languages}
+    
+    def __init__(self, user_definitions: Optional[Path] = None):
+        """Use the built-in tables, merged with ``user_definitions`` if given.
+        
+        The merged tables and compiled detection index shadow the class-level
+        ones on this instance only.
+        """
+        self.user_definitions = user_definitions
+        if user_definitions is not None:
+            self._apply_compiled(self._load_compiled(Path(user_definitions)))
+    
+    def comment_classifier(self, language: str) -> CommentClassifier:
+        """Return the cached compiled comment classifier for ``language``."""
+        classifier = self._comment_classifiers.get(language)
+        if classifier is None:
+            patterns = self.COMMENT_PATTERNS.get(language, {})
+            family = self.comment_family(language)
+            strings = self.STRING_SYNTAX[family] + self.LANGUAGE_STRING_SYNTAX.get(language, [])
+            classifier = CommentClassifier(patterns, strings, language in self.NESTED_COMMENT_LANGUAGES,
+                                           self.LINE_START_MARKERS, family in self.SPACED_MARKER_FAMILIES)
+            self._comment_classifiers[language] = classifier
+        return classifier
+    
+    def embedded_regions(self, language: str) -> Optional['EmbeddedRegions']:
+        """Return the cached region splitter if ``language`` embeds other languages."""
+        syntax = self.EMBEDDING_HOSTS.get(language)
+        if syntax is None:
+            return None
+        regions = self._embedded_regions.get(language)
+        if regions is None:
+            regions = EmbeddedRegions(syntax, language, self)
+            self._embedded_regions[language] = regions
+        return regions
+    
+    def language_table(self) -> LanguageTable:
+        """Return a fresh ID table of this instance's languages, one per scan.
+        
+        Names met during the scan are interned into that table only, so
+        they never leak into other scans or definitions.
+        """
+        return LanguageTable(self.LANGUAGE_NAMES)
+    
+    def embedded_language(self, name: str) -> Optional[str]:
+        """Resolve a lang/type attribute or fence info string to a language."""
+        key = name.strip().lower()
+        if not key:
+            return None
+        language = self.EMBEDDED_LANGUAGE_ALIASES.get(key)
+        if language is None:
+            names = {known.lower(): known for known in (*self.COMMENT_PATTERNS, *self.LANGUAGE_EXTENSIONS)}
+            language = names.get(key) or self.DETECTION_INDEX.lookup('', '.' + key)
+        return language
+    
+    def comment_family(self, language: str) -> str:
+        """Return the comment scanner family of ``language``."""
+        family = self._comment_family.get(language)
+        if family is None:
+            family = 'hash' if '#' in self.COMMENT_PATTERNS.get(language, {}).get('single', ()) else 'c'
+        return family
+    
+    @classmethod
+    def find_user_definitions(cls, directory: Path) -> Optional[Path]:
+        """Return the per-repository definitions file in ``directory``, if any."""
+        for name in cls.USER_DEFINITION_FILES:
+            candidate = directory / name
+            if candidate.is_file():
+                return candidate
+        return None
+    
+    @classmethod
+    def parse_user_definitions(cls, path: Path, data: bytes) -> Dict[str, Dict[str, List[str]]]:
+        """Parse and validate a TOML or JSON definitions file.
+        
+        The file holds a ``languages`` table mapping language names to their
+        ``extensions`` (or exact filenames), optional shebang ``interpreters``
+        and ``COMMENT_PATTERNS``-style ``single``/``multi_start``/``multi_end``
+        comment markers.
+        """
+        if path.suffix.lower() == '.toml':
+            try:
+                import tomllib
+            except ImportError:
+                raise ValueError(f"{path}: TOML language definitions require Python 3.11+; use JSON instead")
+            try:
+                document = tomllib.loads(data.decode('utf-8'))
+            except (UnicodeDecodeError, tomllib.TOMLDecodeError) as e:
+                raise ValueError(f"{path}: {e}")
+        else:
+            try:
+                document = json.loads(data.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"{path}: {e}")
+        
+        languages = document.get('languages') if isinstance(document, dict) else None
+        if not isinstance(languages, dict):
+            raise ValueError(f"{path}: expected a 'languages' table")
+        
+        definitions = {}
+        for name, spec in languages.items():
+            if not name or name == 'Unknown' or not isinstance(spec, dict):
+                raise ValueError(f"{path}: invalid definition for language {name!r}")
+            unknown_keys = set(spec) - set(cls.USER_DEFINITION_KEYS)
+            if unknown_keys:
+                raise ValueError(f"{path}: unknown keys for {name}: {', '.join(sorted(unknown_keys))}")
+            for key, values in spec.items():
+                if not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+                    raise ValueError(f"{path}: {name}.{key} must be a list of non-empty strings")
+            if len(spec.get('multi_start', [])) != len(spec.get('multi_end', [])):
+                raise ValueError(f"{path}: {name}.multi_start and multi_end must pair up")
+            definitions[name] = spec
+        return definitions
+    
+    @classmethod
+    def compile_user_definitions(cls, definitions: Dict[str, Dict[str, List[str]]]) -> Dict[str, Any]:
+        """Merge user definitions into the built-in tables and compile the result.
+        
+        User entries win over built-in languages claiming the same extension;
+        two user languages claiming the same entry is an error.
+        """
+        language_extensions = {lang: list(entries) for lang, entries in cls.LANGUAGE_EXTENSIONS.items()}
+        extension_defaults = dict(cls.EXTENSION_DEFAULTS)
+        comment_patterns = {lang: dict(patterns) for lang, patterns in cls.COMMENT_PATTERNS.items()}
+        shebang_patterns = dict(cls.SHEBANG_PATTERNS)
+        conflict_extensions = set(cls.CONFLICT_EXTENSIONS)
+        
+        claimed: Dict[str, str] = {}
+        for language, spec in definitions.items():
+            entries = language_extensions.setdefault(language, [])
+            for entry in spec.get('extensions', []):
+                key = entry.lower()
+                if claimed.get(key, language) != language:
+                    raise ValueError(f"Entry {entry!r} is defined by both {claimed[key]} and {language}")
+                claimed[key] = language
+                extension_defaults[key] = language
+                conflict_extensions.discard(key)
+                if key not in (e.lower() for e in entries):
+                    entries.append(entry)
+            for interpreter in spec.get('interpreters', []):
+                shebang_patterns[interpreter] = language
+            patterns = comment_patterns.setdefault(
+                language, {'single': [], 'multi_start': [], 'multi_end': []})
+            for key in ('single', 'multi_start', 'multi_end'):
+                if key in spec:
+                    patterns[key] = list(spec[key])
+        
+        index = DetectionIndex(language_extensions, extension_defaults)
+        return {
+            'version': cls.USER_DEFINITIONS_CACHE_VERSION,
+            'language_extensions': language_extensions,
+            'extension_defaults': extension_defaults,
+            'comment_patterns': comment_patterns,
+            'shebang_patterns': shebang_patterns,
+            'conflict_extensions': sorted(conflict_extensions),
+            'index': index.to_dict(),
+        }
+    
+    @classmethod
+    def _cache_key(cls, data: bytes) -> str:
+        """Hash of the definitions file, the built-in tables and the cache format."""
+        if cls._builtin_fingerprint is None:
+            builtin = json.dumps([cls.LANGUAGE_EXTENSIONS, cls.EXTENSION_DEFAULTS, cls.COMMENT_PATTERNS,
+                                  cls.SHEBANG_PATTERNS, sorted(cls.CONFLICT_EXTENSIONS)], sort_keys=True)
+            cls._builtin_fingerprint = hashlib.sha256(builtin.encode('utf-8')).hexdigest()
+        digest = hashlib.sha256()
+        digest.update(f"{cls.USER_DEFINITIONS_CACHE_VERSION}\0{cls._builtin_fingerprint}\0".encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+    
+    @classmethod
+    def _load_compiled(cls, path: Path) -> Dict[str, Any]:
+        """Return the compiled merged tables for ``path``, via the on-disk cache."""
+        data = path.read_bytes()
+        if len(data) > 1024 * 1024:
+            raise ValueError(f"Language definitions file too large (>1MB): {path}")
+        
+        cache_file = get_cache_dir() / 'languages' / f"{cls._cache_key(data)}.json"
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                compiled = json.load(f)
+            if compiled.get('version') == cls.USER_DEFINITIONS_CACHE_VERSION:
+                return compiled
+        except (OSError, ValueError, AttributeError):
+            pass
+        
+        compiled = cls.compile_user_definitions(cls.parse_user_definitions(path, data))
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(compiled, f)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            logging.debug(f"Could not cache compiled language definitions: {e}")
+        return compiled
+    
+    def _apply_compiled(self, compiled: Dict[str, Any]) -> None:
+        """Shadow the class-level tables with a compiled merged form."""
+        self.LANGUAGE_EXTENSIONS = compiled['language_extensions']
+        self.EXTENSION_DEFAULTS = compiled['extension_defaults']
+        self.COMMENT_PATTERNS = compiled['comment_patterns']
+        self.SHEBANG_PATTERNS = compiled['shebang_patterns']
+        self.CONFLICT_EXTENSIONS = set(compiled['conflict_extensions'])
+        self.DETECTION_INDEX = DetectionIndex.from_dict(compiled['index'])
+        self.SHEBANG_PARSER = ShebangParser(self.SHEBANG_PATTERNS, self.MODELINE_LANGUAGES,
+                                            self.LANGUAGE_EXTENSIONS)
+        self._comment_classifiers = {}
+        self._embedded_regions = {}
+        # Built-in IDs are kept; user-defined languages are numbered after them
+        self.LANGUAGE_NAMES = tuple(dict.fromkeys([*LanguageDefinitions.LANGUAGE_NAMES,
+                                                   *self.LANGUAGE_EXTENSIONS, *self.COMMENT_PATTERNS]))
+
+
+class LineClassifier:
+    """Incremental line counter for one language, fed a file in chunks.
+    
+    ``feed`` accepts ``bytes`` (decoded with ``encoding``) or ``str`` chunks
+    split anywhere, even inside a line, a multi-byte character or a
+    ``\r\n`` pair; newlines are translated as in text-mode reading.
+    ``finish`` returns ``(total, code, comment, blank)``. Buffered input is
+    classified up to its last complete line (see
+    ``CommentClassifier.last_safe_cut``) once it reaches ``FLUSH_SIZE``
+    characters, and a block comment or multi-line string left open there
+    carries over as the scanner's exit state. Hosts of embedded languages
+    (see ``EmbeddedRegions``) are split into regions once the whole file
+    has been fed.
+    """
+    
+    FLUSH_SIZE = 1024 * 1024
+    
+    def __init__(self, language: str, definitions: Optional[LanguageDefinitions] = None,
+                 encoding: str = 'utf-8'):
+        definitions = definitions or LanguageDefinitions()
+        self.classifier = definitions.comment_classifier(language)
+        self.regions = definitions.embedded_regions(language)
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(errors='ignore'), translate=True)
+        self._newlines = io.IncrementalNewlineDecoder(None, translate=True)
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._flush_at = self.FLUSH_SIZE
+        self._state: Optional[Tuple[int, int]] = None
+        self.total = self.code = self.comment = 0
+    
+    def feed(self, chunk) -> None:
+        """Add the next chunk of the file."""
+        if isinstance(chunk, str):
+            text = self._newlines.decode(chunk)
+        else:
+            text = self._decoder.decode(chunk)
+        if not text:
+            return
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self._flush_at and self.regions is None:
+            self._flush()
+    
+    def finish(self) -> Tuple[int, int, int, int]:
+        """Classify the remaining input and return (total, code, comment, blank)."""
+        tail = self._decoder.decode(b'', final=True) + self._newlines.decode('', final=True)
+        text = ''.join(self._pending) + tail
+        self._pending, self._pending_size = [], 0
+        if text:
+            if self._state is not None:
+                code, comment, self._state = self.classifier.classify_piece(text, self._state)
+            else:
+                code, comment = (self.regions or self.classifier).classify(text)
+            self._add(text.count('\n') + (text[-1] != '\n'), code, comment)
+        return (self.total, self.code, self.comment, self.total - self.code - self.comment)
+    
+    def _add(self, total: int, code: int, comment: int) -> None:
+        self.total += total
+        self.code += code
+        self.comment += comment
+    
+    def _flush(self) -> None:
+        """Classify buffered lines up to the last safe line boundary."""
+        text = ''.join(self._pending)
+        cut = self.classifier.last_safe_cut(text)
+        if not cut:
+            self._pending, self._flush_at = [text], 2 * len(text)
+            return
+        head = text[:cut]
+        code, comment, self._state = self.classifier.classify_piece(head, self._state)
+        self._add(head.count('\n'), code, comment)
+        rest = text[cut:]
+        self._pending, self._pending_size = ([rest] if rest else []), len(rest)
+        self._flush_at = self.FLUSH_SIZE
+
+
+class NotebookClassifier:
+    """Incremental line counter for Jupyter notebooks, fed the raw JSON in chunks.
+    
+    A streaming tokenizer walks the notebook's JSON structure and keeps
+    only the strings it needs: object keys, ``cells[].source`` (``input``
+    in nbformat 3), ``cell_type`` and the kernel language in ``metadata``.
+    Containers that cannot hold any of these, such as cell ``outputs``,
+    are skipped by one regex that only tracks bracket depth, and no
+    skipped string is kept, so memory is bounded by the notebook's source
+    text rather than its size.
+    
+    Code cells are counted with the kernel language's classifier once the
+    whole notebook has been fed, since ``metadata`` usually follows the
+    cells; notebooks that name no kernel are Python, and kernels nxlc does
+    not know have no comment syntax. Markdown and raw cells are
+    documentation: their non-blank lines count as comments. ``finish``
+    returns ``(total, code, comment, blank)`` over all cell sources.
+    """
+    
+    LANGUAGE = 'Jupyter Notebook'
+    DEFAULT_KERNEL = 'Python'
+    # Where the kernel language is declared, in order of preference
+    KERNEL_PATHS = (('metadata', 'kernelspec', 'language'), ('metadata', 'language_info', 'name'),
+                    ('metadata', 'language'))
+    SOURCE_KEYS = ('source', 'input')
+    # Containers outside cells that can hold cells or the kernel language
+    OPEN_PATHS = {(), ('cells',), ('worksheets',), ('worksheets', None), ('worksheets', None, 'cells'),
+                  ('metadata',), ('metadata', 'kernelspec'), ('metadata', 'language_info')}
+    
+    # Whitespace, then a structural character, a string's opening quote or a scalar
+    TOKEN = re.compile(rb'[ \t\r\n]*(?:([{}\[\]:,"])|[^ \t\r\n{}\[\]:,"]*)')
+    # Inside a skipped container: everything up to the next bracket, with
+    # complete strings. Matches are limited to SKIP_WINDOW bytes, which
+    # bounds the regex engine's backtracking state on escape-dense strings;
+    # a string crossing the window edge is finished by the quote scanner.
+    SKIP = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\[\s\S][^"\\]*)*"[^"\[\]{}]*)*')
+    SKIP_WINDOW = 64 * 1024
+    
+    # Roles of kept strings
+    KEY, SOURCE, CELL_TYPE, KERNEL = range(1, 5)
+    
+    def __init__(self, definitions: Optional[LanguageDefinitions] = None):
+        self.definitions = definitions or LanguageDefinitions()
+        # Per open container: its current key (None in arrays) and whether it is an object
+        self._keys: List[Optional[str]] = []
+        self._objects: List[bool] = []
+        self._key_next = False
+        self._in_string = self._escape = False
+        self._string: Optional[List[bytes]] = None
+        self._role = 0
+        self._skip = 0  # Bracket depth inside a skipped container
+        self._cell_depth = 0
+        self._cell_type: Optional[str] = None
+        self._cell_source: List[str] = []
+        self._code_cells: List[str] = []
+        self._kernels: Dict[Tuple, str] = {}
+        self.total = self.code = self.comment = 0
+    
+    def feed(self, chunk) -> None:
+        """Add the next chunk of the notebook (``bytes``, or ``str`` encoded as UTF-8)."""
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        token, skip, window = self.TOKEN.match, self.SKIP.match, self.SKIP_WINDOW
+        pos, length = 0, len(chunk)
+        while pos < length:
+            if self._in_string:
+                # Find the closing quote: one preceded by an even run of
+                # backslashes, counting a run carried over from the last chunk
+                end = chunk.find(b'"', pos)
+                while end >= 0:
+                    start = end
+                    while start > pos and chunk[start - 1] == 0x5C:
+                        start -= 1
+                    if not (end - start + (self._escape and start == pos)) % 2:
+                        break
+                    end = chunk.find(b'"', end + 1)
+                if end < 0:
+                    if self._string is not None:
+                        self._string.append(chunk[pos:])
+                    start = length
+                    while start > pos and chunk[start - 1] == 0x5C:
+                        start -= 1
+                    self._escape = bool((length - start + (self._escape and start == pos)) % 2)
+                    return
+                if self._string is not None:
+                    self._string.append(chunk[pos:end])
+                    self._end_string()
+                self._in_string = self._escape = False
+                pos = end + 1
+                continue
+            
+            if self._skip:
+                pos = skip(chunk, pos, pos + window).end()
+                if pos == length:
+                    return
+                char = chunk[pos]
+                if char not in b'"[]{}':
+                    continue  # Window edge
+                pos += 1
+                if char == 0x22:
+                    # A string running past the end of the chunk
+                    self._in_string, self._string = True, None
+                elif char == 0x5B or char == 0x7B:
+                    self._skip += 1
+                else:
+                    self._skip -= 1
+                    self._key_next = False
+                continue
+            
+            match = token(chunk, pos)
+            pos = match.end()
+            char = match.group(1)
+            if char is None:
+                continue  # Number, true, false or null
+            if char == b'"':
+                self._in_string = True
+                self._role = self.KEY if self._key_next else self._value_role()
+                self._string = [] if self._role else None
+            elif char == b'{' or char == b'[':
+                is_object = char == b'{'
+                keys = self._keys
+                if (is_object and not self._cell_depth and len(keys) >= 2 and keys[-2] == 'cells'
+                        and not self._objects[-1]):
+                    self._cell_depth = len(keys) + 1
+                    self._cell_type, self._cell_source = None, []
+                elif self._skippable():
+                    self._skip = 1
+                    continue
+                keys.append(None)
+                self._objects.append(is_object)
+                self._key_next = is_object
+            elif char == b'}' or char == b']':
+                if self._keys:
+                    if len(self._keys) == self._cell_depth:
+                        self._end_cell()
+                    self._keys.pop()
+                    self._objects.pop()
+                self._key_next = False
+            elif char == b':':
+                self._key_next = False
+            else:
+                self._key_next = bool(self._objects) and self._objects[-1]
+    
+    def finish(self) -> Tuple[int, int, int, int]:
+        """Count the code cells and return (total, code, comment, blank)."""
+        classifier = self.definitions.comment_classifier(self.kernel_language())
+        for text in self._code_cells:
+            self._add(*classifier.count_buffer(text))
+        self._code_cells = []
+        return (self.total, self.code, self.comment, self.total - self.code - self.comment)
+    
+    def kernel_language(self) -> str:
+        """Language of the code cells, from the notebook metadata read so far."""
+        for path in self.KERNEL_PATHS:
+            name = self._kernels.get(path)
+            if name:
+                return self.definitions.embedded_language(name) or 'Text'
+        return self.DEFAULT_KERNEL
+    
+    def _add(self, total: int, code: int, comment: int) -> None:
+        self.total += total
+        self.code += code
+        self.comment += comment
+    
+    def _skippable(self) -> bool:
+        """Whether a container opening at the current position holds nothing to keep."""
+        keys, cell = self._keys, self._cell_depth
+        if cell:
+            return not (len(keys) == cell and keys[-1] in self.SOURCE_KEYS)
+        return tuple(keys) not in self.OPEN_PATHS
+    
+    def _value_role(self) -> int:
+        """Role of a string value at the current position, or 0 to skip it."""
+        keys, depth, cell = self._keys, len(self._keys), self._cell_depth
+        if cell:
+            if depth == cell:
+                if keys[-1] in self.SOURCE_KEYS:
+                    return self.SOURCE
+                if keys[-1] == 'cell_type':
+                    return self.CELL_TYPE
+            elif depth == cell + 1 and keys[-2] in self.SOURCE_KEYS and not self._objects[-1]:
+                return self.SOURCE  # One line of a source list
+            return 0
+        if depth <= 3 and tuple(keys) in self.KERNEL_PATHS:
+            return self.KERNEL
+        return 0
+    
+    def _end_string(self) -> None:
+        raw = b''.join(self._string)
+        self._string = None
+        if b'\\' in raw:
+            try:
+                value = json.loads(b'"' + raw + b'"')
+            except ValueError:
+                value = raw.decode('utf-8', 'replace')
+        else:
+            value = raw.decode('utf-8', 'replace')
+        role = self._role
+        if role == self.KEY:
+            if self._keys:
+                self._keys[-1] = value
+        elif role == self.SOURCE:
+            self._cell_source.append(value)
+        elif role == self.CELL_TYPE:
+            self._cell_type = value
+        else:
+            self._kernels[tuple(self._keys)] = value
+    
+    def _end_cell(self) -> None:
+        text = ''.join(self._cell_source).replace('\r\n', '\n')
+        self._cell_depth, self._cell_source = 0, []
+        if not text:
+            return
+        if self._cell_type in (None, 'code'):
+            self._code_cells.append(text)
+        else:
+            self._add(text.count('\n') + (text[-1] != '\n'), 0, CommentClassifier._nonblank_lines(text))
+
+
+class ParallelFileCounter:
+    """Counts one large file in line-aligned chunks on worker processes.
+    
+    The file is cut into byte ranges of about ``chunk_size`` bytes at
+    newlines that do not follow a backslash, so no line or escaped string
+    spans a cut. Each worker reads, decodes and classifies its range as if it
+    started outside any comment or string, and returns its counts with the
+    scanner's exit state (see ``CommentClassifier.scan``). Results are then
+    reconciled: every chunk counted from another state than its
+    predecessor's exit state is recounted from that exit state, all of
+    them in parallel, and chunks whose predecessor's exit state changed in
+    that recount are recounted in this process in file order. A chunk is
+    recounted only where a block comment or multi-line string crosses a
+    cut, and the totals equal a serial count.
+    
+    Only encodings in which newline and backslash are single ASCII bytes
+    and decoding is stateless can be cut this way; ``count`` returns None
+    for other files, and when worker processes cannot be started.
+    """
+    
+    # Bytes read at a time while looking for a cut point
+    SCAN_SIZE = 64 * 1024
+    
+    # Language definitions of this worker process
+    _worker_definitions: Optional[LanguageDefinitions] = None
+    
+    def __init__(self, jobs: int, definitions: LanguageDefinitions, chunk_size: int,
+                 logger: Optional[logging.Logger] = None):
+        self.jobs = jobs
+        self.definitions = definitions
+        self.chunk_size = chunk_size
+        self.logger = logger or logging.getLogger(__name__)
+        # Chunks recounted from their predecessor's exit state by the last count
+        self.recounted = 0
+    
+    @staticmethod
+    def splittable(encoding: str) -> bool:
+        """Whether files in ``encoding`` can be cut at ``b'\\n'`` bytes and decoded piecewise."""
+        try:
+            name = codecs.lookup(encoding).name
+        except LookupError:
+            return False
+        return '\n\\'.encode(name) == b'\n\\' and not name.startswith(('iso2022', 'hz'))
+    
+    def split(self, filepath: Path, size: int) -> List[Tuple[int, int]]:
+        """Return the ``(start, end)`` byte ranges of the chunks of a file of ``size`` bytes."""
+        ranges = []
+        start = 0
+        with open(filepath, 'rb') as f:
+            while start < size:
+                end = size
+                if start + self.chunk_size < size:
+                    end = self._next_cut(f, start + self.chunk_size, size)
+                ranges.append((start, end))
+                start = end
+        return ranges
+    
+    def _next_cut(self, f, offset: int, size: int) -> int:
+        """Offset just after the first safe newline at or after ``offset``, or ``size``."""
+        f.seek(max(offset - 2, 0))
+        before = f.read(min(offset, 2))
+        while True:
+            block = f.read(self.SCAN_SIZE)
+            if not block:
+                return size
+            index = block.find(b'\n')
+            while index >= 0:
+                # A backslash before the newline (or its \r) may escape it
+                tail = (before + block[:index])[-2:]
+                if not (tail.endswith(b'\\') or tail == b'\\\r'):
+                    return offset + index + 1
+                index = block.find(b'\n', index + 1)
+            before = (before + block)[-2:]
+            offset += len(block)
+    
+    def count(self, filepath: Path, language: str, encoding: str) -> Optional[Tuple[int, int, int]]:
+        """Return (total, code, comment) of the file, or None if it cannot be counted in parallel."""
+        if not self.splittable(encoding):
+            return None
+        ranges = self.split(filepath, filepath.stat().st_size)
+        if len(ranges) < 2:
+            return None
+        path = str(filepath)
+        entries: List[Optional[Tuple[int, int]]] = [None] * len(ranges)
+        try:
+            with ProcessPoolExecutor(min(self.jobs, len(ranges)), initializer=self._init_worker,
+                                     initargs=(self.definitions.user_definitions,)) as pool:
+                results = self._map(pool, path, ranges, entries, encoding, language)
+                # Chunks counted from another state than their predecessor's exit state
+                stale = [i for i in range(1, len(ranges)) if entries[i] != results[i - 1][3]]
+                for i in stale:
+                    entries[i] = results[i - 1][3]
+                recounted = self._map(pool, path, [ranges[i] for i in stale], [entries[i] for i in stale],
+                                      encoding, language)
+                for i, result in zip(stale, recounted):
+                    results[i] = result
+                recounts = len(stale)
+        except (OSError, BrokenProcessPool) as e:
+            self.logger.debug(f"Counting {filepath} serially: worker processes failed ({e})")
+            return None
+        # Exit states that changed in the recount are settled in file order
+        for i in range(1, len(ranges)):
+            if entries[i] != results[i - 1][3]:
+                entries[i] = results[i - 1][3]
+                results[i] = self._count_range(self.definitions, path, *ranges[i], encoding, language, entries[i])
+                recounts += 1
+        self.recounted = recounts
+        self.logger.debug(f"Counted {filepath} in {len(ranges)} chunks, {recounts} recounted")
+        return (sum(result[0] for result in results), sum(result[1] for result in results),
+                sum(result[2] for result in results))
+    
+    def _map(self, pool: ProcessPoolExecutor, path: str, ranges: List[Tuple[int, int]],
+             entries: List[Optional[Tuple[int, int]]], encoding: str, language: str) -> List[Tuple]:
+        futures = [pool.submit(self._count_worker, path, start, end, encoding, language, entry)
+                   for (start, end), entry in zip(ranges, entries)]
+        return [future.result() for future in futures]
+    
+    @classmethod
+    def _init_worker(cls, user_definitions: Optional[Path]) -> None:
+        cls._worker_definitions = LanguageDefinitions(user_definitions)
+    
+    @classmethod
+    def _count_worker(cls, path: str, start: int, end: int, encoding: str, language: str,
+                      state: Optional[Tuple[int, int]]) -> Tuple:
+        return cls._count_range(cls._worker_definitions, path, start, end, encoding, language, state)
+    
+    @staticmethod
+    def _count_range(definitions: LanguageDefinitions, path: str, start: int, end: int, encoding: str,
+                     language: str, state: Optional[Tuple[int, int]] = None) -> Tuple:
+        """(lines, code, comment, exit state) of one byte range entered in ``state``."""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        # Newlines translated as by text-mode reading
+        text = data.decode(encoding, errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+        if not text:
+            return (0, 0, 0, state)
+        code, comment, state = definitions.comment_classifier(language).classify_piece(text, state)
+        return (text.count('\n') + (text[-1] != '\n'), code, comment, state)
 
 
 # ============================================================================
@@ -648,6 +3495,10 @@ class PlatformAdapter(ABC):
     def normalize_path(self, path: Path) -> Path:
         """Normalize path for this platform."""
         pass
+    
+    def has_executable_bit(self) -> bool:
+        """Whether is_executable reflects a permission bit usable as a script hint."""
+        return False
 
 
 class UnixAdapter(PlatformAdapter):
@@ -659,6 +3510,9 @@ class UnixAdapter(PlatformAdapter):
     def is_executable(self, path: Path) -> bool:
         return os.access(path, os.X_OK)
     
+    def has_executable_bit(self) -> bool:
+        return True
+    
     def normalize_path(self, path: Path) -> Path:
         return path.resolve()
 
@@ -722,6 +3576,25 @@ def validate_linguist_path(path: str) -> bool:
     return True
 
 
+def detect_buffer_encoding(data: bytes) -> str:
+    """Detect the encoding of a file held entirely in ``data``."""
+    try:
+        import chardet
+        result = chardet.detect(data[:32768])
+        if result['encoding'] and result['confidence'] > 0.7:
+            return result['encoding']
+    except ImportError:
+        pass
+    
+    for encoding in ('utf-8', 'utf-16', 'iso-8859-1', 'cp1252'):
+        try:
+            data.decode(encoding)
+            return encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+    return 'utf-8'
+
+
 def detect_file_encoding(filepath: Path) -> str:
     """Detect file encoding using multiple strategies."""
     try:
@@ -751,6 +3624,72 @@ def detect_file_encoding(filepath: Path) -> str:
     return 'utf-8'
 
 
+def parse_toml_tables(text: str) -> Dict[str, Any]:
+    """Parse TOML with ``tomllib`` where available (Python 3.11+).
+    
+    Older interpreters fall back to a reader for what manifests need:
+    ``[table]`` headers and string or string-array values. Array-of-tables
+    entries (``[[bin]]``) are skipped, so their keys never leak into the
+    enclosing table.
+    """
+    try:
+        import tomllib
+    except ImportError:
+        pass
+    else:
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            return {}
+    
+    strings = re.compile(r'"([^"]*)"|\'([^\']*)\'')
+    document: Dict[str, Any] = {}
+    table: Optional[Dict[str, Any]] = document
+    key, array = None, None  # Key and collected text of an unterminated array
+    for line in text.splitlines():
+        stripped = line.strip()
+        if array is None:
+            if stripped.startswith('['):
+                # '[[bin]]' entries are skipped; '[a.b]' nests tables
+                table = None if stripped.startswith('[[') else document
+                for part in stripped.strip('[]').split('.') if table is not None else ():
+                    table = table.setdefault(part.strip().strip('"\''), {})
+                    if not isinstance(table, dict):
+                        table = None
+                        break
+                continue
+            match = re.match(r'([\w.-]+|"[^"]*")\s*=\s*(.*)', stripped)
+            if table is None or not match:
+                continue
+            key, value = match.group(1).strip('"'), match.group(2)
+            if not value.startswith('['):
+                string = strings.match(value)
+                if string:
+                    table[key] = string.group(1) if string.group(1) is not None else string.group(2)
+                continue
+            array = [value]
+        else:
+            array.append(stripped)
+        if ']' in array[-1].split('#', 1)[0]:
+            table[key] = [a or b for a, b in strings.findall('\n'.join(array))]
+            array = None
+    return document
+
+
+def get_cache_dir() -> Path:
+    """Return the directory for persistent NXLC caches.
+    
+    Honours ``NXLC_CACHE_DIR``, then ``XDG_CACHE_HOME``, defaulting to
+    ``~/.cache/nxlc``. The directory is not created here.
+    """
+    override = os.environ.get('NXLC_CACHE_DIR')
+    if override:
+        return Path(override)
+    xdg_cache = os.environ.get('XDG_CACHE_HOME')
+    base = Path(xdg_cache) if xdg_cache else Path.home() / '.cache'
+    return base / 'nxlc'
+
+
 # ============================================================================
 # UTILITY DECORATORS AND HELPERS  
 # ============================================================================
@@ -776,22 +3715,294 @@ def handle_file_errors(default_return=None, log_errors=True):
     return decorator
 
 
+# ============================================================================
+# STATISTICAL LANGUAGE CLASSIFIER
+# ============================================================================
+
+class LanguageClassifier:
+    """Compact multinomial naive-Bayes token model for language guessing.
+    
+    Used only for files the rule-based detection cannot place (``Unknown``)
+    or conflicted extensions with no other evidence. The model is a JSON data
+    file of per-language token counts produced by ``scripts/train_classifier.py``
+    from a pinned corpus, and is loaded lazily on first use.
+    
+    The model only knows its trained languages, so a guess must also fit the
+    text better than a background model pooled over all of them; text in
+    any other language fits the background about as well and is answered
+    ``Unknown``.
+    """
+    
+    MODEL_PATH = Path(__file__).parent / 'nxlc_data' / 'classifier.json'
+    MODEL_VERSION = 1
+    
+    # Identifiers and short punctuation runs (``//``, ``<-``, ``:-``, ``#!``)
+    TOKEN_PATTERN = re.compile(r'[A-Za-z_$@][A-Za-z0-9_]{0,29}|[^\sA-Za-z0-9_]{1,2}')
+    
+    # Minimum tokens in the sample, and minimum per-token log-likelihood
+    # margins of the best language over the second-best and over the
+    # background model before a guess is returned
+    MIN_TOKENS = 8
+    MIN_MARGIN = 0.3
+    MIN_FIT = 0.25
+    
+    _default: Optional['LanguageClassifier'] = None
+    _default_lock = threading.Lock()
+    
+    def __init__(self, model: Dict[str, Any]):
+        if model.get('version') != self.MODEL_VERSION:
+            raise ValueError(f"Unsupported classifier model version: {model.get('version')}")
+        vocabulary_size = max(int(model.get('vocabulary_size', 0)), 1)
+        self.languages: List[str] = []
+        self._token_logprobs: Dict[str, Dict[str, float]] = {}
+        self._unseen_logprob: Dict[str, float] = {}
+        pooled: Dict[str, int] = defaultdict(int)
+        pooled_total = 0
+        for language, stats in model['languages'].items():
+            denominator = math.log(int(stats['total']) + vocabulary_size)
+            self.languages.append(language)
+            self._unseen_logprob[language] = -denominator
+            self._token_logprobs[language] = {
+                token: math.log(count + 1) - denominator for token, count in stats['tokens'].items()
+            }
+            for token, count in stats['tokens'].items():
+                pooled[token] += count
+            pooled_total += int(stats['total'])
+        denominator = math.log(pooled_total + vocabulary_size)
+        self._background_logprobs = {token: math.log(count + 1) - denominator for token, count in pooled.items()}
+        self._background_unseen = -denominator
+    
+    @classmethod
+    def tokenize(cls, text: str) -> Dict[str, int]:
+        """Count model tokens in ``text``."""
+        counts: Dict[str, int] = defaultdict(int)
+        for token in cls.TOKEN_PATTERN.findall(text):
+            counts[token] += 1
+        return counts
+    
+    @classmethod
+    def load_default(cls) -> Optional['LanguageClassifier']:
+        """Load the shipped model once per process; None if it is missing or invalid."""
+        with cls._default_lock:
+            if cls._default is None:
+                try:
+                    with open(cls.MODEL_PATH, 'r', encoding='utf-8') as f:
+                        cls._default = cls(json.load(f))
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    logging.warning(f"Language classifier unavailable ({cls.MODEL_PATH}): {e}")
+                    cls._default = False
+            return cls._default or None
+    
+    @classmethod
+    def train(cls, samples: Dict[str, List[str]], max_tokens_per_language: int = 400) -> Dict[str, Any]:
+        """Build a model from ``{language: [text, ...]}``; returns the JSON-serializable model."""
+        languages = {}
+        vocabulary = set()
+        for language, texts in sorted(samples.items()):
+            counts: Dict[str, int] = defaultdict(int)
+            for text in texts:
+                for token, count in cls.tokenize(text).items():
+                    counts[token] += count
+            top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:max_tokens_per_language]
+            vocabulary.update(counts)
+            languages[language] = {
+                'documents': len(texts),
+                'total': sum(counts.values()),
+                'tokens': dict(top),
+            }
+        return {'version': cls.MODEL_VERSION, 'vocabulary_size': len(vocabulary), 'languages': languages}
+    
+    def scores(self, text: str, candidates: Optional[List[str]] = None) -> Dict[str, float]:
+        """Log-likelihood of ``text`` per language (uniform priors)."""
+        tokens = self.tokenize(text)
+        languages = [lang for lang in (candidates or self.languages) if lang in self._token_logprobs]
+        result = {}
+        for language in languages:
+            logprobs = self._token_logprobs[language]
+            unseen = self._unseen_logprob[language]
+            result[language] = sum(logprobs.get(token, unseen) * count for token, count in tokens.items())
+        return result
+    
+    def background_score(self, text: str) -> float:
+        """Log-likelihood of ``text`` under the model pooled over all languages."""
+        logprobs, unseen = self._background_logprobs, self._background_unseen
+        return sum(logprobs.get(token, unseen) * count for token, count in self.tokenize(text).items())
+    
+    def classify(self, text: str, candidates: Optional[List[str]] = None) -> str:
+        """Return the most likely language, or ``Unknown`` when the evidence is weak.
+        
+        ``candidates`` restrict the answer; those the model was not trained on
+        are dropped, and with none left the answer is ``Unknown``.
+        """
+        token_count = sum(self.tokenize(text).values())
+        if token_count < self.MIN_TOKENS:
+            return 'Unknown'
+        ranked = sorted(self.scores(text, candidates).items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return 'Unknown'
+        if len(ranked) > 1 and (ranked[0][1] - ranked[1][1]) / token_count < self.MIN_MARGIN:
+            return 'Unknown'
+        if (ranked[0][1] - self.background_score(text)) / token_count < self.MIN_FIT:
+            return 'Unknown'
+        return ranked[0][0]
+
+
 # ============================================================================
 # LINE COUNTER CLASS
 # ============================================================================
 
+class FileRecord:
+    """Language and line counts for a single scanned file.
+    
+    Produced once per file by ``LineCounter.classify_file`` and consumed by
+    aggregation, verbose output and debug reporting, so a file is never
+    classified twice during a scan.
+    """
+    
+    __slots__ = ('path', 'size', 'language', 'language_id', 'total', 'code', 'comment', 'blank',
+                 'generated')
+    
+    def __init__(self, path: Path, size: int, language: str, language_id: int,
+                 total: int = 0, code: int = 0, comment: int = 0,
+                 generated: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.language = language
+        self.language_id = language_id  # ID in the scan's LanguageTable
+        self.total = total
+        self.code = code
+        self.comment = comment
+        self.blank = total - code - comment
+        self.generated = generated  # Generator kind for generated files, else None
+    
+    def __repr__(self) -> str:
+        generated = f", generated={self.generated!r}" if self.generated else ""
+        return (f"FileRecord({str(self.path)!r}, language={self.language!r}, "
+                f"total={self.total}, code={self.code}, comment={self.comment}, "
+                f"blank={self.blank}{generated})")
+
+
+class LanguageCounters:
+    """Per-language aggregation counters in one flat ``array('q')``.
+    
+    Each language ID owns ``len(FIELDS)`` consecutive slots, so adding a
+    file is four integer increments and merging counters from another
+    worker is an element-wise sum. The nested-dict shape used by reporting
+    is only built by ``to_dict``.
+    """
+    
+    FIELDS = ('files', 'total_lines', 'code_lines', 'comment_lines')
+    STRIDE = len(FIELDS)
+    
+    __slots__ = ('counts',)
+    
+    def __init__(self, languages: int = 0):
+        self.counts = array('q', bytes(8 * self.STRIDE * languages))
+    
+    def _grow(self, languages: int) -> None:
+        missing = languages * self.STRIDE - len(self.counts)
+        if missing > 0:
+            self.counts.frombytes(bytes(8 * missing))
+    
+    def add(self, language_id: int, total: int, code: int, comment: int) -> None:
+        """Count one file of the given language."""
+        base = language_id * self.STRIDE
+        counts = self.counts
+        if base >= len(counts):
+            self._grow(language_id + 1)
+        counts[base] += 1
+        counts[base + 1] += total
+        counts[base + 2] += code
+        counts[base + 3] += comment
+    
+    def merge(self, other: 'LanguageCounters') -> None:
+        """Add another set of counters (using the same LanguageTable) into this one."""
+        self._grow(len(other.counts) // self.STRIDE)
+        counts = self.counts
+        for index, value in enumerate(other.counts):
+            if value:
+                counts[index] += value
+    
+    def totals(self) -> Tuple[int, int, int, int]:
+        """Return (files, total, code, comment) summed over all languages."""
+        return tuple(sum(self.counts[field::self.STRIDE]) for field in range(self.STRIDE))
+    
+    def to_dict(self, names: List[str]) -> Dict[str, Dict[str, int]]:
+        """Build the ``results['languages']`` shape for languages with at least one file."""
+        counts = self.counts
+        languages = {}
+        for base in range(0, len(counts), self.STRIDE):
+            if counts[base]:
+                languages[names[base // self.STRIDE]] = dict(zip(self.FIELDS, counts[base:base + self.STRIDE]))
+        return languages
+
+
 class LineCounter:
     """NeoAxios Language Counter - Main class for counting lines of code with encapsulated state."""
     
+    # Seconds allowed for a single batched Linguist run over a tree
+    LINGUIST_TIMEOUT = 600
+    
+    # Linguist maps already computed in this process, keyed by tree fingerprint;
+    # the least recently used map is dropped beyond LINGUIST_MEMORY_CACHE_SIZE
+    LINGUIST_MEMORY_CACHE_SIZE = 8
+    _linguist_memory_cache: 'OrderedDict[str, Dict[str, str]]' = OrderedDict()
+    
+    # Treatment of generated files: not counted, counted as lines only in a
+    # "Generated" bucket, or counted as normal source
+    GENERATED_MODES = ('skip', 'count', 'include')
+    
+    # Treatment of vendored trees: pruned, counted as lines only in a
+    # "Vendored" bucket without classification, or counted as normal source
+    VENDORED_MODES = ('skip', 'count', 'include')
+    
+    # Bytes read from the start of a file for content-based detection
+    HEAD_SIZE = 4096
+    # Bytes per read when streaming a file through line counting
+    READ_CHUNK_SIZE = 1024 * 1024
+    # Bytes read from the end of larger files for trailing vim modelines
+    TAIL_SIZE = 1024
+    # With file_jobs above 1, files of at least PARALLEL_FILE_SIZE bytes are
+    # counted in chunks of about PARALLEL_CHUNK_SIZE bytes on worker processes
+    PARALLEL_FILE_SIZE = 32 * 1024 * 1024
+    PARALLEL_CHUNK_SIZE = 8 * 1024 * 1024
+    
     def __init__(self, platform_adapter=None, use_comprehensive=False, linguist_cmd=None, 
-                 logger=None, colors=None):
-        """Initialize LineCounter with configuration."""
+                 logger=None, colors=None, use_classifier=False, language_definitions=None,
+                 generated='skip', vendored='skip', file_jobs=1):
+        """Initialize LineCounter with configuration.
+        
+        ``language_definitions`` is a TOML/JSON file of user-defined languages.
+        Without one, a ``.nxlc-languages.toml``/``.json`` in each scanned root
+        is used if present. ``generated`` is one of ``GENERATED_MODES`` and
+        ``vendored`` one of ``VENDORED_MODES``. With ``file_jobs`` above 1,
+        files of at least ``PARALLEL_FILE_SIZE`` bytes are counted in chunks
+        on that many worker processes (see ``ParallelFileCounter``).
+        """
+        if file_jobs < 1:
+            raise ValueError(f"Invalid file job count {file_jobs!r} (expected 1 or more)")
+        if generated not in self.GENERATED_MODES:
+            raise ValueError(f"Invalid generated-file mode {generated!r} (expected one of {self.GENERATED_MODES})")
+        if vendored not in self.VENDORED_MODES:
+            raise ValueError(f"Invalid vendored-tree mode {vendored!r} (expected one of {self.VENDORED_MODES})")
+        self.generated = generated
+        self.vendored = vendored
+        self.file_jobs = file_jobs
+        self._root_namespaces: Set[str] = set()  # Package namespaces of the scanned project
+        self._workspace_dirs: Set[Path] = set()  # Workspace member directories of the scanned project
         self.platform = platform_adapter or get_platform_adapter()
         self.use_comprehensive = use_comprehensive
+        self.use_classifier = use_classifier
+        self._classifier: Optional[LanguageClassifier] = None  # Loaded on first use
         self.linguist_cmd = linguist_cmd
         self.linguist_lock = threading.Lock()
-        self.language_defs = LanguageDefinitions()
-        self.file_line_counts = {}
+        self.language_definitions = language_definitions
+        self.language_defs = LanguageDefinitions(language_definitions)
+        self.language_table = self.language_defs.language_table()  # Replaced at the start of each scan
+        self.file_line_counts: Dict[str, FileRecord] = {}  # Per-file records from the last scan
+        self._dir_extension_counts: Dict[Path, Dict[str, int]] = {}  # Sibling extensions per directory
+        self.conflict_decisions: Dict[Tuple[str, str, str], int] = defaultdict(int)  # (ext, language, source)
+        self.linguist_languages: Dict[str, str] = {}  # Absolute path -> language from Linguist
         self.logger = logger or logging.getLogger(__name__)
         self.colors = colors or Colors(enabled=True)
         
@@ -804,187 +4015,623 @@ class LineCounter:
         encoding = detect_file_encoding(filepath)
         return open(filepath, 'r', encoding=encoding, errors='ignore')
     
-    def detect_language(self, filepath: Path) -> str:
-        """Detect the programming language of a file."""
-        # Handle special filenames first
-        filename = filepath.name
-        
-        # Handle Makefiles
-        if filename in {'Makefile', 'makefile', 'GNUmakefile'} or filename.endswith('.mk') or 'makefile' in filename.lower():
-            return 'Makefile'
-        
-        # Handle Dockerfiles  
-        if filename in {'Dockerfile'} or filename.endswith('.dockerfile') or 'dockerfile' in filename.lower():
-            return 'Dockerfile'
+    def _read_head(self, filepath: Path) -> str:
+        """Read the head buffer shared by the content-based detectors."""
+        return self._read_head_bytes(filepath).decode('utf-8', errors='ignore')
+    
+    @handle_file_errors(default_return=b'', log_errors=True)
+    def _read_head_bytes(self, filepath: Path) -> bytes:
+        """Read the raw head buffer; it holds the whole file if shorter than HEAD_SIZE."""
+        with open(filepath, 'rb') as f:
+            return f.read(self.HEAD_SIZE)
+    
+    def detect_language(self, filepath: Path, head: Optional[str] = None, size: Optional[int] = None) -> str:
+        """Detect the programming language of a file.
         
-        # Handle READMEs
-        if 'readme' in filename.lower():
-            return 'README'
+        ``head`` is the file's head buffer if the caller already read it; it is
+        otherwise read lazily, at most once, when content analysis is needed.
+        ``size`` is the file size if known; a file no larger than the head
+        buffer is not reopened to look for a trailing modeline.
+        In comprehensive mode, Linguist's classification takes precedence.
+        """
+        if self.linguist_languages:
+            language = self.linguist_languages.get(str(filepath))
+            if language is not None:
+                return language
         
-        # Handle configuration files (including git config)
-        if filename in {'.gitignore', '.gitattributes', '.gitmodules', '.dockerignore', '.npmignore'} or filename.endswith('.example'):
-            return 'Configuration'
+        # Handle special filenames first (Makefiles, Dockerfiles, READMEs, git config, ...)
+        filename = filepath.name
+        language = self.language_defs.FILENAME_RULE_SET.match(filename)
+        if language is not None:
+            return language
         
         # Get file extension
         if filepath.suffix:
             ext = filepath.suffix.lower()
         else:
-            # Handle files without extensions by checking shebang first
-            shebang_lang = self._detect_from_shebang(filepath)
-            if shebang_lang != 'Unknown':
-                return shebang_lang
+            # Handle files without extensions by checking shebang/modeline first.
+            # Where the platform has an executable bit, non-executable files
+            # cannot be scripts and are not sniffed (or read at all).
+            if self.use_classifier or self._may_be_script(filepath):
+                if head is None:
+                    head = self._read_head(filepath)
+                script_lang = self._detect_from_script_header(filepath, head, size)
+                if script_lang != 'Unknown':
+                    return script_lang
             
             # If no shebang, check for common extensionless file types
             if filename.lower() in {'license', 'copying', 'authors', 'contributors', 'changelog', 'news', 'install', 'readme'}:
                 return 'Text'
             
-            return 'Unknown'
+            return self._classify_content(filepath, head)
         
         # Handle conflicted extensions with content analysis
         if ext in self.language_defs.CONFLICT_EXTENSIONS:
-            return self._resolve_conflict(filepath, ext)
+            return self._resolve_conflict(filepath, ext, head)
         
-        # Standard extension lookup
-        for language, extensions in self.language_defs.LANGUAGE_EXTENSIONS.items():
-            if ext in [e.lower() for e in extensions]:
-                return language
+        # Standard extension lookup (O(1) via the precompiled index)
+        language = self.language_defs.DETECTION_INDEX.lookup(filename, ext)
+        if language is not None:
+            return language
         
-        # Check for shebang if no extension match
-        shebang_lang = self._detect_from_shebang(filepath)
-        if shebang_lang != 'Unknown':
-            return shebang_lang
+        # Check for shebang/modeline if no extension match
+        if head is None:
+            head = self._read_head(filepath)
+        language = self._detect_from_script_header(filepath, head, size)
+        if language == 'Unknown':
+            language = self._classify_content(filepath, head)
+        return language
+    
+    def _classify_content(self, filepath: Path, head: Optional[str] = None,
+                          candidates: Optional[List[str]] = None) -> str:
+        """Last-resort statistical guess from the head buffer (``--classify`` only)."""
+        if not self.use_classifier:
+            return 'Unknown'
+        if self._classifier is None:
+            self._classifier = LanguageClassifier.load_default()
+            if self._classifier is None:
+                self.use_classifier = False
+                return 'Unknown'
+        if head is None:
+            head = self._read_head(filepath)
+        return self._classifier.classify(head, candidates)
+    
+    def _may_be_script(self, filepath: Path) -> bool:
+        """Use the platform's executable bit as a hint for extensionless scripts."""
+        if not self.platform.has_executable_bit():
+            return True
+        return self.platform.is_executable(filepath)
+    
+    def _detect_from_script_header(self, filepath: Path, head: Optional[str] = None,
+                                   size: Optional[int] = None) -> str:
+        """Detect language from a shebang, then from vim/emacs modelines."""
+        if head is None:
+            head = self._read_head(filepath)
+        parser = self.language_defs.SHEBANG_PARSER
+        language = parser.detect_shebang(head.split('\n', 1)[0].strip())
+        if language == 'Unknown':
+            language = parser.detect_modeline(head, self._read_tail(filepath, size))
+        return language
+    
+    @handle_file_errors(default_return='', log_errors=True)
+    def _read_tail(self, filepath: Path, size: Optional[int] = None) -> str:
+        """Read the last TAIL_SIZE bytes of a file, or '' if the head buffer covers it.
         
-        return 'Unknown'
+        A known ``size`` within HEAD_SIZE returns '' without opening the file.
+        """
+        if size is not None and size <= self.HEAD_SIZE:
+            return ''
+        with open(filepath, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size <= self.HEAD_SIZE:
+                return ''
+            f.seek(max(self.HEAD_SIZE, size - self.TAIL_SIZE))
+            return f.read().decode('utf-8', errors='ignore')
     
-    @handle_file_errors(default_return='Unknown', log_errors=True)
-    def _detect_from_shebang(self, filepath: Path) -> str:
-        """Detect language from shebang line."""
-        with self._safe_open_file(filepath) as f:
-            first_line = f.readline().strip()
-            if first_line.startswith('#!'):
-                for pattern, language in self.language_defs.SHEBANG_PATTERNS.items():
-                    if pattern in first_line.lower():
-                        return language
-        return 'Unknown'
+    def _directory_extension_counts(self, directory: Path) -> Dict[str, int]:
+        """Return (cached) counts of lowercased regular-file extensions in ``directory``.
+        
+        A scan primes this with the files that survive its ignore checks.
+        """
+        counts = self._dir_extension_counts.get(directory)
+        if counts is None:
+            counts = defaultdict(int)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            counts[os.path.splitext(entry.name)[1].lower()] += 1
+            except OSError:
+                pass
+            self._dir_extension_counts[directory] = counts
+        return counts
     
-    @handle_file_errors(default_return=None, log_errors=True)
-    def _resolve_conflict(self, filepath: Path, ext: str) -> str:
-        """Resolve conflicted file extensions using content analysis."""
-        with self._safe_open_file(filepath) as f:
-            content = f.read(1000)  # Read first 1KB for analysis
-            
-            if ext == '.h':
-                # C++ indicators
-                if any(keyword in content for keyword in ['class ', 'template<', 'namespace ', 'std::', 'cout', 'cin']):
-                    return 'C++'
-                # Objective-C indicators
-                elif any(keyword in content for keyword in ['@interface', '@implementation', '@property', 'NSString']):
-                    return 'Objective-C'
-                else:
-                    return 'C'  # Default fallback
-            
-            elif ext == '.m':
-                # MATLAB indicators
-                if any(keyword in content for keyword in ['function ', 'end\n', 'fprintf', 'disp(']):
-                    return 'MATLAB'
-                # Objective-C indicators
-                elif any(keyword in content for keyword in ['@interface', '@implementation', '@property', '#import']):
-                    return 'Objective-C'
-                else:
-                    return self.language_defs.EXTENSION_DEFAULTS[ext]
-            
-            elif ext == '.r':
-                # R indicators
-                if any(keyword in content for keyword in ['library(', 'data.frame', '<-', 'ggplot']):
-                    return 'R'
-                else:
-                    return 'Rebol'
+    def _conflict_prior_votes(self, directory: Path, ext: str) -> Dict[str, int]:
+        """Count sibling files voting for each candidate of a conflicted extension.
+        
+        Falls back to the parent directory when the file's own directory has
+        no voting siblings (e.g. a lone ``include/`` next to ``src/``).
+        """
+        priors = self.language_defs.CONFLICT_PRIORS.get(ext, {})
+        for candidate_dir in (directory, directory.parent):
+            counts = self._directory_extension_counts(candidate_dir)
+            votes = {}
+            for language, sibling_exts in priors.items():
+                count = sum(counts.get(sibling, 0) for sibling in sibling_exts)
+                if count:
+                    votes[language] = count
+            if votes:
+                return votes
+        return {}
+    
+    def _resolve_conflict(self, filepath: Path, ext: str, head: Optional[str] = None) -> str:
+        """Resolve conflicted file extensions from directory priors and content scoring.
+        
+        When sibling files vote for a single candidate the file is not read at
+        all. Otherwise keyword hits in the head buffer are scored, with one
+        bonus point per candidate that has sibling votes; without any evidence
+        the extension default applies.
+        """
+        votes = self._conflict_prior_votes(filepath.parent, ext)
+        if len(votes) == 1:
+            language, source = next(iter(votes)), 'prior'
+        else:
+            if head is None:
+                head = self._read_head(filepath)
+            scorer = self.language_defs.CONFLICT_SCORERS.get(ext)
+            scores = scorer.score(head) if scorer else {}
+            for candidate in votes:
+                scores[candidate] = scores.get(candidate, 0) + 1
+            best = max(scores.values(), default=0)
+            if best > 0:
+                language = next(lang for lang, score in scores.items() if score == best)
+                source = 'content'
+            else:
+                candidates = list(dict.fromkeys(
+                    [self.language_defs.EXTENSION_DEFAULTS.get(ext, 'Unknown')]
+                    + list(self.language_defs.CONFLICT_KEYWORDS.get(ext, {}))
+                    + list(self.language_defs.CONFLICT_PRIORS.get(ext, {}))))
+                language = self._classify_content(filepath, head, candidates)
+                source = 'classifier'
+                if language == 'Unknown':
+                    language = self.language_defs.EXTENSION_DEFAULTS.get(ext, 'Unknown')
+                    source = 'default'
+        
+        self.conflict_decisions[(ext, language, source)] += 1
+        return language
+    
+    def _find_linguist(self) -> Optional[str]:
+        """Locate the Linguist executable (explicit --linguist-path first)."""
+        if self.linguist_cmd:
+            return self.linguist_cmd
+        for name in ('github-linguist', 'linguist'):
+            found = shutil.which(name)
+            if found:
+                return found
+        return None
+    
+    def _tree_fingerprint(self, directory: Path, linguist: str) -> Optional[str]:
+        """Fingerprint the tree state (git HEAD, working-tree status and dirty files).
+        
+        Modified and untracked paths also contribute their size and mtime, so
+        editing an already-dirty file again changes the fingerprint. Returns
+        None when the state cannot be determined, which disables caching for
+        that run.
+        """
+        git = shutil.which('git')
+        if not git or not self.is_git_repository(directory):
+            return None
+        try:
+            top_level, head = subprocess.run([git, 'rev-parse', '--show-toplevel', 'HEAD'], cwd=str(directory),
+                                             capture_output=True, timeout=30, check=True).stdout.splitlines()
+            status = subprocess.run([git, 'status', '--porcelain', '-z', '--untracked-files=all'],
+                                    cwd=str(directory), capture_output=True, timeout=60, check=True).stdout
+        except (OSError, subprocess.SubprocessError, ValueError):
+            return None
+        digest = hashlib.sha256()
+        for part in (linguist.encode(), str(directory).encode(), head, status):
+            digest.update(part)
+            digest.update(b'\0')
+        # Porcelain paths are relative to the work-tree root; a rename or copy
+        # entry is followed by its source path, which is not stat'ed
+        root = Path(os.fsdecode(top_level))
+        entries = iter(status.split(b'\0'))
+        for entry in entries:
+            if len(entry) < 4:
+                continue
+            if entry[:1] in (b'R', b'C'):
+                next(entries, None)
+            try:
+                stat = (root / os.fsdecode(entry[3:])).stat()
+                digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+            except OSError:
+                digest.update(b'-')
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def attribute_language(self, name: str) -> str:
+        """Map a ``linguist-language`` value to the language name used here."""
+        name = self.language_defs.LINGUIST_ALIASES.get(name, name)
+        if name not in self.language_defs.LANGUAGE_EXTENSIONS:
+            for known in self.language_defs.LANGUAGE_EXTENSIONS:
+                if known.lower() == name.lower():
+                    return known
+        return name
+    
+    def _parse_linguist_breakdown(self, breakdown: Dict[str, Any]) -> Dict[str, str]:
+        """Turn ``--breakdown --json`` output into a relative path -> language map."""
+        aliases = self.language_defs.LINGUIST_ALIASES
+        mapping = {}
+        for language, details in breakdown.items():
+            if not isinstance(details, dict):
+                continue
+            for relative in details.get('files', []):
+                if isinstance(relative, str):
+                    mapping[relative] = aliases.get(language, language)
+        return mapping
+    
+    def load_linguist_languages(self, directory: Path) -> Dict[str, str]:
+        """Classify a whole tree with one batched Linguist run.
+        
+        Returns an absolute path -> language map. Results are cached in memory
+        and under ``get_cache_dir()/linguist`` keyed by the tree fingerprint,
+        so unchanged trees never re-run Linguist. Returns an empty map (built-in
+        detection only) if Linguist is unavailable or fails.
+        """
+        linguist = self._find_linguist()
+        if not linguist:
+            self.logger.warning("github-linguist not found; falling back to built-in detection")
+            return {}
+        
+        fingerprint = self._tree_fingerprint(directory, linguist)
+        cache_file = get_cache_dir() / 'linguist' / f"{fingerprint}.json" if fingerprint else None
+        relative_map = self._linguist_memory_cache.get(fingerprint) if fingerprint else None
+        
+        if relative_map is None and cache_file is not None and cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    relative_map = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable Linguist cache {cache_file}: {e}")
+        
+        if relative_map is None:
+            with self.linguist_lock:
+                try:
+                    completed = subprocess.run(
+                        [linguist, str(directory), '--breakdown', '--json'],
+                        cwd=str(directory), capture_output=True, text=True,
+                        timeout=self.LINGUIST_TIMEOUT, check=False
+                    )
+                except (OSError, subprocess.SubprocessError) as e:
+                    self.logger.warning(f"Failed to run Linguist: {e}")
+                    return {}
+            if completed.returncode != 0:
+                self.logger.warning(f"Linguist exited with status {completed.returncode}: "
+                                    f"{completed.stderr.strip()}")
+                return {}
+            try:
+                relative_map = self._parse_linguist_breakdown(json.loads(completed.stdout))
+            except (ValueError, AttributeError) as e:
+                self.logger.warning(f"Could not parse Linguist output: {e}")
+                return {}
             
-            elif ext == '.pl':
-                # Perl indicators
-                if any(keyword in content for keyword in ['use strict', 'my $', 'print ', '#!/usr/bin/perl']):
-                    return 'Perl'
-                # Prolog indicators
-                elif any(keyword in content for keyword in [':-', '?-', 'append([', 'member(']):
-                    return 'Prolog'
-                else:
-                    return self.language_defs.EXTENSION_DEFAULTS[ext]
+            if cache_file is not None:
+                try:
+                    cache_file.parent.mkdir(parents=True, exist_ok=True)
+                    with open(cache_file, 'w', encoding='utf-8') as f:
+                        json.dump(relative_map, f)
+                except OSError as e:
+                    self.logger.warning(f"Could not write Linguist cache {cache_file}: {e}")
         
-        # Return default if file operation failed
-        return self.language_defs.EXTENSION_DEFAULTS.get(ext, 'Unknown')
+        if fingerprint:
+            cache = self._linguist_memory_cache
+            cache[fingerprint] = relative_map
+            cache.move_to_end(fingerprint)
+            while len(cache) > self.LINGUIST_MEMORY_CACHE_SIZE:
+                cache.popitem(last=False)
+        return {str(directory / relative): language for relative, language in relative_map.items()}
+    
+    def classify_file(self, filepath: Path, size: Optional[int] = None,
+                      attributes: Optional[Dict[str, Any]] = None, generated: Optional[str] = None,
+                      count_unknown: bool = True) -> FileRecord:
+        """Detect a file's language and count its lines in a single call.
+        
+        ``generated`` is the treatment of generated files for this call, one
+        of GENERATED_MODES; it defaults to the counter's mode. Unless they
+        are included as normal source, generated files are recognized before
+        counting: by name without reading the file, then from header markers
+        or minification in the shared head buffer. They are not counted
+        (``skip``) or counted as lines only (``count``).
+        
+        ``attributes`` are the file's ``.gitattributes`` linguist attributes;
+        ``linguist-generated`` and ``linguist-language`` take precedence over
+        any detection and skip content sniffing. Without ``count_unknown``,
+        files of unknown language are returned uncounted, and are not read
+        when detection needs no content.
+        """
+        if size is None:
+            try:
+                size = filepath.stat().st_size
+            except OSError:
+                size = 0
+        mode = generated or self.generated
+        
+        attributes = attributes or {}
+        language = attributes.get('linguist-language')
+        if language:
+            language = self.attribute_language(language)
+        
+        generated = None
+        buffer = None
+        if mode != 'include' and attributes.get('linguist-generated'):
+            generated = 'gitattributes'
+        elif language:
+            pass  # Explicit language: no detection or content sniffing
+        elif mode == 'include':
+            language = self.detect_language(filepath, size=size)
+        else:
+            # Generated names need no read; otherwise the head buffer read for
+            # header/minified sniffing is shared with detection and counting.
+            # Extensionless files that cannot be scripts are detected by name
+            # alone, so the read waits until they turn out to be counted.
+            generated = self.language_defs.GENERATED_RULE_SET.match(filepath.name)
+            if generated is None:
+                head = None
+                if filepath.suffix or self.use_classifier or self._may_be_script(filepath):
+                    buffer = self._read_head_bytes(filepath)
+                    head = buffer.decode('utf-8', errors='ignore')
+                language = self.detect_language(filepath, head, size)
+                if language != 'Unknown' or count_unknown:
+                    if head is None:
+                        buffer = self._read_head_bytes(filepath)
+                        head = buffer.decode('utf-8', errors='ignore')
+                    generated = self.detect_generated_content(head, language)
+        
+        table = self.language_table
+        if generated is not None:
+            total = self._count_physical_lines(filepath) if mode == 'count' else 0
+            return FileRecord(filepath, size, 'Generated', table.intern('Generated'), total,
+                              generated=generated)
+        if language == 'Unknown' and not count_unknown:
+            return FileRecord(filepath, size, language, table.intern(language))
+        
+        total, code, comment = self._count_lines(filepath, language, buffer)
+        return FileRecord(filepath, size, language, table.intern(language), total, code, comment)
+    
+    def detect_generated_content(self, head: str, language: str) -> Optional[str]:
+        """Return the generator kind if the head buffer marks a generated file, else None."""
+        defs = self.language_defs
+        header = '\n'.join(head.split('\n', defs.GENERATED_HEADER_LINES)[:defs.GENERATED_HEADER_LINES])
+        for kind, hits in defs.GENERATED_MARKER_SCORER.score(header).items():
+            if hits:
+                return kind
+        if language in defs.MINIFIABLE_LANGUAGES:
+            if len(head) > defs.MINIFIED_LINE_LENGTH * (head.count('\n') + 1):
+                return 'minified'
+        return None
+    
+    @handle_file_errors(default_return=0, log_errors=True)
+    def _count_physical_lines(self, filepath: Path) -> int:
+        """Count lines without classifying them (lines-only counting for generated files)."""
+        lines = 0
+        last = b'\n'
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.READ_CHUNK_SIZE), b''):
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+        return lines + (last != b'\n')
     
-    @handle_file_errors(default_return=(0, 0, 0), log_errors=True)
     def count_lines_in_file(self, filepath: Path) -> Tuple[int, int, int]:
-        """Count lines in a single file. Returns (total, code, comment) lines."""
-        language = self.detect_language(filepath)
+        """Count lines in a single file. Returns (total, code, comment) lines.
         
-        with self._safe_open_file(filepath) as f:
-            lines = f.readlines()
+        Generated files are counted as normal source; the generated-file
+        mode only decides what a directory scan does with them.
+        """
+        record = self.classify_file(filepath, generated='include')
+        return (record.total, record.code, record.comment)
+    
+    @handle_file_errors(default_return=(0, 0, 0), log_errors=True)
+    def _count_lines(self, filepath: Path, language: str,
+                     head: Optional[bytes] = None) -> Tuple[int, int, int]:
+        """Count (total, code, comment) lines of a file already classified as ``language``.
         
-        total_lines = len(lines)
-        if total_lines == 0:
-            return (0, 0, 0)
+        ``head`` is the raw head buffer if the caller already read it; a file
+        shorter than HEAD_SIZE is then counted from it without being reopened.
+        """
+        whole = head if head is not None and len(head) < self.HEAD_SIZE else None
+        if language == NotebookClassifier.LANGUAGE:
+            classifier = NotebookClassifier(self.language_defs)
+        elif whole is not None:
+            classifier = LineClassifier(language, self.language_defs, detect_buffer_encoding(whole))
+        else:
+            encoding = detect_file_encoding(filepath)
+            if (self.file_jobs > 1 and self.language_defs.embedded_regions(language) is None
+                    and filepath.stat().st_size >= self.PARALLEL_FILE_SIZE):
+                counts = ParallelFileCounter(self.file_jobs, self.language_defs, self.PARALLEL_CHUNK_SIZE,
+                                             self.logger).count(filepath, language, encoding)
+                if counts is not None:
+                    return counts
+            classifier = LineClassifier(language, self.language_defs, encoding)
+        if whole is not None:
+            classifier.feed(whole)
+        else:
+            with open(filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.READ_CHUNK_SIZE), b''):
+                    classifier.feed(chunk)
+        return classifier.finish()[:3]
+    
+    def _load_language_definitions(self, directory: Path) -> LanguageDefinitions:
+        """Return the language tables for a scan of ``directory``.
+        
+        An explicit definitions file always applies; otherwise the root's
+        per-repository file is used, and an invalid one is reported and skipped.
+        """
+        if self.language_definitions:
+            return self.language_defs
+        path = LanguageDefinitions.find_user_definitions(directory)
+        if path == self.language_defs.user_definitions:
+            return self.language_defs
+        if path is None:
+            return LanguageDefinitions()
+        try:
+            return LanguageDefinitions(path)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring language definitions {path}: {e}")
+            return LanguageDefinitions()
+    
+    def vendored_reason(self, dir_path: Path, attributes: Optional[GitAttributes] = None) -> Optional[str]:
+        """Return why a directory is a vendored tree, judged by name and attributes only.
         
-        # Get comment patterns for this language
-        comment_patterns = self.language_defs.COMMENT_PATTERNS.get(language, {
-            'single': [], 'multi_start': [], 'multi_end': []
-        })
+        ``.gitattributes`` takes precedence: an explicit ``-linguist-vendored``
+        (or any rule unsetting it) disables the name heuristic.
+        """
+        if self.vendored == 'include':
+            return None
+        if attributes is not None:
+            if attributes.prunes(dir_path, 'linguist-vendored'):
+                return 'gitattributes'
+            if 'linguist-vendored' in attributes.unset:
+                return None
+        if dir_path.name.lower() in self.language_defs.VENDORED_DIRS:
+            return 'name'
+        return None
+    
+    def is_copied_upstream(self, dir_path: Path, names: List[str]) -> bool:
+        """Check a nested directory listing for a license file plus a foreign package manifest.
         
-        code_lines = 0
-        comment_lines = 0
-        in_multiline_comment = False
+        Members of the root project's workspaces are always first-party.
+        """
+        if not self._root_namespaces or dir_path in self._workspace_dirs:
+            return False
+        lowered = {name.lower(): name for name in names}
+        if not any(name in self.language_defs.LICENSE_FILES for name in lowered):
+            return False
+        for manifest in self.language_defs.PACKAGE_MANIFESTS:
+            if manifest in lowered:
+                package = self._manifest_package_name(dir_path / lowered[manifest])
+                if package:
+                    package = self._normalize_package(package)
+                    return not any(package.startswith(ns) for ns in self._root_namespaces)
+        return False
+    
+    @staticmethod
+    def _normalize_package(package: str) -> str:
+        """Lower-case a package name and drop the ``@`` of an npm scope."""
+        return package.lower().lstrip('@')
+    
+    @classmethod
+    def _package_namespace(cls, package: str) -> str:
+        """Namespace of a package name: npm scope, module path owner, or leading name component."""
+        package = cls._normalize_package(package)
+        if '/' in package:
+            return package.rsplit('/', 1)[0] + '/'
+        return re.split(r'[-_.]', package, 1)[0]
+    
+    @handle_file_errors(default_return=None, log_errors=False)
+    def _read_manifest(self, manifest: Path) -> Optional[Dict[str, Any]]:
+        """Parse a JSON or TOML manifest, or the directives of ``go.mod``/``go.work``."""
+        with open(manifest, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read(64 * 1024)
+        name = manifest.name.lower()
+        if name.endswith('.json'):
+            document = json.loads(text)
+        elif name.endswith('.toml'):
+            document = parse_toml_tables(text)
+        else:
+            text = re.sub(r'//[^\n]*', '', text)
+            module = re.search(r'^module\s+"?([^\s"]+)', text, re.MULTILINE)
+            # 'use ./dir' lines and 'use ( ... )' blocks
+            uses = re.findall(r'^\s*use\s+"?([^\s"()]+)', text, re.MULTILINE)
+            for block in re.findall(r'^\s*use\s*\(([^)]*)\)', text, re.MULTILINE):
+                uses.extend(re.findall(r'"?([^\s"]+)"?', block))
+            document = {'module': module.group(1) if module else None, 'use': uses}
+        return document if isinstance(document, dict) else None
+    
+    def _manifest_package_name(self, manifest: Path) -> Optional[str]:
+        """Read the package name declared by a manifest file.
         
-        for line in lines:
-            stripped = line.strip()
-            
-            # Skip empty lines
-            if not stripped:
+        TOML manifests declare it in ``[package]`` (Cargo), ``[project]``
+        or ``[tool.poetry]`` (pyproject); other tables are not consulted.
+        """
+        document = self._read_manifest(manifest)
+        if document is None:
+            return None
+        name = manifest.name.lower()
+        if name.endswith('.toml'):
+            tool = document.get('tool')
+            tables = [document.get('package'), document.get('project'),
+                      tool.get('poetry') if isinstance(tool, dict) else None]
+            package = next((table.get('name') for table in tables
+                            if isinstance(table, dict) and table.get('name')), None)
+        elif name == 'go.mod':
+            package = document.get('module')
+        else:
+            package = document.get('name')
+        return package if isinstance(package, str) and package else None
+    
+    def _project_namespaces(self, directory: Path) -> Set[str]:
+        """Package namespaces declared by the manifests in the scanned root."""
+        namespaces = set()
+        for manifest in self.language_defs.PACKAGE_MANIFESTS:
+            for candidate in (directory / manifest, directory / manifest.replace('cargo', 'Cargo')):
+                if candidate.is_file():
+                    package = self._manifest_package_name(candidate)
+                    if package:
+                        namespaces.add(self._package_namespace(package))
+                    break
+        return namespaces
+    
+    def _project_workspaces(self, directory: Path) -> Set[Path]:
+        """Member directories of the root's npm ``workspaces``, Cargo ``[workspace]`` and ``go.work``."""
+        patterns = []
+        package_json = self._read_manifest(directory / 'package.json') if (directory / 'package.json').is_file() else None
+        if package_json:
+            workspaces = package_json.get('workspaces')
+            if isinstance(workspaces, dict):
+                workspaces = workspaces.get('packages')
+            if isinstance(workspaces, list):
+                patterns.extend(workspaces)
+        cargo_toml = self._read_manifest(directory / 'Cargo.toml') if (directory / 'Cargo.toml').is_file() else None
+        if cargo_toml and isinstance(cargo_toml.get('workspace'), dict):
+            members = cargo_toml['workspace'].get('members')
+            if isinstance(members, list):
+                patterns.extend(members)
+        go_work = self._read_manifest(directory / 'go.work') if (directory / 'go.work').is_file() else None
+        if go_work:
+            patterns.extend(go_work['use'])
+        
+        members = set()
+        for pattern in patterns:
+            if not isinstance(pattern, str) or pattern.startswith('!'):
+                continue  # npm exclusions only narrow the set
+            pattern = pattern.strip().rstrip('/')
+            while pattern.startswith('./'):
+                pattern = pattern[2:]
+            if not pattern or pattern == '.':
                 continue
-            
-            is_comment = False
-            
-            # Handle multiline comments with proper state management
-            # For Python: """ and ''' can both start and end multiline comments
-            line_after_processing = stripped
-            
-            # Process multiline comment markers in the line
-            for start_pattern in comment_patterns['multi_start']:
-                if start_pattern in line_after_processing:
-                    # Count occurrences of the pattern
-                    pattern_count = line_after_processing.count(start_pattern)
-                    
-                    if in_multiline_comment:
-                        # We're in a multiline comment, look for end
-                        if pattern_count % 2 == 1:
-                            # Odd number of patterns - ends the multiline comment
-                            in_multiline_comment = False
-                        # Even number (including 0) - stays in multiline comment
-                        is_comment = True
-                    else:
-                        # We're not in a multiline comment, look for start
-                        if pattern_count % 2 == 1:
-                            # Odd number of patterns - starts a multiline comment
-                            in_multiline_comment = True
-                        is_comment = True
-                    break  # Only process the first matching pattern
-            
-            # If not handled by multiline logic, check for single-line comments
-            if not is_comment and not in_multiline_comment:
-                for comment_prefix in comment_patterns['single']:
-                    if stripped.startswith(comment_prefix):
-                        is_comment = True
-                        break
-            
-            # If we're in a multiline comment and no end was found, it's a comment
-            if in_multiline_comment and not is_comment:
-                is_comment = True
-            
-            if is_comment:
-                comment_lines += 1
-            else:
-                code_lines += 1
+            try:
+                members.update(path for path in directory.glob(pattern) if path.is_dir())
+            except (ValueError, NotImplementedError, OSError):
+                continue  # Absolute or malformed patterns
+        return members
+    
+    def count_vendored_file(self, filepath: Path, vendored_id: int) -> Optional[FileRecord]:
+        """Cheap lines-only record for a file inside a vendored tree, or None.
         
-        return (total_lines, code_lines, comment_lines)
+        Only files recognizable by name or extension are kept (no content
+        reads for detection), and their lines are not classified. The walk
+        applies the same ignore rules and depth limit as to first-party files.
+        """
+        defs = self.language_defs
+        name = filepath.name
+        if (defs.FILENAME_RULE_SET.match(name) is None
+                and defs.DETECTION_INDEX.lookup(name, os.path.splitext(name)[1].lower()) is None):
+            return None
+        try:
+            size = filepath.stat().st_size
+        except OSError:
+            return None
+        return FileRecord(filepath, size, 'Vendored', vendored_id, self._count_physical_lines(filepath))
     
     def should_ignore_directory(self, dir_path: Path) -> bool:
         """Check if a directory should be ignored."""
@@ -1044,78 +4691,22 @@ class LineCounter:
                     patterns.append(line)
         return patterns
     
-    def is_gitignored(self, file_path: Path, git_patterns: List[str]) -> bool:
-        """Check if a file matches any gitignore pattern.
+    def is_gitignored(self, file_path: Path, git_patterns) -> bool:
+        """Check if a file matches the gitignore patterns.
 
-        Uses normalized path matching consistent with .nxlcignore implementation.
+        ``git_patterns`` is a pattern list or a compiled ``IgnoreMatcher``.
+        Later patterns override earlier ones, and ``!`` patterns re-include.
         """
-        # Normalize path to forward slashes for cross-platform consistency
-        path_str = str(file_path).replace('\\', '/')
-
-        for pattern in git_patterns:
-            # Normalize pattern for cross-platform compatibility
-            pattern = pattern.replace('\\', '/')
-
-            # Reuse existing pattern matching logic
-            if self._matches_single_pattern(file_path, path_str, pattern):
-                return True
-        return False
+        return IgnoreMatcher.compile(git_patterns).matches(file_path)
     
-    def is_nxlcignored(self, file_path: Path, nxlc_patterns: List[str]) -> bool:
+    def is_nxlcignored(self, file_path: Path, nxlc_patterns) -> bool:
         """Check if a file or directory matches any nxlcignore pattern.
         
         Supports negation patterns (!) to re-include previously excluded files.
         Patterns are evaluated in order, with later patterns overriding earlier ones.
+        ``nxlc_patterns`` is a pattern list or a compiled ``IgnoreMatcher``.
         """
-        path_str = str(file_path).replace('\\', '/')  # Normalize for cross-platform
-        is_ignored = False
-        
-        for pattern in nxlc_patterns:
-            # Normalize pattern for cross-platform
-            pattern = pattern.replace('\\', '/')
-            
-            # Handle negation patterns
-            if pattern.startswith('!'):
-                # Remove the ! and check if the remaining pattern matches
-                negated_pattern = pattern[1:]
-                if self._matches_single_pattern(file_path, path_str, negated_pattern):
-                    is_ignored = False  # Re-include the file
-            else:
-                # Regular pattern - check if it matches
-                if self._matches_single_pattern(file_path, path_str, pattern):
-                    is_ignored = True  # Exclude the file
-        
-        return is_ignored
-    
-    def _matches_single_pattern(self, file_path: Path, path_str: str, pattern: str) -> bool:
-        """Check if a path matches a single pattern."""
-        # Handle ** patterns (match anywhere in path)
-        if '**/' in pattern:
-            # Pattern like **/test_data/ should match test_data anywhere
-            if pattern.startswith('**/') and pattern.endswith('/'):
-                # Directory pattern: **/dirname/
-                dir_name = pattern[3:-1]
-                # Check if this directory name appears anywhere in the path
-                for part in file_path.parts:
-                    if fnmatch.fnmatch(part, dir_name):
-                        return True
-            elif pattern.startswith('**/'):
-                # File pattern: **/pattern
-                file_pattern = pattern[3:]
-                # Check if filename matches
-                if fnmatch.fnmatch(file_path.name, file_pattern):
-                    return True
-        # Handle directory patterns (ending with /)
-        elif pattern.endswith('/'):
-            dir_pattern = pattern.rstrip('/')
-            # Check if this path is within the ignored directory
-            for part in file_path.parts:
-                if fnmatch.fnmatch(part, dir_pattern):
-                    return True
-        # Standard patterns
-        elif fnmatch.fnmatch(path_str, pattern) or fnmatch.fnmatch(file_path.name, pattern):
-            return True
-        return False
+        return IgnoreMatcher.compile(nxlc_patterns).matches(file_path)
     
     def analyze_directory(self, directory: Path, use_git: bool = False, no_git: bool = False,
                          max_depth: int = None, verbose: bool = False, debug: bool = False,
@@ -1132,46 +4723,82 @@ class LineCounter:
         """
         
         results = {
-            'languages': defaultdict(lambda: {'files': 0, 'total_lines': 0, 'code_lines': 0, 'comment_lines': 0}),
-            'total_files': 0,
-            'total_lines': 0,
-            'total_code_lines': 0,
-            'total_comment_lines': 0,
             'directory': str(directory),
             'unknown_files': [] if debug else None,
-            'unknown_extensions': defaultdict(int) if debug else None
+            'unknown_extensions': defaultdict(int) if debug else None,
+            'generated_mode': self.generated,
+            'generated_files': 0,
+            'using_gitattributes': False,
+            'attribute_pruned_paths': 0,
+            'vendored_mode': self.vendored,
+            'vendored_dirs': 0,
         }
         
         # Auto-detect git repository and enable git mode by default
         is_git_repo = self.is_git_repository(directory)
         should_use_git = use_git or (is_git_repo and not no_git)  # Auto-enable git mode in git repos unless disabled
         
-        git_patterns = []
+        # Global and repository excludes; .gitignore files are merged in during the walk
+        git_ignore = None
         if should_use_git:
-            gitignore_path = directory / '.gitignore'
-            if gitignore_path.exists():
-                git_patterns = self.process_gitignore(gitignore_path)
+            git_ignore = GitIgnore.for_repository(directory) if is_git_repo else GitIgnore()
         
         # Initialize hierarchical ignore context
         pattern_adapter = LineCounterPatternAdapter(self)
         context_factory = IgnoreContextFactory(
             pattern_matcher=pattern_adapter,
-            cache_strategy_factory=lambda: LRUCacheStrategy(1000),
             case_insensitive=platform.system() == 'Windows'
         )
         ignore_context = context_factory.create_context(directory)
         if verbose and ignore_context:
             self.logger.info("Processing .nxlcignore files hierarchically")
         
+        # User-defined languages (explicit file or per-repository file)
+        self.language_defs = self._load_language_definitions(directory)
+        if self.language_defs.user_definitions is not None:
+            results['language_definitions'] = str(self.language_defs.user_definitions)
+        
+        # Aggregate by interned language ID; the per-language dicts are only
+        # built once the walk is done
+        language_table = self.language_table = self.language_defs.language_table()
+        counters = LanguageCounters(len(language_table.names))
+        vendored_id = language_table.intern('Vendored')
+        
+        # Comprehensive mode: classify the whole tree with one Linguist run
+        self.linguist_languages = self.load_linguist_languages(directory) if self.use_comprehensive else {}
+        
         # Store git info in results for display
         results['is_git_repo'] = is_git_repo
+        results['using_linguist'] = bool(self.linguist_languages)
         results['using_git'] = should_use_git
         results['using_nxlcignore'] = ignore_context is not None
         
         # Track visited directories to prevent infinite recursion with symlinks
         visited_dirs = set()
+        self.file_line_counts = {}
+        self._dir_extension_counts = {}
+        self.conflict_decisions = defaultdict(int)
+        self._root_namespaces = self._project_namespaces(directory) if self.vendored != 'include' else set()
+        self._workspace_dirs = self._project_workspaces(directory) if self._root_namespaces else set()
         
-        def analyze_recursively(current_dir: Path, current_depth: int = 0, current_ignore_context=None):
+        def add_record(relative_path: Path, record: FileRecord):
+            """Aggregate one counted file into the results."""
+            self.file_line_counts[str(relative_path)] = record
+            counters.add(record.language_id, record.total, record.code, record.comment)
+            
+            if verbose:
+                print(f"  {relative_path}: {record.language} ({record.total} lines)")
+        
+        def handle_vendored(dir_path: Path, reason: str) -> bool:
+            """Record a vendored tree; True if it is still walked to count it lines-only."""
+            results['vendored_dirs'] += 1
+            if verbose:
+                print(f"  {dir_path.relative_to(directory)}/: vendored ({reason})")
+            return self.vendored == 'count'
+        
+        def analyze_recursively(current_dir: Path, current_depth: int = 0, current_ignore_context=None,
+                                current_attributes_context=None, current_attributes=None,
+                                current_git_ignore=None, current_ignore_state=None, vendored_tree=False):
             if max_depth is not None and current_depth > max_depth:
                 return
             
@@ -1188,7 +4815,7 @@ class LineCounter:
             visited_dirs.add(resolved_dir)
             
             # Update ignore context for hierarchical support
-            context = current_ignore_context
+            context, new_context = current_ignore_context, None
             if context_factory:
                 if current_dir != directory:  # Not root
                     new_context = context_factory.create_context(current_dir, current_ignore_context)
@@ -1199,8 +4826,49 @@ class LineCounter:
                 elif context is None:
                     context = ignore_context
             
+            # What the .nxlcignore files decide for this directory's entries,
+            # carried down from the parent directory's verdict
+            if current_ignore_state is None:
+                ignore_state = DirectoryIgnoreState.for_context(current_dir, context)
+            else:
+                ignore_state = current_ignore_state.descend(current_dir, new_context)
+            if ignore_state.ignored:
+                if debug:
+                    self.logger.debug(f"Ignored everything in {current_dir.relative_to(directory)} "
+                                      f"by {ignore_state.levels[0][0].directory}/.nxlcignore")
+                return
+            
+            # Exclude rules of .gitignore files, merged down the tree
+            git_ignore = current_git_ignore
+            if git_ignore is not None and (current_dir / '.gitignore').is_file():
+                git_ignore = GitIgnore.merge(git_ignore, GitIgnore.parse(current_dir / '.gitignore'))
+            
+            # Linguist attributes from .gitattributes, merged down the tree
+            attributes_context, attributes = current_attributes_context, current_attributes
+            if should_use_git and (current_dir / '.gitattributes').is_file():
+                attributes_context = HierarchicalConfigContext(
+                    current_dir, '.gitattributes', GitAttributes.parse, GitAttributes.merge,
+                    parent=current_attributes_context)
+                attributes = attributes_context.get_effective_config()
+                results['using_gitattributes'] = True
+            
             try:
-                for item in current_dir.iterdir():
+                items = list(current_dir.iterdir())
+                
+                # Copied upstream trees (nested license + foreign manifest) are
+                # recognized from the listing alone, before any file is read
+                if current_dir != directory and self.vendored != 'include' and not vendored_tree:
+                    if self.is_copied_upstream(current_dir, [item.name for item in items]):
+                        if not handle_vendored(current_dir, 'manifest'):
+                            return
+                        vendored_tree = True
+                
+                # Entries that survive the symlink and ignore checks, in
+                # listing order; their regular files prime the priors for
+                # conflicted extensions in this directory
+                entries = []
+                sibling_exts = defaultdict(int)
+                for item in items:
                     # Skip symlinks unless explicitly opted in via --follow-symlinks.
                     # Default-off matches `find`, `git`, `du`, `tar` defaults and
                     # prevents vendored / shared-infra trees mounted via symlink
@@ -1224,75 +4892,100 @@ class LineCounter:
                             )
                         continue
 
-                    # Check if item should be ignored using hierarchical context
-                    if context:
-                        # Use hierarchical context with debug support
-                        if hasattr(context, 'should_ignore_with_context') and debug:
-                            is_ignored, ignoring_context = context.should_ignore_with_context(item)
-                            if is_ignored and ignoring_context:
+                    # Only directories whose verdict is not shared by all
+                    # entries check them against the remaining patterns
+                    if ignore_state.ignored is None:
+                        ignoring_context = ignore_state.ignoring_context(item.name)
+                        if ignoring_context is not None:
+                            if debug:
                                 relative_item = item.relative_to(directory)
                                 self.logger.debug(f"Ignored {relative_item} by {ignoring_context.directory}/.nxlcignore")
-                                continue
-                        elif context.should_ignore(item):
                             continue
                     
                     if item.is_dir():
-                        if not self.should_ignore_directory(item):
-                            relative_path = item.relative_to(directory)
-                            if not (should_use_git and self.is_gitignored(relative_path, git_patterns)):
-                                analyze_recursively(item, current_depth + 1, context)
+                        # Ignored directories are pruned before they are listed
+                        if not self.should_ignore_directory(item) and not (
+                                git_ignore is not None and git_ignore.ignored(item, is_dir=True)):
+                            entries.append((item, True))
                     elif item.is_file():
-                        if not self.should_ignore_file(item):
-                            relative_path = item.relative_to(directory)
-                            if not (should_use_git and self.is_gitignored(relative_path, git_patterns)):
-                                total, code, comment = self.count_lines_in_file(item)
-                                if total > 0:
-                                    language = self.detect_language(item)
-                                    
-                                    # Handle unknown files based on debug mode
-                                    if language == 'Unknown':
-                                        if debug:
-                                            # In debug mode, include unknown files
-                                            results['unknown_files'].append(str(item.relative_to(directory)))
-                                            ext = item.suffix if item.suffix else '<no_extension>'
-                                            results['unknown_extensions'][ext] += 1
-                                            
-                                            # Update language stats for debug mode
-                                            results['languages'][language]['files'] += 1
-                                            results['languages'][language]['total_lines'] += total
-                                            results['languages'][language]['code_lines'] += code
-                                            results['languages'][language]['comment_lines'] += comment
-                                            
-                                            # Update overall stats
-                                            results['total_files'] += 1
-                                            results['total_lines'] += total
-                                            results['total_code_lines'] += code
-                                            results['total_comment_lines'] += comment
-                                        else:
-                                            # In normal mode, skip unknown files (don't count them)
-                                            continue
-                                    else:
-                                        # Known language - always include
-                                        results['languages'][language]['files'] += 1
-                                        results['languages'][language]['total_lines'] += total
-                                        results['languages'][language]['code_lines'] += code
-                                        results['languages'][language]['comment_lines'] += comment
-                                        
-                                        # Update overall stats
-                                        results['total_files'] += 1
-                                        results['total_lines'] += total
-                                        results['total_code_lines'] += code
-                                        results['total_comment_lines'] += comment
-                                    
-                                    if verbose:
-                                        print(f"  {item.relative_to(directory)}: {language} ({total} lines)")
+                        if not self.should_ignore_file(item) and not (
+                                git_ignore is not None and git_ignore.ignored(item)):
+                            entries.append((item, False))
+                            sibling_exts[item.suffix.lower()] += 1
+                self._dir_extension_counts[current_dir] = sibling_exts
+                
+                for item, is_dir in entries:
+                    relative_path = item.relative_to(directory)
+                    if is_dir:
+                        if (attributes is not None and self.generated == 'skip'
+                                and attributes.prunes(item, 'linguist-generated')):
+                            results['attribute_pruned_paths'] += 1
+                            if verbose:
+                                print(f"  {relative_path}/: pruned by .gitattributes")
+                            continue
+                        item_vendored = vendored_tree
+                        reason = None if vendored_tree else self.vendored_reason(item, attributes)
+                        if reason is not None:
+                            if reason == 'gitattributes':
+                                results['attribute_pruned_paths'] += 1
+                            if not handle_vendored(item, reason):
+                                continue
+                            item_vendored = True
+                        analyze_recursively(item, current_depth + 1, context, attributes_context,
+                                            attributes, git_ignore, ignore_state, item_vendored)
+                    else:
+                        if vendored_tree:
+                            record = self.count_vendored_file(item, vendored_id)
+                            if record is not None and record.total:
+                                add_record(relative_path, record)
+                            continue
+                        file_attributes = attributes.lookup(item) if attributes is not None else None
+                        if (file_attributes and file_attributes.get('linguist-vendored')
+                                and self.vendored != 'include'):
+                            results['attribute_pruned_paths'] += 1
+                            if self.vendored == 'count':
+                                total = self._count_physical_lines(item)
+                                if total:
+                                    add_record(relative_path, FileRecord(item, 0, 'Vendored', vendored_id, total))
+                            elif verbose:
+                                print(f"  {relative_path}: vendored (.gitattributes), skipped")
+                            continue
+                        record = self.classify_file(item, attributes=file_attributes,
+                                                    count_unknown=debug)
+                        if record.generated is not None:
+                            results['generated_files'] += 1
+                            if self.generated == 'skip':
+                                if verbose:
+                                    print(f"  {relative_path}: generated ({record.generated}), skipped")
+                                continue
+                        if record.total == 0:
+                            continue
+                        
+                        # Handle unknown files based on debug mode
+                        if record.language == 'Unknown':
+                            if not debug:
+                                # In normal mode, skip unknown files (don't count them)
+                                continue
+                            # In debug mode, include unknown files
+                            results['unknown_files'].append(str(relative_path))
+                            ext = item.suffix if item.suffix else '<no_extension>'
+                            results['unknown_extensions'][ext] += 1
+                        
+                        add_record(relative_path, record)
             
             except (OSError, PermissionError) as e:
                 if verbose:
                     print(f"Warning: Cannot access {current_dir}: {e}")
                 self.logger.warning(f"Cannot access directory {current_dir}: {e}")
         
-        analyze_recursively(directory, 0, ignore_context)
+        analyze_recursively(directory, 0, ignore_context, current_git_ignore=git_ignore)
+        
+        results['languages'] = counters.to_dict(language_table.names)
+        (results['total_files'], results['total_lines'],
+         results['total_code_lines'], results['total_comment_lines']) = counters.totals()
+        if debug:
+            results['conflict_decisions'] = dict(self.conflict_decisions)
+        self._dir_extension_counts = {}
         return results
 
 
@@ -1397,6 +5090,21 @@ def format_results(results: Dict[str, Any], colors: Colors, sort_by: str = 'line
     if results.get('using_nxlcignore'):
         status_parts.append("respecting .nxlcignore")
     
+    if results.get('using_linguist'):
+        status_parts.append("GitHub Linguist")
+    
+    if results.get('using_gitattributes'):
+        status_parts.append("respecting .gitattributes")
+    
+    if results.get('vendored_dirs') and results.get('vendored_mode') == 'skip':
+        status_parts.append(f"{results['vendored_dirs']} vendored directories skipped")
+    
+    if results.get('generated_files') and results.get('generated_mode') == 'skip':
+        status_parts.append(f"{results['generated_files']} generated files skipped")
+    
+    if results.get('language_definitions'):
+        status_parts.append(f"languages from {Path(results['language_definitions']).name}")
+    
     status_text = ""
     if status_parts:
         status_text = f" {colors.LANGUAGE}({', '.join(status_parts)}){colors.RESET}"
@@ -1415,6 +5123,13 @@ def format_results(results: Dict[str, Any], colors: Colors, sort_by: str = 'line
             for ext, count in sorted(results['unknown_extensions'].items(), key=lambda x: x[1], reverse=True):
                 output.append(f"  {ext}: {count} files")
         
+        # Show how conflicted extensions were resolved
+        if results.get('conflict_decisions'):
+            output.append("Conflicted extension decisions:")
+            for (ext, language, source), count in sorted(results['conflict_decisions'].items(),
+                                                         key=lambda x: (x[0][0], -x[1])):
+                output.append(f"  {ext} -> {language} ({source}): {count} files")
+        
         # Show some example unknown files
         if results['unknown_files']:
             output.append(f"\nExample unknown files (showing first 10):")
@@ -1462,6 +5177,21 @@ Note: .gitignore is automatically respected in git repositories. Use --no-git to
                        help='Use comprehensive mode with GitHub Linguist (400+ languages)')
     parser.add_argument('--linguist-path', metavar='PATH',
                        help='Path to github-linguist executable')
+    parser.add_argument('--languages', metavar='FILE',
+                       help='TOML/JSON file of additional language definitions '
+                            '(default: .nxlc-languages.toml/.json in DIRECTORY)')
+    parser.add_argument('--generated', choices=LineCounter.GENERATED_MODES, default='skip',
+                       help='Generated files (lockfiles, protobuf/thrift output, "DO NOT EDIT" headers, '
+                            'minified bundles): skip (default), count lines only as "Generated", '
+                            'or include as normal source')
+    parser.add_argument('--vendored', choices=LineCounter.VENDORED_MODES, default='skip',
+                       help='Vendored trees (vendor/, third_party/, Pods/, copied upstream packages, '
+                            'linguist-vendored): skip (default), count lines only as "Vendored", '
+                            'or include as normal source')
+    parser.add_argument('--file-jobs', type=int, default=1, metavar='N',
+                       help='Count files of 32 MiB or more in chunks on N worker processes (default: 1, serial)')
+    parser.add_argument('--classify', action='store_true',
+                       help='Guess extensionless and otherwise unknown files with the built-in statistical classifier')
     parser.add_argument('--no-color', action='store_true',
                        help='Disable colored output')
     parser.add_argument('--debug', action='store_true',
@@ -1507,7 +5237,12 @@ Note: .gitignore is automatically respected in git repositories. Use --no-git to
             use_comprehensive=args.comprehensive,
             linguist_cmd=args.linguist_path,
             logger=logging.getLogger(__name__),
-            colors=colors
+            colors=colors,
+            use_classifier=args.classify,
+            language_definitions=Path(args.languages) if args.languages else None,
+            generated=args.generated,
+            vendored=args.vendored,
+            file_jobs=args.file_jobs
         )
         
         # Analyze directory
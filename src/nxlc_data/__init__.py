@@ -0,0 +1 @@
+"""Data files shipped with NXLC (statistical classifier model)."""
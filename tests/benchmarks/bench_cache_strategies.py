@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the ignore-context cache strategies.
+
+Runs ``IgnoreContext.should_ignore`` over synthetic workloads with each of
+``IgnoreContextFactory.CACHE_STRATEGIES`` and reports the time per query
+with the hit rate and evictions the cache counted. The same key stream is
+also replayed on a bare cache (``get``, then ``set`` on a miss) to show
+the cost of the strategy alone:
+
+- ``walk``: every path asked about once, as in a tree walk (all misses).
+- ``repeat``: a skewed stream of queries over twice as many paths as the
+  cache holds, as from a long-running tool asking about the same files.
+- ``threads``: the ``repeat`` stream split across threads, for the
+  strategies that allow concurrent use.
+
+Usage:
+    python3 tests/benchmarks/bench_cache_strategies.py [--queries N] [--cache-size N] [--threads N]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+PATTERNS = ['*.log', '*.tmp', 'build/', '**/cache/', 'docs/*', '!docs/api/*.md', 'src/gen/*.py']
+
+# Strategies that may be shared between threads
+CONCURRENT = ('lru', 'bounded-dict', 'sharded')
+
+
+def build_paths(root: Path, count: int, rnd: random.Random):
+    """Paths below ``root`` in a synthetic tree, some of them ignored."""
+    paths = []
+    for i in range(count):
+        parts = [rnd.choice(['src', 'src/gen', 'docs', 'docs/api', 'lib', 'build', 'tests/cache'])]
+        parts.append(f'module{rnd.randint(0, 49)}')
+        parts.append(rnd.choice([f'file_{i}.py', f'notes_{i}.md', f'run_{i}.log', f'scratch_{i}.tmp']))
+        paths.append(root.joinpath(*parts))
+    return paths
+
+
+def run(context: nxlc.IgnoreContext, queries, threads: int = 1) -> float:
+    """Seconds to answer ``queries``, split across ``threads``."""
+    def worker(chunk):
+        for path in chunk:
+            context.should_ignore(path)
+
+    start = time.perf_counter()
+    if threads == 1:
+        worker(queries)
+    else:
+        workers = [threading.Thread(target=worker, args=(queries[i::threads],)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    return time.perf_counter() - start
+
+
+def replay(cache: nxlc.CacheStrategy, keys, threads: int = 1) -> float:
+    """Seconds to look up ``keys`` in ``cache``, storing misses, split across ``threads``."""
+    def worker(chunk):
+        for key in chunk:
+            if cache.get(key) is None:
+                cache.set(key, True)
+
+    start = time.perf_counter()
+    if threads == 1:
+        worker(keys)
+    else:
+        workers = [threading.Thread(target=worker, args=(keys[i::threads],)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Ignore cache strategy benchmark')
+    parser.add_argument('--queries', type=int, default=200000, help='Queries per workload')
+    parser.add_argument('--cache-size', type=int, default=1000, help='Entries per cache')
+    parser.add_argument('--threads', type=int, default=4, help='Threads for the threaded workload')
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        (root / '.nxlcignore').write_text('\n'.join(PATTERNS) + '\n')
+        adapter = nxlc.LineCounterPatternAdapter(nxlc.LineCounter())
+
+        hot = build_paths(root, args.cache_size * 2, rnd)
+        repeat = rnd.choices(hot, weights=[1 / (rank + 1) for rank in range(len(hot))], k=args.queries)
+        workloads = [('walk', build_paths(root, args.queries, rnd), 1),
+                     ('repeat', repeat, 1),
+                     ('threads', repeat, args.threads)]
+
+        print(f"{'Workload':>9} {'Strategy':>14} {'us/query':>9} {'Hit rate':>9} {'Evictions':>10} "
+              f"{'Cache only (ns/key)':>20}")
+        failed = False
+        for workload, queries, threads in workloads:
+            expected = None
+            keys = [path.relative_to(root).as_posix() for path in queries]
+            for name in nxlc.IgnoreContextFactory.CACHE_STRATEGIES:
+                if threads > 1 and name not in CONCURRENT:
+                    continue
+                factory = nxlc.IgnoreContextFactory(adapter, cache_strategy=name, cache_size=args.cache_size)
+                context = factory.create_context(root)
+                elapsed = run(context, queries, threads)
+                stats = factory.cache_stats()
+                lookups = stats['hits'] + stats['misses']
+                bare = replay(nxlc.IgnoreContextFactory.CACHE_STRATEGIES[name](args.cache_size), keys, threads)
+                print(f"{workload:>9} {name:>14} {elapsed / len(queries) * 1e6:>9.2f} "
+                      f"{stats['hits'] / max(lookups, 1):>9.1%} {stats['evictions']:>10} "
+                      f"{bare / len(keys) * 1e9:>20.0f}")
+
+                # Every strategy must give the same answers
+                results = [context.should_ignore(path) for path in queries[:2000]]
+                if expected is None:
+                    expected = results
+                failed |= results != expected
+
+    if failed:
+        print("\nCache strategies disagree")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for extension-based language detection.
+
+Compares the precompiled DetectionIndex lookup against the previous linear
+scan over LANGUAGE_EXTENSIONS (which lowercased every extension list on every
+call).
+
+Usage:
+    python3 tests/benchmarks/bench_detection.py [--iterations N]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+
+def linear_scan(ext: str) -> str:
+    """Reference implementation of the pre-index lookup."""
+    for language, extensions in nxlc.LanguageDefinitions.LANGUAGE_EXTENSIONS.items():
+        if ext in [e.lower() for e in extensions]:
+            return language
+    return 'Unknown'
+
+
+def indexed(ext: str) -> str:
+    """Lookup through the precompiled index."""
+    return nxlc.LanguageDefinitions.DETECTION_INDEX.extensions.get(ext, 'Unknown')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Language detection microbenchmark')
+    parser.add_argument('--iterations', type=int, default=2000,
+                        help='Number of passes over the sample extensions')
+    args = parser.parse_args()
+
+    # Mix of early, late and unknown extensions
+    samples = ['.py', '.js', '.go', '.xsd', '.wsdl', '.rdf', '.cob', '.unknown']
+
+    for name, func in (('linear scan', linear_scan), ('index', indexed)):
+        elapsed = timeit.timeit(lambda: [func(ext) for ext in samples], number=args.iterations)
+        per_call = elapsed / (args.iterations * len(samples)) * 1e9
+        print(f"{name:<12} {elapsed:8.4f}s total  {per_call:10.1f} ns/lookup")
+
+    mismatches = [ext for ext in samples if linear_scan(ext) != indexed(ext)]
+    if mismatches:
+        print(f"Mismatched results for: {', '.join(mismatches)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
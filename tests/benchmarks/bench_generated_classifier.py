@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for generated single-line counters.
+
+Runs the e2e fixture files of every language with single-line comments only
+through its generated counter (markers inlined as constants) and through the
+generic ``CommentClassifier._count_single`` loop, checks that both agree, and
+reports lines/sec per language and how many languages share each generated
+function.
+
+Usage:
+    python3 tests/benchmarks/bench_generated_classifier.py [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+FIXTURES = Path(__file__).parent.parent / 'e2e' / 'fixtures'
+
+
+def load_fixtures(defs):
+    """Fixture file buffers grouped by language, for single-line-only languages."""
+    counter = nxlc.LineCounter()
+    corpus = defaultdict(list)
+    for path in sorted(FIXTURES.rglob('*')):
+        if not path.is_file() or path.name == 'expected.json' or path.parent == FIXTURES:
+            continue
+        language = counter.detect_language(path)
+        if language == 'Unknown' or defs.comment_classifier(language).classify.__name__ != 'count_single_line':
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            corpus[language].append(f.read())
+    return corpus
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Generated line counter benchmark')
+    parser.add_argument('--repeat', type=int, default=500,
+                        help="Passes over each language's fixture files")
+    args = parser.parse_args()
+
+    defs = nxlc.LanguageDefinitions()
+    corpus = load_fixtures(defs)
+    mismatched = []
+    totals = [0.0, 0.0, 0]
+
+    print(f"{'Language':<20} {'Lines':>7} {'Generic (lines/s)':>18} {'Generated (lines/s)':>20} {'Speedup':>8}")
+    for language, texts in sorted(corpus.items()):
+        classifier = defs.comment_classifier(language)
+        lines = sum(text.count('\n') + 1 for text in texts)
+        timings = []
+        for func in (classifier._count_single, classifier.classify):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for text in texts:
+                    func(text)
+            timings.append(time.perf_counter() - start)
+        generic, generated = timings
+        processed = lines * args.repeat
+        totals[0] += generic
+        totals[1] += generated
+        totals[2] += processed
+        print(f"{language:<20} {lines:>7} {processed / generic:>18,.0f} {processed / generated:>20,.0f} "
+              f"{generic / generated:>7.2f}x")
+        if any(classifier._count_single(text) != classifier.classify(text) for text in texts):
+            mismatched.append(language)
+
+    if totals[2]:
+        print(f"{'All':<20} {'':>7} {totals[2] / totals[0]:>18,.0f} {totals[2] / totals[1]:>20,.0f} "
+              f"{totals[0] / totals[1]:>7.2f}x")
+
+    languages = [language for language in set(defs.COMMENT_PATTERNS)
+                 if defs.comment_classifier(language).classify.__name__ == 'count_single_line']
+    functions = {id(defs.comment_classifier(language).classify) for language in languages}
+    print(f"{len(languages)} single-line languages share {len(functions)} generated functions")
+    if mismatched:
+        print(f"Generated counts differ from the generic loop for: {', '.join(mismatched)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
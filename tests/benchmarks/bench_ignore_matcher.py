@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark for compiled ignore pattern matching.
+
+Generates ignore files of 1k and 10k patterns in the usual mix (``*.ext``,
+exact basenames, ``dir/``, ``**/dir/``, anchored paths and a few ``!``
+re-includes) and times per-path matching of a synthetic tree's relative
+paths with the previous per-pattern ``fnmatch`` loop and with a compiled
+``IgnoreMatcher``. Both must agree on every path. Compiled times are also
+reported separately for ignored and included paths. Literal, ``*.ext`` and
+literal-directory patterns are looked up in the pattern index, so neither
+time should grow with the pattern count.
+
+Usage:
+    python3 tests/benchmarks/bench_ignore_matcher.py [--paths N] [--patterns 1000 10000]
+"""
+
+import argparse
+import fnmatch
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+
+def loop_matches(file_path: Path, patterns) -> bool:
+    """The per-pattern matching loop that IgnoreMatcher replaced."""
+    path_str = str(file_path).replace('\\', '/')
+    ignored = False
+    for pattern in patterns:
+        pattern = pattern.replace('\\', '/')
+        negated = pattern.startswith('!')
+        if negated:
+            pattern = pattern[1:]
+        if '**/' in pattern:
+            if pattern.startswith('**/') and pattern.endswith('/'):
+                matched = any(fnmatch.fnmatch(part, pattern[3:-1]) for part in file_path.parts)
+            else:
+                matched = pattern.startswith('**/') and fnmatch.fnmatch(file_path.name, pattern[3:])
+        elif pattern.endswith('/'):
+            matched = any(fnmatch.fnmatch(part, pattern.rstrip('/')) for part in file_path.parts)
+        else:
+            matched = fnmatch.fnmatch(path_str, pattern) or fnmatch.fnmatch(file_path.name, pattern)
+        if matched:
+            ignored = not negated
+    return ignored
+
+
+def build_patterns(count: int, rnd: random.Random):
+    """``count`` ignore patterns in a typical mix."""
+    patterns = []
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.35:
+            patterns.append(f'*.ext{i}')
+        elif kind < 0.6:
+            patterns.append(f'generated_{i}.txt')
+        elif kind < 0.75:
+            patterns.append(f'build{i}/')
+        elif kind < 0.85:
+            patterns.append(f'**/cache{i}/')
+        elif kind < 0.98:
+            patterns.append(f'src/module{i}/*.tmp')
+        else:
+            patterns.append(f'!keep_{i}.txt')
+    return patterns
+
+
+def build_paths(count: int, rnd: random.Random):
+    """Relative paths of a synthetic tree, some of them matching patterns."""
+    paths = []
+    for i in range(count):
+        depth = rnd.randint(0, 4)
+        parts = [rnd.choice(['src', 'lib', 'tests', f'module{rnd.randint(0, 99)}', f'build{rnd.randint(0, 99)}',
+                             f'cache{rnd.randint(0, 99)}']) for _ in range(depth)]
+        name = rnd.choice([f'file_{i}.py', f'data.ext{rnd.randint(0, 999)}', f'generated_{rnd.randint(0, 999)}.txt',
+                           f'keep_{rnd.randint(0, 999)}.txt', 'scratch.tmp', 'README.md'])
+        paths.append(Path(*parts, name))
+    return paths
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Compiled ignore matcher benchmark')
+    parser.add_argument('--paths', type=int, default=2000, help='Paths to match')
+    parser.add_argument('--patterns', type=int, nargs='+', default=[1000, 10000], help='Pattern counts')
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    paths = build_paths(args.paths, rnd)
+    print(f"{'Patterns':>9} {'Compile (ms)':>13} {'Loop (us/path)':>15} {'Compiled (us/path)':>19} "
+          f"{'Ignored':>8} {'Included':>9} {'Speedup':>8}")
+    failed = False
+    for count in args.patterns:
+        patterns = build_patterns(count, rnd)
+
+        start = time.perf_counter()
+        matcher = nxlc.IgnoreMatcher(patterns)
+        compile_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [loop_matches(path, patterns) for path in paths]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [matcher.matches(path) for path in paths]
+        compiled_time = time.perf_counter() - start
+
+        per_path = {}
+        for ignored in (True, False):
+            group = [path for path, result in zip(paths, actual) if result is ignored]
+            start = time.perf_counter()
+            for path in group:
+                matcher.matches(path)
+            per_path[ignored] = (time.perf_counter() - start) / max(len(group), 1) * 1e6
+
+        print(f"{count:>9} {compile_time * 1e3:>13.1f} {loop_time / len(paths) * 1e6:>15.1f} "
+              f"{compiled_time / len(paths) * 1e6:>19.1f} {per_path[True]:>8.1f} {per_path[False]:>9.1f} "
+              f"{loop_time / compiled_time:>8.1f}")
+        failed |= actual != expected
+
+    if failed:
+        print("\nCompiled matcher disagrees with the pattern loop")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for user-defined language definitions.
+
+Generates a definitions file with many custom languages and compares a cold
+load (parse, merge and compile the detection index) against a warm load that
+reads the compiled form cached under the file's hash.
+
+Usage:
+    python3 tests/benchmarks/bench_language_definitions.py [--languages N] [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='User language definitions load benchmark')
+    parser.add_argument('--languages', type=int, default=500,
+                        help='Number of custom languages to define')
+    parser.add_argument('--iterations', type=int, default=20,
+                        help='Loads timed per mode')
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    os.environ['NXLC_CACHE_DIR'] = str(temp_dir / 'cache')
+    try:
+        definitions = temp_dir / 'languages.json'
+        definitions.write_text(json.dumps({'languages': {
+            f'Dsl{i}': {'extensions': [f'.dsl{i}', f'.d{i}x'], 'interpreters': [f'dsl{i}'],
+                        'single': ['#', '//'], 'multi_start': ['/*'], 'multi_end': ['*/']}
+            for i in range(args.languages)
+        }}))
+
+        def cold():
+            shutil.rmtree(temp_dir / 'cache', ignore_errors=True)
+            nxlc.LanguageDefinitions(definitions)
+
+        def warm():
+            nxlc.LanguageDefinitions(definitions)
+
+        for name, func in (('compile', cold), ('cached', warm)):
+            warm()  # Populate the cache (and the built-in fingerprint) first
+            elapsed = timeit.timeit(func, number=args.iterations)
+            print(f"{name:<8} {elapsed / args.iterations * 1e3:8.2f} ms/load  ({args.languages} languages)")
+
+        defs = nxlc.LanguageDefinitions(definitions)
+        if defs.DETECTION_INDEX.lookup('x.dsl7', '.dsl7') != 'Dsl7':
+            print("Cached index does not resolve custom extensions")
+            return 1
+        return 0
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for per-language line classification.
+
+Runs every e2e fixture file through the compiled CommentClassifier (the
+string-aware comment scanner, fed the whole file buffer as the counter
+does) and through the original per-line loop over plain pattern lists, and
+reports lines/sec per language for both. The
+scanner intentionally disagrees with the loop where that loop mistook
+markers inside strings, or start markers on later lines, for comment
+boundaries; such files are listed.
+
+Usage:
+    python3 tests/benchmarks/bench_line_classifier.py [--repeat N] [--language NAME]
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+FIXTURES = Path(__file__).parent.parent / 'e2e' / 'fixtures'
+
+
+def reference_count(lines, patterns):
+    """Reference implementation of the original per-line loop."""
+    code_lines = comment_lines = 0
+    in_multiline_comment = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        is_comment = False
+        for start_pattern in patterns['multi_start']:
+            if start_pattern in stripped:
+                if stripped.count(start_pattern) % 2 == 1:
+                    in_multiline_comment = not in_multiline_comment
+                is_comment = True
+                break
+        if not is_comment and not in_multiline_comment:
+            for comment_prefix in patterns['single']:
+                if stripped.startswith(comment_prefix):
+                    is_comment = True
+                    break
+        if in_multiline_comment and not is_comment:
+            is_comment = True
+        if is_comment:
+            comment_lines += 1
+        else:
+            code_lines += 1
+    return (code_lines, comment_lines)
+
+
+def load_fixtures(only=None):
+    """Return {language: [lines of each fixture file]} for detectable fixtures."""
+    counter = nxlc.LineCounter()
+    corpus = defaultdict(list)
+    for path in sorted(FIXTURES.rglob('*')):
+        if not path.is_file() or path.name == 'expected.json' or path.parent == FIXTURES:
+            continue
+        language = counter.detect_language(path)
+        if language == 'Unknown' or (only and language != only):
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            lines = f.readlines()
+        corpus[language].append((lines, ''.join(lines)))
+    return corpus
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Line classifier throughput benchmark')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help="Passes over each language's fixture files")
+    parser.add_argument('--language', help='Only benchmark this language')
+    args = parser.parse_args()
+
+    defs = nxlc.LanguageDefinitions()
+    empty = {'single': [], 'multi_start': [], 'multi_end': []}
+    corpus = load_fixtures(args.language)
+    differing = []
+    totals = [0.0, 0.0, 0]
+
+    print(f"{'Language':<20} {'Lines':>7} {'Before (lines/s)':>18} {'After (lines/s)':>17} {'Speedup':>8}")
+    for language, files in sorted(corpus.items()):
+        patterns = defs.COMMENT_PATTERNS.get(language, empty)
+        classifier = defs.comment_classifier(language)
+        lines = sum(len(file_lines) for file_lines, _ in files)
+        timings = []
+        for func, index in ((lambda l: reference_count(l, patterns), 0), (classifier.count_buffer, 1)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for file in files:
+                    func(file[index])
+            timings.append(time.perf_counter() - start)
+        before, after = timings
+        processed = lines * args.repeat
+        totals[0] += before
+        totals[1] += after
+        totals[2] += processed
+        print(f"{language:<20} {lines:>7} {processed / before:>18,.0f} {processed / after:>17,.0f} "
+              f"{before / after:>7.2f}x")
+        for file_lines, _ in files:
+            if reference_count(file_lines, patterns) != classifier.count(file_lines):
+                differing.append(language)
+                break
+
+    if totals[2]:
+        print(f"{'All':<20} {'':>7} {totals[2] / totals[0]:>18,.0f} {totals[2] / totals[1]:>17,.0f} "
+              f"{totals[0] / totals[1]:>7.2f}x")
+    if differing:
+        print(f"Counts differ from the per-line loop for: {', '.join(differing)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
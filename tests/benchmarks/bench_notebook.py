@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark for streaming Jupyter notebook counting.
+
+Builds a synthetic notebook whose size is dominated by cell outputs (base64
+images or many lines of stream text), feeds it to ``NotebookClassifier`` in
+1 MiB chunks, and reports throughput and the peak memory traced while
+counting, which should stay near the chunk size whatever the output size.
+
+Usage:
+    python3 tests/benchmarks/bench_notebook.py [--cells N] [--output-mb MB]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+CHUNK_SIZE = 1024 * 1024
+SOURCE = ["# Train the model\n", "import numpy as np\n", "\n", "model.fit(x, y)  # epochs\n", "plot(history)"]
+
+
+def build_notebook(cells: int, output_bytes: int, kind: str) -> bytes:
+    """Serialized notebook with ``cells`` code cells of about ``output_bytes`` output each."""
+    if kind == 'image':
+        output = {"output_type": "display_data", "metadata": {},
+                  "data": {"image/png": "iVBORw0KGgo" * (output_bytes // 11), "text/plain": ["<Figure>"]}}
+    else:
+        line = 'epoch 1/10 - loss: 0.1234 - "val_loss": 0.2345\n'
+        output = {"output_type": "stream", "name": "stdout", "text": [line] * (output_bytes // len(line))}
+    notebook = {
+        "cells": [{"cell_type": "code", "execution_count": i, "metadata": {}, "outputs": [output],
+                   "source": SOURCE} for i in range(cells)],
+        "metadata": {"kernelspec": {"display_name": "Python 3", "language": "python", "name": "python3"}},
+        "nbformat": 4, "nbformat_minor": 5,
+    }
+    return json.dumps(notebook, indent=1).encode()
+
+
+def count(defs, data: bytes) -> int:
+    """Feed ``data`` in chunks and return the total line count."""
+    classifier = nxlc.NotebookClassifier(defs)
+    view = memoryview(data)
+    for offset in range(0, len(data), CHUNK_SIZE):
+        classifier.feed(bytes(view[offset:offset + CHUNK_SIZE]))
+    return classifier.finish()[0]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Streaming notebook counting benchmark')
+    parser.add_argument('--cells', type=int, default=20, help='Code cells in the notebook')
+    parser.add_argument('--output-mb', type=float, default=5.0, help='Output size per cell in MB')
+    args = parser.parse_args()
+
+    defs = nxlc.LanguageDefinitions()
+    expected = args.cells * defs.comment_classifier('Python').count_buffer(''.join(SOURCE))[0]
+    print(f"{'Outputs':<8} {'Size (MB)':>10} {'MB/s':>8} {'Peak (KB)':>10} {'Lines':>7}")
+    failed = False
+    for kind in ('image', 'text'):
+        data = build_notebook(args.cells, int(args.output_mb * 1e6), kind)
+        start = time.perf_counter()
+        total = count(defs, data)
+        elapsed = time.perf_counter() - start
+        # Traced separately: tracing slows allocation-heavy code down
+        tracemalloc.start()
+        count(defs, data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{kind:<8} {len(data) / 1e6:>10.1f} {len(data) / 1e6 / elapsed:>8.1f} {peak // 1024:>10} {total:>7}")
+        failed |= total != expected
+
+    if failed:
+        print(f"\nLine totals differ from the expected {expected}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark for intra-file parallel counting.
+
+Builds a large C file of functions with block comments, strings and line
+comments, some of them crossing chunk boundaries, and counts it serially
+with ``LineClassifier`` and in chunks with ``ParallelFileCounter`` at the
+given job counts. Reports wall time, speedup, chunks and how many chunks
+had to be recounted from their predecessor's scanner state. Speedup needs
+as many free cores as jobs; ``os.cpu_count()`` is printed for reference.
+
+Usage:
+    python3 tests/benchmarks/bench_parallel_counting.py [--size-mb MB] [--jobs 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+FUNCTION = '''/*
+ * Compute the checksum of block {n}.
+ */
+static int checksum_{n}(const char *data, size_t len)
+{{
+    int sum = 0; /* running total */
+    const char *label = "/* block {n} */";
+    for (size_t i = 0; i < len; i++) {{
+        sum += data[i]; // accumulate
+    }}
+
+    return sum;
+}}
+
+'''
+
+LICENSE = '/*\n' + ' * Licensed under the Apache License, Version 2.0.\n' * 2000 + ' */\n'
+
+
+def build_file(path: Path, size: int) -> None:
+    """Write about ``size`` bytes of C with a long license block every 200 functions."""
+    with open(path, 'w', encoding='utf-8') as f:
+        written, n = 0, 0
+        while written < size:
+            text = LICENSE if n % 200 == 0 else FUNCTION.format(n=n)
+            f.write(text)
+            written += len(text)
+            n += 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Intra-file parallel counting benchmark')
+    parser.add_argument('--size-mb', type=float, default=100.0, help='Size of the generated file in MB')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[2, 4], help='Worker counts to measure')
+    parser.add_argument('--chunk-mb', type=float, default=8.0, help='Chunk size in MB')
+    args = parser.parse_args()
+
+    defs = nxlc.LanguageDefinitions()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'large.c'
+        build_file(path, int(args.size_mb * 1e6))
+        size = path.stat().st_size
+        print(f"File: {size / 1e6:.1f} MB, CPUs: {os.cpu_count()}")
+
+        start = time.perf_counter()
+        classifier = nxlc.LineClassifier('C', defs, 'utf-8')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(nxlc.LineCounter.READ_CHUNK_SIZE), b''):
+                classifier.feed(chunk)
+        total, code, comment, _ = classifier.finish()
+        serial = time.perf_counter() - start
+        expected = (total, code, comment)
+
+        print(f"{'Jobs':>5} {'Time (s)':>9} {'Speedup':>8} {'Chunks':>7} {'Recounted':>10}")
+        print(f"{'1':>5} {serial:>9.2f} {1.0:>8.2f} {'-':>7} {'-':>10}")
+        failed = False
+        for jobs in args.jobs:
+            counter = nxlc.ParallelFileCounter(jobs, defs, int(args.chunk_mb * 1024 * 1024))
+            chunks = len(counter.split(path, size))
+            start = time.perf_counter()
+            counts = counter.count(path, 'C', 'utf-8')
+            elapsed = time.perf_counter() - start
+            print(f"{jobs:>5} {elapsed:>9.2f} {serial / elapsed:>8.2f} {chunks:>7} {counter.recounted:>10}")
+            failed |= counts != expected
+
+    if failed:
+        print(f"\nParallel counts differ from the serial count {expected}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
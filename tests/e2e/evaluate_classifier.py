@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Classifier Accuracy Report for E2E Fixtures
+
+Runs the statistical language classifier over every fixture file with its
+extension stripped (as if it were an extensionless script) and reports
+per-language accuracy against the fixture's expected language, along with how
+often it abstained and how often it committed to a wrong language. Languages
+the model was not trained on are reported separately: the classifier can only
+abstain on them, so every answer there is a mislabel.
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+import nxlc
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Report classifier accuracy on the e2e fixtures')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='Fixture root directory')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show every misclassification')
+    args = parser.parse_args()
+
+    classifier = nxlc.LanguageClassifier.load_default()
+    if classifier is None:
+        print("Classifier model not available", file=sys.stderr)
+        return 1
+
+    results = defaultdict(lambda: [0, 0, 0])  # language -> [correct, abstained, total]
+    for expected_file in sorted(Path(args.fixtures).rglob('expected.json')):
+        expected = json.loads(expected_file.read_text())
+        language = expected.get('language')
+        if not language:
+            continue
+        for case in ('simple', 'complex', 'edge_cases'):
+            filename = expected.get(case, {}).get('filename')
+            path = expected_file.parent / filename if filename else None
+            if path is None or not path.is_file():
+                continue
+            head = path.read_bytes()[:nxlc.LineCounter.HEAD_SIZE].decode('utf-8', errors='ignore')
+            guess = classifier.classify(head)
+            stats = results[language]
+            stats[0] += guess == language
+            stats[1] += guess == 'Unknown'
+            stats[2] += 1
+            if args.verbose and guess != language:
+                print(f"  {path.relative_to(args.fixtures)}: expected {language}, got {guess}")
+
+    trained = set(classifier.languages)
+    overall = [0, 0]  # [mislabeled, total]
+    for title, languages in (('Trained languages', sorted(l for l in results if l in trained)),
+                             ('Untrained languages', sorted(l for l in results if l not in trained))):
+        correct = abstained = total = 0
+        print(f"\n{title}:")
+        for language in languages:
+            hit, unknown, count = results[language]
+            correct, abstained, total = correct + hit, abstained + unknown, total + count
+            print(f"  {language:24} {hit}/{count} correct, {unknown} abstained, "
+                  f"{count - hit - unknown} mislabeled")
+        if total:
+            mislabeled = total - correct - abstained
+            print(f"  Overall: {correct / total:.1%} correct, {abstained / total:.1%} abstained, "
+                  f"{mislabeled / total:.1%} mislabeled ({total} files)")
+            overall[0] += mislabeled
+            overall[1] += total
+    if overall[1]:
+        print(f"\nMislabel rate: {overall[0] / overall[1]:.1%} of {overall[1]} files")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
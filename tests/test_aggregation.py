@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for interned language IDs and array-backed aggregation counters
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestLanguageTable(unittest.TestCase):
+    """Test language name interning"""
+
+    def test_builtin_ids_are_stable(self):
+        """Synthetic buckets come first and built-in languages are pre-interned"""
+        table = nxlc.LanguageDefinitions().language_table()
+        self.assertEqual(table.names[:3], ['Unknown', 'Generated', 'Vendored'])
+        self.assertIn('Python', table.ids)
+        self.assertEqual(table.names[table.ids['Python']], 'Python')
+
+    def test_intern_is_append_only(self):
+        """New names get the next ID and known names keep theirs"""
+        table = nxlc.LanguageTable(['A', 'B'])
+        self.assertEqual(table.intern('B'), 1)
+        self.assertEqual(table.intern('C'), 2)
+        self.assertEqual(table.intern('A'), 0)
+        self.assertEqual(table.names, ['A', 'B', 'C'])
+
+    def test_user_languages_extend_builtin_ids(self):
+        """User definitions keep built-in IDs and number new languages after them"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'languages.json'
+            path.write_text('{"languages": {"Widget": {"extensions": [".wdg"], "single": ["#"]}}}')
+            defs = nxlc.LanguageDefinitions(path)
+        builtin, table = nxlc.LanguageDefinitions().language_table(), defs.language_table()
+        self.assertEqual(table.ids['Python'], builtin.ids['Python'])
+        self.assertGreaterEqual(table.ids['Widget'], len(builtin.names))
+        self.assertNotIn('Widget', builtin.ids)
+
+    def test_scan_names_do_not_leak(self):
+        """Names interned during one scan are absent from other tables"""
+        first, second = nxlc.LineCounter(), nxlc.LineCounter()
+        first.language_table.intern('Linguist Only')
+        self.assertNotIn('Linguist Only', second.language_table.ids)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first.analyze_directory(Path(temp_dir), no_git=True)
+        self.assertNotIn('Linguist Only', first.language_table.ids)
+
+
+class TestLanguageCounters(unittest.TestCase):
+    """Test the flat per-language counter array"""
+
+    def test_add_and_report(self):
+        """Counts are converted to the reporting dict shape only on demand"""
+        counters = nxlc.LanguageCounters(2)
+        counters.add(1, 10, 6, 2)
+        counters.add(1, 5, 5, 0)
+        counters.add(4, 3, 1, 1)  # Beyond the initial size: grows
+        self.assertEqual(counters.to_dict(['A', 'B', 'C', 'D', 'E']), {
+            'B': {'files': 2, 'total_lines': 15, 'code_lines': 11, 'comment_lines': 2},
+            'E': {'files': 1, 'total_lines': 3, 'code_lines': 1, 'comment_lines': 1},
+        })
+        self.assertEqual(counters.totals(), (3, 18, 12, 3))
+
+    def test_merge(self):
+        """Merging two workers' counters is an element-wise sum"""
+        left, right = nxlc.LanguageCounters(), nxlc.LanguageCounters()
+        left.add(0, 1, 1, 0)
+        right.add(0, 2, 1, 1)
+        right.add(3, 4, 4, 0)
+        left.merge(right)
+        self.assertEqual(left.to_dict(['A', 'B', 'C', 'D']), {
+            'A': {'files': 2, 'total_lines': 3, 'code_lines': 2, 'comment_lines': 1},
+            'D': {'files': 1, 'total_lines': 4, 'code_lines': 4, 'comment_lines': 0},
+        })
+
+    def test_records_carry_language_ids(self):
+        """classify_file interns the detected language on the record"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'main.py'
+            path.write_text("# comment\nx = 1\n")
+            counter = nxlc.LineCounter()
+            record = counter.classify_file(path)
+            results = counter.analyze_directory(Path(temp_dir), no_git=True)
+        table = counter.language_table
+        self.assertEqual(table.names[record.language_id], 'Python')
+        self.assertEqual(results['languages'],
+                         {'Python': {'files': 1, 'total_lines': 2, 'code_lines': 1, 'comment_lines': 1}})
+        self.assertEqual(results['total_files'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
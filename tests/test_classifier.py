@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Tests for the NXLC statistical language classifier
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+PYTHON_SNIPPET = '''import os
+import sys
+
+def main(argv):
+    """Entry point."""
+    for name in argv[1:]:
+        if os.path.exists(name):
+            print(name)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+'''
+
+SHELL_SNIPPET = '''set -euo pipefail
+
+for f in "$@"; do
+    if [ -f "$f" ]; then
+        echo "found $f"
+    fi
+done
+exit 0
+'''
+
+GO_SNIPPET = '''package main
+
+import (
+	"fmt"
+	"os"
+)
+
+type Runner struct {
+	name string
+}
+
+func (r *Runner) Run() error {
+	fmt.Printf("running %s\\n", r.name)
+	return nil
+}
+
+func main() {
+	if err := (&Runner{name: os.Args[1]}).Run(); err != nil {
+		os.Exit(1)
+	}
+}
+'''
+
+RUBY_SNIPPET = '''require 'json'
+
+module Tools
+  class Runner
+    attr_reader :name
+
+    def initialize(name)
+      @name = name
+    end
+
+    def run
+      puts "running #{@name}"
+    end
+  end
+end
+'''
+
+
+class TestLanguageClassifier(unittest.TestCase):
+    """Test the shipped naive-Bayes model"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the shipped model once"""
+        cls.classifier = nxlc.LanguageClassifier.load_default()
+
+    def test_model_is_shipped(self):
+        """The model file is present and loads"""
+        self.assertIsNotNone(self.classifier)
+        self.assertIn('Python', self.classifier.languages)
+
+    def test_classifies_real_code(self):
+        """Representative snippets are classified correctly"""
+        for snippet, expected in ((PYTHON_SNIPPET, 'Python'), (SHELL_SNIPPET, 'Shell'),
+                                  (GO_SNIPPET, 'Go')):
+            with self.subTest(expected=expected):
+                self.assertEqual(self.classifier.classify(snippet), expected)
+
+    def test_abstains_on_untrained_language(self):
+        """Text in a language outside the model is not forced onto a trained one"""
+        self.assertNotIn('Ruby', self.classifier.languages)
+        self.assertEqual(self.classifier.classify(RUBY_SNIPPET), 'Unknown')
+        self.assertEqual(self.classifier.classify(RUBY_SNIPPET, ['Ruby']), 'Unknown')
+
+    def test_abstains_on_little_evidence(self):
+        """Too few tokens yield Unknown rather than a guess"""
+        self.assertEqual(self.classifier.classify("x = 1\n"), 'Unknown')
+        self.assertEqual(self.classifier.classify(""), 'Unknown')
+
+    def test_candidates_restrict_the_answer(self):
+        """Only candidate languages are considered when given"""
+        self.assertEqual(self.classifier.classify(PYTHON_SNIPPET, ['Perl', 'Python']), 'Python')
+        self.assertIn(self.classifier.classify(PYTHON_SNIPPET, ['Perl', 'Ruby']),
+                      ('Perl', 'Ruby', 'Unknown'))
+
+    def test_train_round_trip(self):
+        """A trained model separates its own training languages"""
+        model = nxlc.LanguageClassifier.train({'Python': [PYTHON_SNIPPET], 'Ruby': [RUBY_SNIPPET],
+                                               'Shell': [SHELL_SNIPPET]})
+        classifier = nxlc.LanguageClassifier(model)
+        self.assertEqual(classifier.classify(PYTHON_SNIPPET), 'Python')
+        self.assertEqual(classifier.classify(RUBY_SNIPPET), 'Ruby')
+        self.assertEqual(classifier.classify(SHELL_SNIPPET), 'Shell')
+
+    def test_rejects_unknown_model_version(self):
+        """Models from an incompatible trainer are refused"""
+        with self.assertRaises(ValueError):
+            nxlc.LanguageClassifier({'version': 0, 'vocabulary_size': 1, 'languages': {}})
+
+
+class TestClassifierIntegration(unittest.TestCase):
+    """Test detect_language with --classify"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_disabled_by_default(self):
+        """Without use_classifier, extensionless files without headers stay Unknown"""
+        path = self.temp_path / 'tool'
+        path.write_text(PYTHON_SNIPPET)
+        counter = nxlc.LineCounter()
+        self.assertEqual(counter.detect_language(path), 'Unknown')
+        self.assertIsNone(counter._classifier)
+
+    def test_extensionless_file(self):
+        """Extensionless files are classified from their head buffer"""
+        path = self.temp_path / 'tool'
+        path.write_text(GO_SNIPPET)
+        path.chmod(0o644)
+        self.assertEqual(nxlc.LineCounter(use_classifier=True).detect_language(path), 'Go')
+
+    def test_unknown_extension(self):
+        """Files with unrecognized extensions are classified too"""
+        path = self.temp_path / 'build.inc1'
+        path.write_text(SHELL_SNIPPET)
+        self.assertEqual(nxlc.LineCounter(use_classifier=True).detect_language(path), 'Shell')
+
+    def test_rules_take_precedence(self):
+        """Known extensions and special names never reach the classifier"""
+        path = self.temp_path / 'script.rb'
+        path.write_text(PYTHON_SNIPPET)
+        counter = nxlc.LineCounter(use_classifier=True)
+        self.assertEqual(counter.detect_language(path), 'Ruby')
+        self.assertIsNone(counter._classifier)
+
+    def test_conflict_without_evidence(self):
+        """Conflicted extensions fall back to the classifier before the default"""
+        path = self.temp_path / 'lonely' / 'tool.pl'
+        path.parent.mkdir()
+        path.write_text("sub greet {\n    return join(', ', map { uc } @_);\n}\n"
+                        "foreach $name (@ARGV) { greet($name); }\n")
+        counter = nxlc.LineCounter(use_classifier=True)
+        self.assertEqual(counter.detect_language(path), 'Perl')
+        self.assertEqual(dict(counter.conflict_decisions), {('.pl', 'Perl', 'classifier'): 1})
+
+    def test_missing_model_disables_classifier(self):
+        """A missing model logs a warning once and leaves files Unknown"""
+        path = self.temp_path / 'tool'
+        path.write_text(PYTHON_SNIPPET)
+        original_path, original_default = nxlc.LanguageClassifier.MODEL_PATH, nxlc.LanguageClassifier._default
+        nxlc.LanguageClassifier.MODEL_PATH = self.temp_path / 'missing.json'
+        nxlc.LanguageClassifier._default = None
+        try:
+            counter = nxlc.LineCounter(use_classifier=True)
+            with self.assertLogs(level='WARNING'):
+                self.assertEqual(counter.detect_language(path), 'Unknown')
+            self.assertFalse(counter.use_classifier)
+        finally:
+            nxlc.LanguageClassifier.MODEL_PATH = original_path
+            nxlc.LanguageClassifier._default = original_default
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for embedded-language regions in Vue, Svelte, HTML, PHP and Markdown files
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+VUE_SOURCE = '''<template>
+  <!-- a comment -->
+  <div>{{ msg }}</div>
+</template>
+
+<script lang="ts">
+// ts comment
+export default { data: () => ({ msg: "<!-- not a comment -->" }) }
+/* block
+   comment */
+</script>
+
+<style scoped>
+/* css comment */
+.a { color: red; }
+</style>
+'''
+
+MARKDOWN_SOURCE = '''# Title
+
+```python
+# comment
+x = 1
+```
+
+~~~
+# unknown fence language
+~~~
+
+````md
+```js
+// nested fence is text
+```
+````
+'''
+
+
+class TestEmbeddedRegions(unittest.TestCase):
+    """Test region splitting and per-region classification"""
+
+    def setUp(self):
+        """Use the built-in definitions"""
+        self.defs = nxlc.LanguageDefinitions()
+
+    def languages(self, host, text):
+        return [(text[start:end], language) for start, end, language in
+                self.defs.embedded_regions(host).regions(text)]
+
+    def test_vue_blocks(self):
+        """Script and style blocks use their lang attribute or default language"""
+        regions = self.languages('Vue', VUE_SOURCE)
+        self.assertEqual([language for _, language in regions], ['Vue', 'TypeScript', 'Vue', 'CSS', 'Vue'])
+        self.assertTrue(regions[1][0].startswith('// ts comment'))
+        self.assertEqual(''.join(text for text, _ in regions), VUE_SOURCE)
+        self.assertEqual(self.defs.embedded_regions('Vue').classify(VUE_SOURCE), (9, 5))
+
+    def test_commented_out_and_unknown_blocks(self):
+        """Blocks inside host comments and unknown script types stay host text"""
+        html = ('<!--\n<script>\nvar a; // old\n</script>\n-->\n'
+                '<script type="text/plain">\n// prose\n</script>\n')
+        self.assertEqual([language for _, language in self.languages('HTML', html)], ['HTML'])
+
+    def test_markdown_fences(self):
+        """Fences resolve their info string; other fences stay Markdown"""
+        regions = self.languages('Markdown', MARKDOWN_SOURCE)
+        self.assertEqual([language for _, language in regions], ['Markdown', 'Python', 'Markdown'])
+        self.assertEqual(regions[1][0], '# comment\nx = 1\n')
+
+    def test_php_blocks(self):
+        """Text outside <?php ... ?> is HTML; unterminated blocks run to the end"""
+        php = '<html>\n<!-- c -->\n<?php\n// php comment\n$x = 1;\n?>\n<p><?= $x ?></p>\n<?php\n# tail\n'
+        regions = self.languages('PHP', php)
+        self.assertEqual([language for _, language in regions], ['HTML', 'PHP', 'HTML', 'PHP'])
+        self.assertEqual(self.defs.embedded_regions('PHP').classify(php), (6, 3))
+        self.assertEqual(self.languages('PHP', '// fragment\n$x = 1;\n'), [('// fragment\n$x = 1;\n', 'PHP')])
+
+    def test_language_resolution(self):
+        """Names, extensions and aliases resolve case-insensitively"""
+        cases = {'Python': 'Python', 'py': 'Python', 'rs': 'Rust', 'bash': 'Shell', 'scss': 'CSS',
+                 'text/javascript': 'JavaScript', 'C++': 'C++', 'no-such-language': None, '': None}
+        for name, expected in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.defs.embedded_language(name), expected)
+
+    def test_file_counts(self):
+        """Files are counted with embedded syntax, in any chunking"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'App.vue'
+            path.write_text(VUE_SOURCE)
+            counter = nxlc.LineCounter()
+            counter.READ_CHUNK_SIZE = 7
+            self.assertEqual(counter.count_lines_in_file(path), (16, 9, 5))
+            self.assertIsNone(self.defs.embedded_regions('Python'))
+
+
+if __name__ == '__main__':
+    unittest.main()
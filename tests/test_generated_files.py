@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for NXLC generated-file detection
+"""
+
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestGeneratedFiles(unittest.TestCase):
+    """Test early detection of generated files by name and head buffer"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, name: str, content: str) -> Path:
+        path = self.temp_path / name
+        path.write_text(content)
+        return path
+
+    def test_name_rules(self):
+        """Lockfiles, protobuf outputs and minified bundles match by name"""
+        rules = nxlc.LanguageDefinitions.GENERATED_RULE_SET
+        cases = {
+            'package-lock.json': 'lockfile',
+            'Cargo.lock': 'lockfile',
+            'api.pb.go': 'protobuf',
+            'api_pb2.py': 'protobuf',
+            'zz_generated.deepcopy.go': 'codegen',
+            'app.min.js': 'minified',
+            'main.go': None,
+            'lock.py': None,
+        }
+        for filename, expected in cases.items():
+            with self.subTest(filename=filename):
+                self.assertEqual(rules.match(filename), expected)
+
+    def test_name_match_skips_reading(self):
+        """Files generated by name are not opened"""
+        path = self.write('api.pb.go', "package api\n")
+        counter = nxlc.LineCounter()
+        counter._read_head = lambda filepath: self.fail("head buffer was read")
+        record = counter.classify_file(path)
+        self.assertEqual((record.language, record.generated, record.total), ('Generated', 'protobuf', 0))
+
+    def test_header_markers(self):
+        """Generator headers in the first lines mark a file as generated"""
+        counter = nxlc.LineCounter()
+        cases = {
+            'a.go': ("// Code generated by mockgen. DO NOT EDIT.\n\npackage a\n", 'codegen'),
+            'b.py': ("# Generated by the protocol buffer compiler.  DO NOT EDIT!\n", 'protobuf'),
+            'c.java': ("/**\n * Autogenerated by Thrift Compiler (0.16.0)\n */\n", 'thrift'),
+            'd.js': ("/* @generated */\nexport {};\n", 'codegen'),
+            'e.cs': ("// <auto-generated>\n//   This code was generated.\n", 'codegen'),
+            'f.py': ("import os\n\n\ndef edit():\n    pass\n", None),
+            'g.py': ("".join(f"x{i} = {i}\n" for i in range(30)) + "# DO NOT EDIT below\n", None),
+            'h.py': ("# DO NOT EDIT these defaults without updating the docs\nx = 1\n", None),
+        }
+        for name, (content, expected) in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(counter.classify_file(self.write(name, content)).generated, expected)
+
+    def test_head_buffer_is_read_once(self):
+        """Small files are counted from the head buffer; non-executable extensionless files are not read"""
+        paths = [self.write('main.py', "# comment\nx = 1\n")]
+        if not sys.platform.startswith('win'):
+            paths.append(self.write('notes', "# vim: set ft=python:\nx = 1\n"))
+            paths[1].chmod(0o644)
+        counter = nxlc.LineCounter()
+        opened = []
+        real_open = open
+        with unittest.mock.patch('builtins.open',
+                                 side_effect=lambda f, *a, **k: opened.append(Path(f).name) or real_open(f, *a, **k)):
+            records = [counter.classify_file(path) for path in paths]
+        self.assertEqual((records[0].total, records[0].code, records[0].comment), (2, 1, 1))
+        self.assertEqual(opened, ['main.py'] + ['notes'] * (len(paths) - 1))
+        if len(records) > 1:
+            self.assertEqual(records[1].language, 'Unknown')
+
+    def test_unknown_files_are_not_read_unless_counted(self):
+        """Extensionless non-executable files are only read if Unknown files are counted"""
+        if sys.platform.startswith('win'):
+            self.skipTest("requires POSIX executable bits")
+        path = self.write('notes', "x = 1\n")
+        path.chmod(0o644)
+        counter = nxlc.LineCounter()
+        counter._read_head_bytes = lambda filepath: self.fail("head buffer was read")
+        record = counter.classify_file(path, count_unknown=False)
+        self.assertEqual((record.language, record.total), ('Unknown', 0))
+
+    def test_count_lines_in_file_counts_generated_files(self):
+        """The generated-file mode applies to directory scans, not single-file counts"""
+        path = self.write('gen.py', "# @generated\n# comment\nx = 1\n")
+        counter = nxlc.LineCounter()
+        self.assertEqual(counter.classify_file(path).generated, 'codegen')
+        self.assertEqual(counter.count_lines_in_file(path), (3, 1, 2))
+
+    def test_minified_files(self):
+        """Long-line bundles are detected only for minifiable languages"""
+        counter = nxlc.LineCounter()
+        bundle = "var a=1;" * 400 + "\n"
+        self.assertEqual(counter.classify_file(self.write('vendor.js', bundle)).generated, 'minified')
+        self.assertIsNone(counter.classify_file(self.write('data.py', "x = '" + "a" * 3000 + "'\n")).generated)
+        self.assertIsNone(counter.classify_file(self.write('app.js', "let a = 1;\n" * 50)).generated)
+
+    def test_modes(self):
+        """skip drops generated files, count buckets them lines-only, include counts normally"""
+        self.write('main.py', "# comment\nx = 1\n")
+        self.write('yarn.lock', "# yarn lockfile v1\n\n\"a@1\":\n  version \"1\"")
+        self.write('gen.py', "# @generated\n# comment\nx = 1\n")
+
+        results = nxlc.LineCounter().analyze_directory(self.temp_path, no_git=True)
+        self.assertEqual(set(results['languages']), {'Python'})
+        self.assertEqual(results['languages']['Python']['files'], 1)
+        self.assertEqual(results['generated_files'], 2)
+        output = nxlc.format_results(results, nxlc.Colors(enabled=False))
+        self.assertIn("2 generated files skipped", output)
+
+        results = nxlc.LineCounter(generated='count').analyze_directory(self.temp_path, no_git=True)
+        generated = results['languages']['Generated']
+        self.assertEqual((generated['files'], generated['total_lines'], generated['code_lines']), (2, 7, 0))
+        self.assertEqual(results['total_lines'], 9)
+
+        results = nxlc.LineCounter(generated='include').analyze_directory(self.temp_path, no_git=True)
+        self.assertEqual(results['languages']['Python']['files'], 2)
+        self.assertEqual(results['generated_files'], 0)
+
+    def test_invalid_mode(self):
+        """Unknown modes are rejected"""
+        with self.assertRaises(ValueError):
+            nxlc.LineCounter(generated='hide')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for .gitattributes linguist-vendored / linguist-generated / linguist-language support
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestGitPatternTranslation(unittest.TestCase):
+    """Test the shared gitignore-style glob translator"""
+
+    def matches(self, pattern: str, path: str) -> bool:
+        regex, _ = nxlc.translate_git_pattern(pattern)
+        return re.match(regex + r'\Z', path) is not None
+
+    def test_patterns(self):
+        """Anchoring, wildcards, double stars and classes follow git semantics"""
+        cases = [
+            ('*.min.js', 'app.min.js', True),
+            ('*.min.js', 'static/js/app.min.js', True),
+            ('*.js', 'src/a.jsx', False),
+            ('vendor/*', 'vendor/lib.c', True),
+            ('vendor/*', 'vendor/sub/lib.c', False),
+            ('vendor/**', 'vendor/sub/lib.c', True),
+            ('/build', 'build', True),
+            ('/build', 'src/build', False),
+            ('build', 'src/build', True),
+            ('**/gen', 'a/b/gen', True),
+            ('**/gen', 'gen', True),
+            ('a/**/b', 'a/b', True),
+            ('a/**/b', 'a/x/y/b', True),
+            ('doc?.md', 'docs.md', True),
+            ('doc?.md', 'doc/.md', False),
+            ('[!a]x', 'bx', True),
+            ('[!a]x', 'ax', False),
+            ('\\*.txt', '*.txt', True),
+            ('\\*.txt', 'a.txt', False),
+            ('[]]x', ']x', True),
+            ('[]a]x', 'ax', True),
+            ('[!]]x', ']x', False),
+            ('[!]]x', 'bx', True),
+        ]
+        for pattern, path, expected in cases:
+            with self.subTest(pattern=pattern, path=path):
+                self.assertEqual(self.matches(pattern, path), expected)
+
+    def test_directory_only(self):
+        """A trailing slash marks directory-only patterns"""
+        self.assertEqual(nxlc.translate_git_pattern('docs/')[1], True)
+        self.assertEqual(nxlc.translate_git_pattern('docs')[1], False)
+
+
+class TestGitAttributes(unittest.TestCase):
+    """Test parsing and hierarchical use of .gitattributes"""
+
+    def setUp(self):
+        """Set up test environment with temp directory."""
+        self.test_dir = tempfile.mkdtemp(prefix="nxlc_gitattributes_test_")
+        self.test_path = Path(self.test_dir)
+        (self.test_path / ".git").mkdir()
+
+    def tearDown(self):
+        """Clean up test environment."""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def create_file(self, relative_path: str, content: str = "x = 1\n") -> Path:
+        """Create a file with given content."""
+        full_path = self.test_path / relative_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+        return full_path
+
+    def test_parse_attributes(self):
+        """Set, unset, unspecified and valued attributes are parsed; others dropped"""
+        path = self.create_file(".gitattributes", "\n".join([
+            "# comment",
+            "*.txt text eol=lf",
+            "vendor/** linguist-vendored",
+            "vendor/ours/** -linguist-vendored",
+            "*.inc linguist-language=php",
+            "gen/* linguist-generated=true diff",
+            "docs/* !linguist-generated",
+            "[attr]binary -diff -merge",
+        ]))
+        attributes = nxlc.GitAttributes.parse(path)
+        self.assertEqual([rule[3] for rule in attributes.rules], [
+            {'linguist-vendored': True},
+            {'linguist-vendored': False},
+            {'linguist-language': 'php'},
+            {'linguist-generated': True},
+            {'linguist-generated': None},
+        ])
+        self.assertEqual(attributes.lookup(self.test_path / 'vendor' / 'a.c'), {'linguist-vendored': True})
+        self.assertEqual(attributes.lookup(self.test_path / 'vendor' / 'ours' / 'a.c'),
+                         {'linguist-vendored': False})
+        self.assertEqual(attributes.unset, {'linguist-vendored', 'linguist-generated'})
+
+    def test_vendored_and_generated_subtrees_are_pruned(self):
+        """Vendored and generated directories are never entered"""
+        self.create_file(".gitattributes", "third_party/** linguist-vendored\nproto/ linguist-generated\n")
+        self.create_file("src/main.py")
+        self.create_file("third_party/lib/dep.py")
+        self.create_file("proto/api.py")
+
+        counter = nxlc.LineCounter()
+        opened = []
+        original = counter.classify_file
+        counter.classify_file = lambda path, **kwargs: opened.append(path.name) or original(path, **kwargs)
+        results = counter.analyze_directory(self.test_path)
+
+        self.assertEqual(results['languages']['Python']['files'], 1)
+        self.assertNotIn('dep.py', opened)
+        self.assertNotIn('api.py', opened)
+        self.assertEqual(results['attribute_pruned_paths'], 2)
+        self.assertIn("respecting .gitattributes", nxlc.format_results(results, nxlc.Colors(enabled=False)))
+
+    def test_unset_rules_prevent_pruning(self):
+        """A later rule re-including part of a vendored tree is honoured"""
+        self.create_file(".gitattributes", "vendor/** linguist-vendored\nvendor/ours/** -linguist-vendored\n")
+        self.create_file("vendor/theirs/a.py")
+        self.create_file("vendor/ours/b.py")
+        results = nxlc.LineCounter().analyze_directory(self.test_path)
+        self.assertEqual(results['languages']['Python']['files'], 1)
+
+    def test_language_override_and_generated_files(self):
+        """linguist-language overrides detection without sniffing; nested files add rules"""
+        self.create_file(".gitattributes", "*.inc linguist-language=php\n*.py linguist-language=Rust\n")
+        self.create_file("lib/config.inc", "// comment\n$x = 1;\n")
+        self.create_file("lib/.gitattributes", "schema.py linguist-generated\n*.py -linguist-language\n")
+        self.create_file("lib/schema.py")
+        self.create_file("lib/util.py", "# comment\nx = 1\n")
+        self.create_file("main.py", "fn main() {}\n")
+
+        counter = nxlc.LineCounter(generated='count')
+        sniffed = []
+        original = counter._read_head_bytes
+        counter._read_head_bytes = lambda path: sniffed.append(path.name) or original(path)
+        results = counter.analyze_directory(self.test_path)
+
+        self.assertEqual(sorted(sniffed), ['.gitattributes', '.gitattributes', 'util.py'])
+        self.assertEqual(counter.file_line_counts[str(Path('lib') / 'util.py')].language, 'Python')
+
+        self.assertEqual(counter.file_line_counts[str(Path('lib') / 'config.inc')].language, 'PHP')
+        self.assertEqual(counter.file_line_counts[str(Path('lib') / 'config.inc')].comment, 1)
+        self.assertEqual(counter.file_line_counts['main.py'].language, 'Rust')
+        self.assertEqual(counter.file_line_counts[str(Path('lib') / 'schema.py')].generated, 'gitattributes')
+        self.assertEqual(results['languages']['Generated']['files'], 1)
+
+    def test_literal_close_bracket_and_invalid_patterns(self):
+        """A ']' opening a class is a member; an invalid class is skipped, not fatal"""
+        self.create_file(".gitattributes", "[]]x/** linguist-vendored\n[z-a]/** linguist-vendored\n")
+        self.create_file("]x/a.py")
+        self.create_file("b/a.py")
+        self.create_file("main.py")
+        with self.assertLogs(level='WARNING') as logs:
+            results = nxlc.LineCounter().analyze_directory(self.test_path)
+        self.assertEqual(results['languages']['Python']['files'], 2)
+        self.assertIn('[z-a]/**', logs.output[0])
+
+    def test_ignored_without_git(self):
+        """Attributes are a git feature and follow the --no-git switch"""
+        self.create_file(".gitattributes", "libs/** linguist-vendored\n")
+        self.create_file("libs/a.py")
+        results = nxlc.LineCounter().analyze_directory(self.test_path, no_git=True)
+        self.assertEqual(results['languages']['Python']['files'], 1)
+        self.assertFalse(results['using_gitattributes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for nested .gitignore files, .git/info/exclude and core.excludesFile
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestGitIgnoreStack(unittest.TestCase):
+    """Test git-compatible exclude rules during the walk"""
+
+    def setUp(self):
+        """Create a temporary repository with an isolated git configuration"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = Path(self.temp_dir) / 'repo'
+        (self.root / '.git' / 'info').mkdir(parents=True)
+        self.saved_env = {name: os.environ.get(name) for name in ('GIT_CONFIG_GLOBAL', 'XDG_CONFIG_HOME')}
+        os.environ['GIT_CONFIG_GLOBAL'] = str(Path(self.temp_dir) / 'gitconfig')
+        os.environ['XDG_CONFIG_HOME'] = str(Path(self.temp_dir) / 'config')
+
+    def tearDown(self):
+        """Restore the environment and clean up"""
+        for name, value in self.saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, relative: str, content: str = "x = 1\n") -> Path:
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        return path
+
+    def counted(self):
+        counter = nxlc.LineCounter()
+        counter.analyze_directory(self.root)
+        return sorted(Path(path).as_posix() for path in counter.file_line_counts
+                      if Path(path).name != '.gitignore')
+
+    def test_nested_gitignore_anchoring(self):
+        """Patterns match relative to the directory of their .gitignore"""
+        self.write('.gitignore', '/out\n*.gen.py\n')
+        self.write('sub/.gitignore', '/gen/\nbuild/\n!keep.gen.py\n')
+        for relative in ('out/a.py', 'sub/out/a.py', 'gen/a.py', 'sub/gen/a.py', 'sub/x/build/a.py',
+                         'a.gen.py', 'sub/a.gen.py', 'sub/keep.gen.py', 'main.py'):
+            self.write(relative)
+        self.assertEqual(self.counted(), ['gen/a.py', 'main.py', 'sub/keep.gen.py', 'sub/out/a.py'])
+
+    def test_excluded_directories_are_pruned(self):
+        """Nothing under an ignored directory is listed or re-included"""
+        self.write('.gitignore', 'out/\n!out/keep.py\n')
+        self.write('out/keep.py')
+        self.write('main.py')
+        self.assertEqual(self.counted(), ['main.py'])
+
+    def test_info_exclude_and_excludes_file(self):
+        """Repository and global excludes apply with lower precedence than .gitignore"""
+        (self.root / '.git' / 'info' / 'exclude').write_text('local_only.py\n*.tmp.py\n')
+        excludes = Path(self.temp_dir) / 'global_ignore'
+        excludes.write_text('global_only.py\n')
+        Path(os.environ['GIT_CONFIG_GLOBAL']).write_text(f'[core]\n\texcludesFile = {excludes.as_posix()}\n')
+        self.write('.gitignore', '!keep.tmp.py\n')
+        for relative in ('local_only.py', 'global_only.py', 'a.tmp.py', 'keep.tmp.py', 'main.py'):
+            self.write(relative)
+        self.assertEqual(self.counted(), ['keep.tmp.py', 'main.py'])
+
+    def test_default_excludes_file(self):
+        """Without core.excludesFile, git's XDG ignore file is used"""
+        self.assertEqual(nxlc.GitIgnore.excludes_file(self.root),
+                         Path(os.environ['XDG_CONFIG_HOME']) / 'git' / 'ignore')
+
+    def test_linked_worktree_git_dir(self):
+        """A .git file points at the git directory; info/exclude lives in the common one"""
+        common = Path(self.temp_dir) / 'main.git'
+        worktree_dir = common / 'worktrees' / 'wt'
+        worktree_dir.mkdir(parents=True)
+        (worktree_dir / 'commondir').write_text('../..\n')
+        worktree = Path(self.temp_dir) / 'wt'
+        worktree.mkdir()
+        (worktree / '.git').write_text(f'gitdir: {worktree_dir}\n')
+        self.assertEqual(nxlc.GitIgnore.git_dir(worktree), common.resolve())
+
+    def test_bracket_class_with_literal_close(self):
+        """A ']' opening a class is a member; an invalid class is skipped, not fatal"""
+        self.write('.gitignore', 'foo[]]bar.py\n[!]]x.py\n[z-a].py\n')
+        for relative in ('foo]bar.py', 'zx.py', ']x.py', 'b.py', 'main.py'):
+            self.write(relative)
+        with self.assertLogs(level='WARNING') as logs:
+            counted = self.counted()
+        self.assertEqual(counted, [']x.py', 'b.py', 'main.py'])
+        self.assertIn('[z-a].py', logs.output[0])
+
+    def test_no_git_disables_all_sources(self):
+        """--no-git ignores every exclude source"""
+        (self.root / '.git' / 'info' / 'exclude').write_text('main.py\n')
+        self.write('.gitignore', 'other.py\n')
+        self.write('main.py')
+        self.write('other.py')
+        counter = nxlc.LineCounter()
+        counter.analyze_directory(self.root, no_git=True)
+        self.assertEqual(len(counter.file_line_counts), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
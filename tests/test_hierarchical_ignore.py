@@ -24,9 +24,13 @@ from nxlc import (
     PatternMatcher,
     CacheStrategy,
     LRUCacheStrategy,
+    SingleThreadLRUCacheStrategy,
+    BoundedDictCacheStrategy,
+    ShardedLRUCacheStrategy,
     IgnoreFileReader,
     IgnoreContext,
     IgnoreContextFactory,
+    DirectoryIgnoreState,
     LineCounterPatternAdapter,
     HierarchicalConfigContext
 )
@@ -200,6 +204,42 @@ class TestCacheStrategy(HierarchicalIgnoreTestBase):
         
         self.assertIsNone(cache.get("key1"))
         self.assertIsNone(cache.get("key2"))
+        
+    def test_strategy_variants(self):
+        """Every strategy evicts the least recently used key and counts hits, misses and evictions."""
+        strategies = [LRUCacheStrategy(max_size=3), SingleThreadLRUCacheStrategy(max_size=3),
+                      BoundedDictCacheStrategy(max_size=3), ShardedLRUCacheStrategy(max_size=3, shards=1)]
+        for cache in strategies:
+            with self.subTest(strategy=type(cache).__name__):
+                cache.set("key1", True)
+                cache.set("key2", False)
+                cache.set("key3", True)
+                self.assertEqual(cache.get("key1"), True)
+                cache.set("key4", False)
+                self.assertIsNone(cache.get("key2"))
+                self.assertEqual(cache.get("key3"), True)
+                self.assertEqual(cache.get("key4"), False)
+                self.assertEqual(cache.size(), 3)
+                self.assertEqual(cache.stats(), {'hits': 3, 'misses': 1, 'evictions': 1})
+                cache.clear()
+                self.assertEqual(cache.size(), 0)
+        
+    def test_sharded_cache_splits_keys(self):
+        """Sharded caches spread keys over shards and sum their counters."""
+        cache = ShardedLRUCacheStrategy(max_size=64, shards=4)
+        for i in range(32):
+            cache.set(f"key{i}", i % 2 == 0)
+        self.assertEqual(cache.size(), 32)
+        self.assertGreater(sum(1 for shard in cache.shards if shard.size()), 1)
+        self.assertTrue(all(cache.get(f"key{i}") == (i % 2 == 0) for i in range(32)))
+        self.assertEqual(cache.stats()['hits'], 32)
+    
+    def test_sharded_cache_keeps_total_capacity(self):
+        """Shard sizes add up to max_size, with at least one entry per shard."""
+        cache = ShardedLRUCacheStrategy(max_size=100, shards=16)
+        self.assertEqual(sum(shard.max_size for shard in cache.shards), 100)
+        cache = ShardedLRUCacheStrategy(max_size=3, shards=16)
+        self.assertTrue(all(shard.max_size == 1 for shard in cache.shards))
 
 
 class TestIgnoreFileReader(HierarchicalIgnoreTestBase):
@@ -341,6 +381,52 @@ class TestIgnoreContext(HierarchicalIgnoreTestBase):
         self.assertEqual(cache.get("test.txt"), True)
 
 
+class TestDirectoryIgnoreState(HierarchicalIgnoreTestBase):
+    """Test directory verdicts carried down the walk."""
+    
+    def test_state_propagation(self):
+        """Directories are fully ignored, fully included or checked per entry."""
+        self.fs.create_nxlcignore(".", ["docs/*", "!docs/api/*.md"])
+        self.fs.create_nxlcignore("lib", ["*.tmp"])
+        adapter = LineCounterPatternAdapter(self.counter)
+        root = IgnoreContext(self.test_path, adapter)
+        lib = IgnoreContext(self.test_path / "lib", adapter, parent_context=root)
+        
+        state = DirectoryIgnoreState.for_context(self.test_path, root)
+        self.assertIsNone(state.ignored)
+        self.assertEqual(state.ignoring_context("docs"), None)
+        
+        # Nothing below src can match, and the verdict is shared below it
+        src = state.descend(self.test_path / "src")
+        self.assertIs(src.ignored, False)
+        self.assertIs(src.descend(self.test_path / "src" / "deep"), src)
+        
+        # Only lib's own patterns are left to check in lib
+        lib_state = state.descend(self.test_path / "lib", lib)
+        self.assertIsNone(lib_state.ignored)
+        self.assertEqual([level[0] for level in lib_state.levels], [lib])
+        self.assertIs(lib_state.ignoring_context("a.tmp"), lib)
+        self.assertIsNone(lib_state.ignoring_context("a.py"))
+        
+        docs = state.descend(self.test_path / "docs")
+        self.assertIs(docs.descend(self.test_path / "docs" / "guide").ignored, True)
+        api = docs.descend(self.test_path / "docs" / "api")
+        self.assertIsNone(api.ignoring_context("index.md"))
+        self.assertIs(api.ignoring_context("index.py"), root)
+        
+    def test_state_matches_context(self):
+        """The walk ignores the same entries as IgnoreContext.should_ignore."""
+        self.fs.create_nxlcignore(".", ["docs/*", "!docs/api", "!docs/api/*.md", "build/"])
+        self.fs.create_nxlcignore("src", ["*.txt", "!keep.txt"])
+        for relative in ("docs/a.md", "docs/guide/b.md", "docs/api/c.md", "docs/api/d.py",
+                         "src/a.txt", "src/keep.txt", "src/app.py", "src/build/out.py", "main.py"):
+            self.fs.create_file(relative, "x = 1\n")
+        self.counter.analyze_directory(self.test_path)
+        counted = sorted(Path(path).as_posix() for path in self.counter.file_line_counts
+                         if Path(path).name != ".nxlcignore")
+        self.assertEqual(counted, ["docs/api/c.md", "main.py", "src/app.py", "src/keep.txt"])
+
+
 # ============================================================================
 # INTEGRATION TESTS
 # ============================================================================
@@ -807,6 +893,25 @@ class TestFactoryPattern(HierarchicalIgnoreTestBase):
         
         self.assertIsNotNone(context)
         self.assertTrue(context.case_insensitive)
+        
+    def test_factory_cache_strategy_by_name(self):
+        """Factories build the named cache strategy and report its counters."""
+        adapter = LineCounterPatternAdapter(self.counter)
+        self.fs.create_nxlcignore(".", ["*.txt"])
+        factory = IgnoreContextFactory(pattern_matcher=adapter, cache_strategy='sharded', cache_size=64)
+        context = factory.create_context(self.test_path)
+        self.assertIsInstance(context.cache, ShardedLRUCacheStrategy)
+        self.assertEqual(context.cache.max_size, 64)
+        
+        context.should_ignore(self.test_path / "a.txt")
+        context.should_ignore(self.test_path / "a.txt")
+        self.assertEqual(factory.cache_stats(), {'hits': 1, 'misses': 1, 'evictions': 0})
+        
+        with self.assertRaises(ValueError):
+            IgnoreContextFactory(pattern_matcher=adapter, cache_strategy='fifo')
+        with self.assertRaises(ValueError):
+            IgnoreContextFactory(pattern_matcher=adapter, cache_strategy='lru',
+                                 cache_strategy_factory=LRUCacheStrategy)
 
 
 class TestHierarchicalConfigContext(HierarchicalIgnoreTestBase):
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled ignore pattern matching
+"""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+    """Test IgnoreMatcher against the pattern semantics it compiles"""
+
+    def test_pattern_classes(self):
+        """Directory, '**/' and plain patterns match components, basenames and paths"""
+        matcher = nxlc.IgnoreMatcher(['build/', '**/cache/', '**/*.min.js', '*.log', 'docs/*.md', 'src/**/gen'])
+        cases = {
+            'build': True, 'src/build/a.py': True, 'builder/a.py': False,
+            'a/cache/b': True, 'cache': True, 'caches/b': False,
+            'static/app.min.js': True, 'app.js': False,
+            'debug.log': True, 'logs/deep/debug.log': True,
+            'docs/intro.md': True, 'docs/api/ref.md': True, 'intro.md': False,
+            # Only leading '**/' patterns have ever matched
+            'src/a/gen': False,
+        }
+        for path, expected in cases.items():
+            with self.subTest(path=path):
+                self.assertEqual(matcher.matches(Path(path)), expected)
+
+    def test_last_match_wins(self):
+        """Negations re-include, and later patterns override earlier ones"""
+        matcher = nxlc.IgnoreMatcher(['*.txt', '!keep*.txt', 'keep_not.txt', '!a/'])
+        self.assertTrue(matcher.matches(Path('notes.txt')))
+        self.assertFalse(matcher.matches(Path('keep.txt')))
+        self.assertTrue(matcher.matches(Path('keep_not.txt')))
+        self.assertFalse(matcher.matches(Path('a/notes.txt')))
+        self.assertFalse(nxlc.IgnoreMatcher(['!*.py']).matches(Path('a.py')))
+        self.assertFalse(nxlc.IgnoreMatcher([]).matches(Path('a.py')))
+
+    def test_brackets_and_escapes(self):
+        """Bracket expressions follow fnmatch; unclosed brackets are literal"""
+        matcher = nxlc.IgnoreMatcher(['file[0-9].c', 'x[!ab].c', '[', 'a\\b'])
+        self.assertTrue(matcher.matches(Path('file7.c')))
+        self.assertFalse(matcher.matches(Path('fileA.c')))
+        self.assertTrue(matcher.matches(Path('xc.c')))
+        self.assertFalse(matcher.matches(Path('xa.c')))
+        self.assertTrue(matcher.matches(Path('[')))
+        self.assertTrue(matcher.matches(Path('a/b')))
+
+    def test_index_keeps_pattern_order(self):
+        """Indexed and regex patterns interleave with exact last-match-wins results"""
+        patterns = ['*.py', '!src/gen/keep*.py', 'gen/', '!tests', 'x?.py', '!*.py', 'docs/*.py',
+                    '!docs/ok.py', 'docs/ok.py']
+        matcher = nxlc.IgnoreMatcher(patterns)
+        index = matcher.index
+        self.assertEqual(index.extensions[0], {'.py': 5})
+        self.assertEqual(list(index.prefixes), ['src/gen', 'docs'])
+        self.assertEqual(index.paths[0], {'docs/ok.py': 8})
+        self.assertEqual(len(index.runs), 1)
+        cases = {'a.py': False, 'docs/a.py': True, 'docs/sub/a.py': True, 'docs/ok.py': True,
+                 'xa.py': False, 'src/gen/a.c': True, 'tests': False}
+        for path, expected in cases.items():
+            with self.subTest(path=path):
+                self.assertEqual(matcher.matches(Path(path)), expected)
+
+    def test_git_index(self):
+        """Git patterns use the same index, with directory-only keys"""
+        rules = nxlc.GitIgnore.from_patterns(Path('/repo'), ['out/', '*.o', '/build', 'src/gen/*.c',
+                                                               '!src/gen/keep.c', 'a*b'])
+        index = rules.levels[0][1]
+        self.assertEqual(index.names[1], {'out': 0})
+        self.assertEqual(index.paths[0], {'build': 2, 'src/gen/keep.c': 4})
+        self.assertEqual(list(index.prefixes), ['src/gen'])
+        cases = [('/repo/x/out', True, True), ('/repo/x/out', False, False), ('/repo/a/b.o', False, True),
+                 ('/repo/x/build', True, False), ('/repo/src/gen/x.c', False, True),
+                 ('/repo/src/gen/keep.c', False, False), ('/repo/src/gen/sub/x.c', False, False),
+                 ('/repo/d/axxb', False, True)]
+        for path, is_dir, expected in cases:
+            with self.subTest(path=path, is_dir=is_dir):
+                self.assertEqual(rules.ignored(Path(path), is_dir), expected)
+
+    def test_below_directory(self):
+        """Directories get the verdict of every path below them when the patterns fix one"""
+        matcher = nxlc.IgnoreMatcher(['docs/*', '!docs/api/*.md', 'src/gen/x.c'])
+        self.assertEqual(matcher.index.subtrees[0], {'docs': 0})
+        cases = {'': (-1, None), 'lib': (-1, False), 'docs': (0, None), 'docs/guide': (0, True),
+                 'docs/api': (0, None), 'src': (-1, None), 'src/lib': (-1, False)}
+        for directory, expected in cases.items():
+            with self.subTest(directory=directory):
+                self.assertEqual(matcher.below(directory), expected)
+        self.assertFalse(matcher.matches_relative('docs/api/a.md', 0))
+        self.assertTrue(matcher.matches_relative('docs/api/a.py', 0))
+        # Component patterns match everything below a matching directory, and may match deeper
+        matcher = nxlc.IgnoreMatcher(['build/', '!*.py'])
+        self.assertEqual(matcher.below('a/build'), (0, None))
+        self.assertEqual(nxlc.IgnoreMatcher(['build/']).below('a/build/x', 0), (0, True))
+        self.assertEqual(nxlc.IgnoreMatcher(['build/']).below('a'), (-1, None))
+
+    def test_many_stars(self):
+        """Patterns with many wildcards do not backtrack exponentially"""
+        matcher = nxlc.IgnoreMatcher(['*a*a*a*a*a*a*a*a*b'])
+        start = time.perf_counter()
+        self.assertFalse(matcher.matches(Path('a' * 60)))
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_compile_is_cached(self):
+        """Pattern lists are compiled once and compiled matchers pass through"""
+        matcher = nxlc.IgnoreMatcher.compile(['*.tmp', 'out/'])
+        self.assertIs(nxlc.IgnoreMatcher.compile(['*.tmp', 'out/']), matcher)
+        self.assertIs(nxlc.IgnoreMatcher.compile(matcher), matcher)
+
+    def test_line_counter_entry_points(self):
+        """is_gitignored and is_nxlcignored accept lists or compiled matchers"""
+        counter = nxlc.LineCounter()
+        patterns = ['*.log', '!important.log']
+        self.assertTrue(counter.is_gitignored(Path('a.log'), patterns))
+        self.assertFalse(counter.is_gitignored(Path('important.log'), patterns))
+        self.assertFalse(counter.is_nxlcignored(Path('important.log'), nxlc.IgnoreMatcher(patterns)))
+
+    def test_context_compiles_once(self):
+        """IgnoreContext keeps the compiled form of its .nxlcignore"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / '.nxlcignore').write_text('*.log\n!keep.log\n')
+            adapter = nxlc.LineCounterPatternAdapter(nxlc.LineCounter())
+            context = nxlc.IgnoreContext(root, adapter)
+            self.assertIsInstance(context.compiled_patterns, nxlc.IgnoreMatcher)
+            self.assertTrue(context.should_ignore(root / 'a.log'))
+            self.assertFalse(context.should_ignore(root / 'keep.log'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Tests for NXLC language detection (index, filename rules, conflicts, shebangs)
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestDetectionIndex(unittest.TestCase):
+    """Test the precompiled extension/filename index"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_index_covers_every_extension(self):
+        """Every declared extension resolves to a language that declares it"""
+        index = nxlc.LanguageDefinitions.DETECTION_INDEX
+        for language, entries in nxlc.LanguageDefinitions.LANGUAGE_EXTENSIONS.items():
+            for entry in entries:
+                key = entry.lower()
+                table = index.extensions if key.startswith('.') else index.filenames
+                self.assertIn(key, table)
+                if key not in index.ambiguous:
+                    self.assertEqual(table[key], language)
+
+    def test_ambiguous_extensions_are_explicit(self):
+        """Shared extensions resolve to the declared default, not dict order"""
+        index = nxlc.LanguageDefinitions.DETECTION_INDEX
+        self.assertEqual(index.ambiguous['.sql'], ('SQL', 'PL/SQL'))
+        for key in index.ambiguous:
+            self.assertEqual(index.extensions.get(key) or index.filenames.get(key),
+                             nxlc.LanguageDefinitions.EXTENSION_DEFAULTS[key])
+
+    def test_missing_default_raises(self):
+        """An ambiguity without an explicit default is rejected at build time"""
+        with self.assertRaises(ValueError):
+            nxlc.DetectionIndex({'A': ['.x'], 'B': ['.x']}, {})
+
+    def test_detect_language_uses_index(self):
+        """Detection is case-insensitive on the extension"""
+        counter = nxlc.LineCounter()
+        for name, expected in (('a.SQL', 'SQL'), ('b.ini', 'Configuration'),
+                               ('c.Rmd', 'R'), ('d.xsd', 'XSD')):
+            path = self.temp_path / name
+            path.write_text("x\n")
+            self.assertEqual(counter.detect_language(path), expected)
+
+
+class TestFilenameRules(unittest.TestCase):
+    """Test the compiled special-filename rule engine"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.rules = nxlc.LanguageDefinitions.FILENAME_RULE_SET
+
+    def test_special_names(self):
+        """Declared rules match exact names, prefixes, suffixes and globs"""
+        cases = {
+            'Makefile': 'Makefile',
+            'GNUmakefile': 'Makefile',
+            'Makefile.am': 'Makefile',
+            'BSDmakefile': 'Makefile',
+            'rules.mk': 'Makefile',
+            'Dockerfile': 'Dockerfile',
+            'Dockerfile.dev': 'Dockerfile',
+            'app.dockerfile': 'Dockerfile',
+            'README': 'README',
+            'README.md': 'README',
+            'simpleREADME': 'README',
+            '.gitignore': 'Configuration',
+            '.env.local': 'Configuration',
+            'settings.py.example': 'Configuration',
+        }
+        for filename, expected in cases.items():
+            with self.subTest(filename=filename):
+                self.assertEqual(self.rules.match(filename), expected)
+
+    def test_no_substring_misfires(self):
+        """Names merely containing a keyword are left to extension lookup"""
+        for filename in ('readme_parser.py', 'makefile_utils.py', 'dockerfile_lint.go', 'main.c'):
+            with self.subTest(filename=filename):
+                self.assertIsNone(self.rules.match(filename))
+
+    def test_rule_precedence(self):
+        """Exact names beat patterns; earlier pattern rules beat later ones"""
+        rules = nxlc.FilenameRuleSet([
+            ('suffix', '.example', 'Configuration'),
+            ('prefix', 'readme', 'README'),
+            ('exact', 'readme.example', 'Text'),
+        ])
+        self.assertEqual(rules.match('README.example'), 'Text')
+        self.assertEqual(rules.match('readme.txt.example'), 'Configuration')
+        self.assertEqual(rules.match('readme.txt'), 'README')
+        self.assertEqual(nxlc.LanguageDefinitions.FILENAME_RULE_SET.match('Makefile.example'), 'Makefile')
+
+    def test_unknown_rule_kind(self):
+        """Unknown rule kinds are rejected when compiling"""
+        with self.assertRaises(ValueError):
+            nxlc.FilenameRuleSet([('regex', '.*', 'Text')])
+
+    def test_detect_language_uses_rules(self):
+        """detect_language no longer classifies readme_parser.py as README"""
+        temp_path = Path(tempfile.mkdtemp())
+        try:
+            path = temp_path / 'readme_parser.py'
+            path.write_text("import sys\n")
+            self.assertEqual(nxlc.LineCounter().detect_language(path), 'Python')
+        finally:
+            import shutil
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+
+class TestConflictResolution(unittest.TestCase):
+    """Test scored conflict resolution with directory priors"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+        self.counter = nxlc.LineCounter()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, relative: str, content: str = "") -> Path:
+        path = self.temp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        return path
+
+    def test_scorer_counts_hits_per_language(self):
+        """One alternation attributes every keyword hit to its language"""
+        scorer = nxlc.LanguageDefinitions.CONFLICT_SCORERS['.h']
+        scores = scorer.score("namespace a {\nclass B : public C {\n public:\n};\n}\n")
+        self.assertEqual(scores['C++'], 3)
+        self.assertEqual(scores['Objective-C'], 0)
+
+    def test_prior_decides_without_reading(self):
+        """Sibling .cpp files decide an ambiguous header from priors alone"""
+        self.write("cpp/widget.cpp", "int main() {}\n")
+        header = self.write("cpp/widget.h", "int widget(void);\n")
+        self.assertEqual(self.counter.detect_language(header), 'C++')
+        self.assertEqual(self.counter.conflict_decisions[('.h', 'C++', 'prior')], 1)
+
+    def test_content_decides_mixed_directory(self):
+        """With mixed priors the content score decides"""
+        self.write("mixed/a.c", "")
+        self.write("mixed/b.cpp", "")
+        header = self.write("mixed/c.h", "@interface Foo\n@property int x;\n@end\n")
+        self.assertEqual(self.counter.detect_language(header), 'Objective-C')
+        self.assertEqual(self.counter.conflict_decisions[('.h', 'Objective-C', 'content')], 1)
+
+    def test_default_without_evidence(self):
+        """No priors and no keywords fall back to the extension default"""
+        header = self.write("lonely/x.h", "int x;\n")
+        self.assertEqual(self.counter.detect_language(header), 'C')
+        script = self.write("lonely/y.pl", "1.\n")
+        self.assertEqual(self.counter.detect_language(script), 'Perl')
+
+    def test_priors_count_only_scanned_files(self):
+        """Directories and ignored files do not vote for a conflicted extension"""
+        self.write("proj/.nxlcignore", "old.cpp\n")
+        self.write("proj/old.cpp", "int main() {}\n")
+        (self.temp_path / "proj" / "modules.cpp").mkdir()
+        self.write("proj/api.h", "int api(void);\n")
+        results = self.counter.analyze_directory(self.temp_path / "proj", no_git=True)
+        self.assertEqual(set(results['languages']), {'C'})
+        self.assertNotIn(('.h', 'C++', 'prior'), self.counter.conflict_decisions)
+
+    def test_debug_reports_decisions(self):
+        """Debug output lists the conflict decision distribution"""
+        self.write("src/main.cpp", "int main() {}\n")
+        self.write("src/main.h", "int f();\n")
+        results = self.counter.analyze_directory(self.temp_path, no_git=True, debug=True)
+        self.assertEqual(results['conflict_decisions'], {('.h', 'C++', 'prior'): 1})
+        output = nxlc.format_results(results, nxlc.Colors(enabled=False))
+        self.assertIn(".h -> C++ (prior): 1 files", output)
+
+
+class TestShebangAndModelines(unittest.TestCase):
+    """Test the compiled shebang parser and modeline detection"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+        self.parser = nxlc.LanguageDefinitions.SHEBANG_PARSER
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_shebang_interpreters(self):
+        """env, env -S, versioned and path-qualified interpreters are parsed"""
+        cases = {
+            '#!/nix/store/abc-shellutils/bin/lua': 'Lua',
+            '#!/usr/bin/env python3.12': 'Python',
+            '#!/usr/bin/env -S python3 -u': 'Python',
+            '#!/usr/bin/env -S NODE_ENV=prod node --harmony': 'JavaScript',
+            '#!/usr/bin/env -i ruby2.7': 'Ruby',
+            '#! /usr/bin/perl -w': 'Perl',
+            '#!/bin/sh': 'Shell',
+            '#!/usr/bin/env': 'Unknown',
+            'print("no shebang")': 'Unknown',
+        }
+        for line, expected in cases.items():
+            with self.subTest(line=line):
+                self.assertEqual(self.parser.detect_shebang(line), expected)
+
+    def test_modelines(self):
+        """vim and emacs modelines are recognized in the head and tail"""
+        self.assertEqual(self.parser.detect_modeline("# -*- mode: python; coding: utf-8 -*-\n"), 'Python')
+        self.assertEqual(self.parser.detect_modeline("#!/opt/tool\n# -*- ruby -*-\n"), 'Ruby')
+        self.assertEqual(self.parser.detect_modeline("a\nb\n# vim: set ft=sh :\n"), 'Shell')
+        self.assertEqual(self.parser.detect_modeline("a\n", "b\n# vim:filetype=perl\n"), 'Perl')
+        self.assertEqual(self.parser.detect_modeline("Index: ft=python\n"), 'Unknown')
+
+    def test_interpreter_results_are_memoized(self):
+        """Repeated interpreter strings are answered from the cache"""
+        parser = nxlc.ShebangParser({'python': 'Python'}, {}, {})
+        parser.detect_shebang('#!/usr/bin/env python3')
+        self.assertEqual(parser._cache, {'/usr/bin/env python3': 'Python'})
+
+    @unittest.skipIf(sys.platform.startswith('win'), "requires POSIX executable bits")
+    def test_non_executable_extensionless_files_are_not_read(self):
+        """Extensionless files without the executable bit skip content sniffing"""
+        script = self.temp_path / 'tool'
+        script.write_text("#!/usr/bin/env python3\nprint('hi')\n")
+        script.chmod(0o644)
+
+        counter = nxlc.LineCounter()
+        reads = []
+        original = counter._read_head
+        counter._read_head = lambda path: reads.append(path) or original(path)
+
+        self.assertEqual(counter.detect_language(script), 'Unknown')
+        self.assertEqual(reads, [])
+
+        script.chmod(0o755)
+        self.assertEqual(counter.detect_language(script), 'Python')
+        self.assertEqual(reads, [script])
+
+    def test_tail_is_read_only_beyond_the_head(self):
+        """A trailing modeline is looked for past the head buffer only"""
+        counter = nxlc.LineCounter()
+        short = self.temp_path / 'short.unknownext'
+        short.write_text("x = 1\n# vim: ft=python\n")
+        nxlc.open = lambda *args, **kwargs: self.fail("short file reopened for its tail")
+        try:
+            self.assertEqual(counter._read_tail(short, short.stat().st_size), '')
+        finally:
+            del nxlc.open
+
+        long = self.temp_path / 'long.unknownext'
+        long.write_text("x = 1\n" * counter.HEAD_SIZE + "# vim: ft=python\n")
+        self.assertEqual(counter.classify_file(long).language, 'Python')
+
+
+class TestUserLanguageDefinitions(unittest.TestCase):
+    """Test user-defined languages merged into the built-in tables"""
+
+    DEFINITIONS = """
+[languages.Flow]
+extensions = [".flow", "Flowfile"]
+interpreters = ["flowrun"]
+single = ["//"]
+multi_start = ["/*"]
+multi_end = ["*/"]
+
+[languages.Rules]
+extensions = [".rules", ".h"]
+single = [";;"]
+"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+        self.cache_dir = self.temp_path / 'cache'
+        self.original_cache_dir = os.environ.get('NXLC_CACHE_DIR')
+        os.environ['NXLC_CACHE_DIR'] = str(self.cache_dir)
+        self.project = self.temp_path / 'project'
+        self.project.mkdir()
+        self.definitions = self.temp_path / 'languages.toml'
+        self.definitions.write_text(self.DEFINITIONS)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        if self.original_cache_dir is None:
+            os.environ.pop('NXLC_CACHE_DIR', None)
+        else:
+            os.environ['NXLC_CACHE_DIR'] = self.original_cache_dir
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_merged_tables(self):
+        """User languages extend the tables without touching the class defaults"""
+        defs = nxlc.LanguageDefinitions(self.definitions)
+        self.assertEqual(defs.DETECTION_INDEX.lookup('main.flow', '.flow'), 'Flow')
+        self.assertEqual(defs.DETECTION_INDEX.lookup('Flowfile', ''), 'Flow')
+        self.assertEqual(defs.DETECTION_INDEX.lookup('x.h', '.h'), 'Rules')
+        self.assertNotIn('.h', defs.CONFLICT_EXTENSIONS)
+        self.assertEqual(defs.COMMENT_PATTERNS['Rules']['single'], [';;'])
+        self.assertEqual(defs.SHEBANG_PARSER.detect_shebang('#!/usr/bin/env flowrun'), 'Flow')
+        self.assertEqual(nxlc.LanguageDefinitions.DETECTION_INDEX.lookup('main.flow', '.flow'), None)
+        self.assertIn('.h', nxlc.LanguageDefinitions.CONFLICT_EXTENSIONS)
+
+    def test_compiled_form_is_cached_by_hash(self):
+        """A second load reads the cached compiled form instead of recompiling"""
+        nxlc.LanguageDefinitions(self.definitions)
+        cached = list((self.cache_dir / 'languages').glob('*.json'))
+        self.assertEqual(len(cached), 1)
+
+        original = nxlc.LanguageDefinitions.compile_user_definitions
+        calls = []
+        nxlc.LanguageDefinitions.compile_user_definitions = classmethod(
+            lambda cls, definitions: calls.append(definitions) or original(definitions))
+        try:
+            defs = nxlc.LanguageDefinitions(self.definitions)
+            self.assertEqual(calls, [])
+            self.assertEqual(defs.DETECTION_INDEX.lookup('a.rules', '.rules'), 'Rules')
+
+            self.definitions.write_text(self.DEFINITIONS.replace('.rules', '.rule'))
+            defs = nxlc.LanguageDefinitions(self.definitions)
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(defs.DETECTION_INDEX.lookup('a.rule', '.rule'), 'Rules')
+        finally:
+            nxlc.LanguageDefinitions.compile_user_definitions = original
+
+    def test_json_definitions(self):
+        """JSON files use the same schema"""
+        path = self.temp_path / 'languages.json'
+        path.write_text('{"languages": {"Tmplx": {"extensions": [".tmplx"], "single": ["##"]}}}')
+        defs = nxlc.LanguageDefinitions(path)
+        self.assertEqual(defs.DETECTION_INDEX.lookup('a.tmplx', '.tmplx'), 'Tmplx')
+
+    def test_invalid_definitions(self):
+        """Malformed definitions are rejected with a ValueError"""
+        cases = [
+            '{"languages": []}',
+            '{"languages": {"X": {"extension": [".x"]}}}',
+            '{"languages": {"X": {"extensions": ".x"}}}',
+            '{"languages": {"X": {"extensions": [".x"], "multi_start": ["<<"]}}}',
+            '{"languages": {"X": {"extensions": [".x"]}, "Y": {"extensions": [".X"]}}}',
+            '{"languages": ',
+        ]
+        path = self.temp_path / 'bad.json'
+        for content in cases:
+            with self.subTest(content=content):
+                path.write_text(content)
+                with self.assertRaises(ValueError):
+                    nxlc.LanguageDefinitions(path)
+
+    def test_counting_with_explicit_file(self):
+        """Custom comment markers are used when counting"""
+        (self.project / 'a.flow').write_text("// comment\nstep a\n/* block\n*/\n\n")
+        counter = nxlc.LineCounter(language_definitions=self.definitions)
+        results = counter.analyze_directory(self.project, no_git=True)
+        flow = results['languages']['Flow']
+        self.assertEqual((flow['files'], flow['total_lines'], flow['code_lines'], flow['comment_lines']),
+                         (1, 5, 1, 3))
+        self.assertEqual(results['language_definitions'], str(self.definitions))
+
+    def test_per_repository_file(self):
+        """A .nxlc-languages file in the scanned root is picked up automatically"""
+        (self.project / '.nxlc-languages.toml').write_text(self.DEFINITIONS)
+        (self.project / 'a.rules').write_text(";; note\nrule\n")
+        counter = nxlc.LineCounter()
+        results = counter.analyze_directory(self.project, no_git=True)
+        self.assertIn('Rules', results['languages'])
+
+        other = self.temp_path / 'other'
+        other.mkdir()
+        (other / 'a.rules').write_text("rule\n")
+        results = counter.analyze_directory(other, no_git=True)
+        self.assertNotIn('Rules', results['languages'])
+
+    def test_invalid_per_repository_file_is_skipped(self):
+        """A broken per-repository file is reported and the built-ins are used"""
+        (self.project / '.nxlc-languages.json').write_text('{"languages": 1}')
+        (self.project / 'main.py').write_text("x = 1\n")
+        with self.assertLogs(level='WARNING'):
+            results = nxlc.LineCounter().analyze_directory(self.project, no_git=True)
+        self.assertIn('Python', results['languages'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled per-language comment classifiers
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestCommentClassifier(unittest.TestCase):
+    """Test CommentClassifier compilation, specialization and caching"""
+
+    def count(self, language, source):
+        return nxlc.LanguageDefinitions().comment_classifier(language).count(source.splitlines(True))
+
+    def test_specialized_loops(self):
+        """The counting loop matches the kinds of markers a language has"""
+        defs = nxlc.LanguageDefinitions()
+        self.assertEqual(defs.comment_classifier('Python').classify.__name__, '_count_scan')
+        self.assertEqual(defs.comment_classifier('Shell').classify.__name__, 'count_single_line')
+        self.assertEqual(defs.comment_classifier('NoSuchLanguage').classify.__name__, '_count_code')
+
+    def test_single_line_prefixes(self):
+        """Prefixes are matched after stripping and share one startswith call"""
+        classifier = nxlc.CommentClassifier({'single': ['#', '//'], 'multi_start': [], 'multi_end': []})
+        self.assertEqual(classifier.single_first, frozenset('#/'))
+        lines = ["# a\n", "  // b\n", "\n", "x = 1  # c\n", "/ d\n"]
+        self.assertEqual(classifier.count(lines), (2, 2))
+
+    def test_docstrings_and_data_strings(self):
+        """Docstrings are comments; strings used as data are code"""
+        classifier = nxlc.LanguageDefinitions().comment_classifier('Python')
+        lines = ['"""Doc\n', 'still doc\n', '"""\n', 'x = 1\n', "y = \'\'\'a\'\'\' + \"\"\"b\"\"\"\n", '# c\n']
+        self.assertEqual(classifier.count(lines), (2, 4))
+        self.assertEqual(classifier.count(['x = """\n', 'data # not a comment\n', '"""\n']), (3, 0))
+
+    def test_markers_inside_strings(self):
+        """Comment markers inside string literals are code"""
+        self.assertEqual(self.count('C', 'char *s = "/* not */";\nputs("// no");\n'), (2, 0))
+        self.assertEqual(self.count('JavaScript', 'const t = `a\n// inside template\n`;\n'), (3, 0))
+        self.assertEqual(self.count('Python', "s = '#'  # real\n"), (1, 0))
+
+    def test_block_comments_span_lines(self):
+        """Block comments end at their end marker, with code around them kept as code"""
+        source = 'int a; /* c\n * more\n */ int b;\n/* only */\n\n// x\n'
+        self.assertEqual(self.count('C', source), (2, 3))
+
+    def test_nested_comments(self):
+        """Nesting languages need one end marker per start marker"""
+        self.assertEqual(self.count('Haskell', '{- a {- nested -}\nstill -}\nmain = 1\n'), (1, 2))
+
+    def test_line_start_markers(self):
+        """Column markers only count at the start of a line"""
+        self.assertEqual(self.count('FORTRAN', 'C comment\n      CALL X\n      CX = 1\n'), (2, 1))
+        self.assertEqual(self.count('Ruby', '=begin\nfoo\n=end\nx = 1\n'), (1, 3))
+
+    def test_spaced_hash(self):
+        """A hash comment must follow whitespace in hash-family languages"""
+        self.assertEqual(self.count('Shell', 'echo ${#var}\n  # c\nx=1 # trailing\n'), (2, 1))
+
+    def test_single_line_buffer(self):
+        """Whole buffers are counted, including a last line without a newline"""
+        classifier = nxlc.LanguageDefinitions().comment_classifier('Shell')
+        text = "#!/bin/sh\n\n  # note\necho '# no' # yes\n\t\nexit 0"
+        self.assertEqual(classifier.count_buffer(text), (6, 2, 2))
+        self.assertEqual(classifier.count_buffer(""), (0, 0, 0))
+        self.assertEqual(classifier.count_buffer("a=1\n\nb=2\n"), (3, 2, 0))
+        basic = nxlc.LanguageDefinitions().comment_classifier('BASIC')
+        self.assertEqual(basic.count_buffer("REM a\nREMARK = 1\n  ' b\n"), (3, 1, 2))
+
+    def test_generated_single_line_counters(self):
+        """Generated counters are shared by marker set and agree with the generic loop"""
+        defs = nxlc.LanguageDefinitions()
+        self.assertIs(defs.comment_classifier('Shell').classify, defs.comment_classifier('YAML').classify)
+        text = "#a\n  REM x\nREMARK\nC x\nCALL\n!f\n; s\n// c\n-- d\n'q\n\\ e\n\n"
+        for markers in (['#'], ['!', 'C', 'c'], ["'", 'REM'], [';', '#', '//'], ['--'], ["'", '\\']):
+            with self.subTest(markers=markers):
+                classifier = nxlc.CommentClassifier({'single': markers})
+                self.assertEqual(classifier.classify(text), classifier._count_single(text))
+        self.assertIs(nxlc.CommentClassifier.single_line_counter(('#', ';')),
+                      nxlc.CommentClassifier.single_line_counter((';', '#', '#')))
+
+    def test_code_only(self):
+        """Languages without comment syntax count every non-blank line as code"""
+        classifier = nxlc.CommentClassifier({})
+        self.assertEqual(classifier.count(["a\n", " \t\n", "b"]), (2, 0))
+
+    def test_cached_by_language(self):
+        """Classifiers are built once per language and shadowed by user definitions"""
+        defs = nxlc.LanguageDefinitions()
+        self.assertIs(defs.comment_classifier('Go'), nxlc.LanguageDefinitions().comment_classifier('Go'))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'languages.json'
+            path.write_text('{"languages": {"Go": {"extensions": [".go"], "single": [";"]}}}')
+            custom = nxlc.LanguageDefinitions(path)
+        self.assertEqual(custom.comment_classifier('Go').single, (';',))
+        self.assertEqual(defs.comment_classifier('Go').single, ('//',))
+
+
+
+class TestLineClassifier(unittest.TestCase):
+    """Test incremental chunk-fed counting"""
+
+    SOURCE = ('/* header\n * über\n */\r\nint main() {\r\n'
+              '    char *s = "/* no */"; // yes\n    return 0;\n}\n\n// end')
+
+    def feed_all(self, chunks, language='C', **kwargs):
+        classifier = nxlc.LineClassifier(language, **kwargs)
+        for chunk in chunks:
+            classifier.feed(chunk)
+        return classifier.finish()
+
+    def test_matches_whole_buffer_for_any_split(self):
+        """Splits inside lines, markers, multi-byte characters and CRLF pairs do not matter"""
+        data = self.SOURCE.encode('utf-8')
+        expected = self.feed_all([data])
+        self.assertEqual(expected, (9, 4, 4, 1))
+        for size in (1, 2, 3, 5, 8):
+            with self.subTest(size=size):
+                self.assertEqual(self.feed_all(data[i:i + size] for i in range(0, len(data), size)), expected)
+
+    def test_flush_carries_open_state(self):
+        """Buffered lines are classified early; an open block comment carries over"""
+        classifier = nxlc.LineClassifier('C')
+        classifier.FLUSH_SIZE = classifier._flush_at = 4
+        classifier.feed("int a;\n/* open\n")
+        self.assertEqual((classifier.total, classifier.code, classifier.comment), (2, 1, 1))
+        classifier.feed("still // */ int c;\nint b;\n")
+        self.assertEqual(classifier.total, 4)
+        self.assertEqual(classifier.finish(), (4, 3, 1, 0))
+
+    def test_flush_keeps_continued_strings(self):
+        """Lines ending in a backslash are not flushed apart from the next line"""
+        classifier = nxlc.LineClassifier('C')
+        classifier.FLUSH_SIZE = classifier._flush_at = 4
+        classifier.feed('char *s = "a \\\n')
+        self.assertEqual(classifier.total, 0)
+        classifier.feed('/* b */";\n')
+        self.assertEqual(classifier.finish(), (2, 2, 0, 0))
+
+    def test_str_chunks_and_encoding(self):
+        """Text chunks are accepted and bytes follow the given encoding"""
+        self.assertEqual(self.feed_all(["# a\r", "\nx = 1\n"], 'Python'), (2, 1, 1, 0))
+        self.assertEqual(self.feed_all(["-- a\nb\n".encode('utf-16')], 'SQL', encoding='utf-16'), (2, 1, 1, 0))
+        self.assertEqual(self.feed_all([], 'Python'), (0, 0, 0, 0))
+
+    def test_file_counting_uses_chunks(self):
+        """The file counter streams files through LineClassifier"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'main.c'
+            path.write_bytes(self.SOURCE.encode('utf-8'))
+            counter = nxlc.LineCounter()
+            counter.READ_CHUNK_SIZE = 3
+            self.assertEqual(counter.count_lines_in_file(path), (9, 4, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
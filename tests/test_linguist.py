@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for comprehensive mode (batched GitHub Linguist classification)
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+CANNED_BREAKDOWN = {
+    "Python": {"size": 10, "percentage": "50.00", "files": ["tool"]},
+    "Protocol Buffer": {"size": 10, "percentage": "50.00", "files": ["api/service.txt"]},
+}
+
+
+@unittest.skipIf(sys.platform.startswith('win'), "stub executable requires POSIX shebangs")
+class TestLinguistIntegration(unittest.TestCase):
+    """Test --comprehensive with a stub linguist executable"""
+
+    def setUp(self):
+        """Set up a project tree, a stub linguist and an isolated cache dir"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+        self.project = self.temp_path / 'project'
+        (self.project / 'api').mkdir(parents=True)
+        (self.project / 'tool').write_text("print('hi')\n")
+        (self.project / 'api' / 'service.txt').write_text("syntax = \"proto3\";\n// note\n")
+
+        # Stub emits canned JSON and records each invocation
+        self.calls = self.temp_path / 'calls.log'
+        self.stub = self.temp_path / 'linguist_stub'
+        self.stub.write_text(
+            f"#!{sys.executable}\n"
+            "import json, sys\n"
+            f"open({str(self.calls)!r}, 'a').write(' '.join(sys.argv[1:]) + '\\n')\n"
+            f"print(json.dumps({CANNED_BREAKDOWN!r}))\n"
+        )
+        self.stub.chmod(0o755)
+
+        self._old_cache = os.environ.get('NXLC_CACHE_DIR')
+        os.environ['NXLC_CACHE_DIR'] = str(self.temp_path / 'cache')
+        nxlc.LineCounter._linguist_memory_cache.clear()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        if self._old_cache is None:
+            os.environ.pop('NXLC_CACHE_DIR', None)
+        else:
+            os.environ['NXLC_CACHE_DIR'] = self._old_cache
+        nxlc.LineCounter._linguist_memory_cache.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def invocations(self):
+        return self.calls.read_text().splitlines() if self.calls.exists() else []
+
+    def test_linguist_map_overrides_detection(self):
+        """One Linguist run classifies the whole tree"""
+        counter = nxlc.LineCounter(use_comprehensive=True, linguist_cmd=str(self.stub))
+        results = counter.analyze_directory(self.project, no_git=True)
+
+        self.assertEqual(len(self.invocations()), 1)
+        self.assertIn('--breakdown', self.invocations()[0])
+        self.assertTrue(results['using_linguist'])
+        self.assertEqual(results['languages']['Python']['files'], 1)
+        # Linguist names are mapped onto ours; comments use our patterns
+        self.assertEqual(results['languages']['Protocol Buffers']['comment_lines'], 1)
+        self.assertNotIn('Text', results['languages'])
+
+    def test_missing_linguist_falls_back(self):
+        """Without Linguist, comprehensive mode uses built-in detection"""
+        counter = nxlc.LineCounter(use_comprehensive=True,
+                                   linguist_cmd=str(self.temp_path / 'missing'))
+        results = counter.analyze_directory(self.project, no_git=True)
+        self.assertFalse(results['using_linguist'])
+        self.assertIn('Text', results['languages'])
+
+    @unittest.skipIf(shutil.which('git') is None, "git not available")
+    def test_cache_keyed_by_tree_state(self):
+        """Unchanged trees reuse the cached map; changes trigger a new run"""
+        git = ['git', '-c', 'user.name=t', '-c', 'user.email=t@example.com']
+        subprocess.run(git + ['init', '-q'], cwd=self.project, check=True)
+        subprocess.run(git + ['add', '.'], cwd=self.project, check=True)
+        subprocess.run(git + ['commit', '-qm', 'init'], cwd=self.project, check=True)
+
+        nxlc.LineCounter(use_comprehensive=True, linguist_cmd=str(self.stub)).analyze_directory(self.project)
+        # A fresh process-level cache still hits the on-disk cache
+        nxlc.LineCounter._linguist_memory_cache.clear()
+        nxlc.LineCounter(use_comprehensive=True, linguist_cmd=str(self.stub)).analyze_directory(self.project)
+        self.assertEqual(len(self.invocations()), 1)
+
+        (self.project / 'new.py').write_text("x = 1\n")
+        nxlc.LineCounter(use_comprehensive=True, linguist_cmd=str(self.stub)).analyze_directory(self.project)
+        self.assertEqual(len(self.invocations()), 2)
+
+        # Editing an already-untracked file again is a new tree state
+        (self.project / 'new.py').write_text("x = 1\ny = 2\n")
+        nxlc.LineCounter(use_comprehensive=True, linguist_cmd=str(self.stub)).analyze_directory(self.project)
+        self.assertEqual(len(self.invocations()), 3)
+
+    def test_memory_cache_is_bounded(self):
+        """Only the most recently used Linguist maps stay in memory"""
+        counter = nxlc.LineCounter(use_comprehensive=True, linguist_cmd=str(self.stub))
+        fingerprints = iter(range(counter.LINGUIST_MEMORY_CACHE_SIZE + 2))
+        counter._tree_fingerprint = lambda directory, linguist: f"tree{next(fingerprints)}"
+        for _ in range(counter.LINGUIST_MEMORY_CACHE_SIZE + 2):
+            counter.load_linguist_languages(self.project)
+        cache = nxlc.LineCounter._linguist_memory_cache
+        self.assertEqual(len(cache), counter.LINGUIST_MEMORY_CACHE_SIZE)
+        self.assertNotIn('tree0', cache)
+        self.assertIn(f"tree{counter.LINGUIST_MEMORY_CACHE_SIZE + 1}", cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
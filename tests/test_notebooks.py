@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming Jupyter notebook counting
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+def notebook(cells, metadata=None):
+    """Serialized nbformat 4 notebook."""
+    return json.dumps({"cells": cells, "metadata": metadata or {}, "nbformat": 4, "nbformat_minor": 5},
+                      indent=1).encode()
+
+
+def code_cell(source, outputs=()):
+    return {"cell_type": "code", "execution_count": 1, "metadata": {"tags": ["source"]},
+            "outputs": list(outputs), "source": source}
+
+
+class TestNotebookClassifier(unittest.TestCase):
+    """Test cell extraction and counting"""
+
+    def count(self, data, chunk_size=None):
+        classifier = nxlc.NotebookClassifier()
+        chunk_size = chunk_size or len(data) or 1
+        for offset in range(0, len(data), chunk_size):
+            classifier.feed(data[offset:offset + chunk_size])
+        return classifier.finish()
+
+    def test_cells(self):
+        """Code cells use the kernel's rules; markdown and raw lines are comments"""
+        data = notebook([
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Title\n", "\n", "Text with \"quotes\"\\"]},
+            code_cell(["# comment\n", "x = 'é'\n", "\n", "def f():\n", "    \"\"\"Doc.\"\"\"\n", "    return 1"]),
+            {"cell_type": "raw", "metadata": {}, "source": "raw\n"},
+            code_cell([]),
+        ], {"kernelspec": {"language": "python", "name": "python3"}})
+        self.assertEqual(self.count(data), (10, 3, 5, 2))
+        for chunk_size in (1, 2, 3, 7):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.count(data, chunk_size), (10, 3, 5, 2))
+
+    def test_outputs_are_skipped(self):
+        """Output text, images and metadata never reach the counts"""
+        outputs = [{"output_type": "stream", "name": "stdout", "text": ["source\n", "\"cells\": [\n"]},
+                   {"output_type": "display_data", "metadata": {"source": "x"},
+                    "data": {"image/png": "iVBORw0KGgo\\" * 1000, "text/plain": ["[{\"source\": 1}]"]}}]
+        data = notebook([code_cell("x = 1\n", outputs)])
+        self.assertEqual(self.count(data), (1, 1, 0, 0))
+        self.assertEqual(self.count(data, 5), (1, 1, 0, 0))
+
+    def test_kernel_language(self):
+        """The kernelspec language wins; unknown kernels have no comment syntax"""
+        cells = [code_cell(["# note\n", "x <- 1\n", "// other\n"])]
+        cases = [({}, 'Python', (3, 2, 1, 0)),
+                 ({"language_info": {"name": "R"}}, 'R', (3, 2, 1, 0)),
+                 ({"kernelspec": {"language": "javascript"}, "language_info": {"name": "python"}},
+                  'JavaScript', (3, 2, 1, 0)),
+                 ({"kernelspec": {"language": "no-such-kernel"}}, 'Text', (3, 3, 0, 0))]
+        for metadata, language, counts in cases:
+            with self.subTest(language=language):
+                classifier = nxlc.NotebookClassifier()
+                classifier.feed(notebook(cells, metadata))
+                self.assertEqual(classifier.kernel_language(), language)
+                self.assertEqual(classifier.finish(), counts)
+
+    def test_nbformat3(self):
+        """Older notebooks keep cells in worksheets and code in 'input'"""
+        data = json.dumps({"metadata": {"language": "python"}, "nbformat": 3, "worksheets": [{"cells": [
+            {"cell_type": "code", "input": ["# comment\n", "x = 1"], "outputs": []},
+            {"cell_type": "heading", "level": 1, "source": ["Title"]}]}]})
+        self.assertEqual(self.count(data.encode()), (3, 1, 2, 0))
+
+    def test_malformed_input(self):
+        """Truncated or non-notebook JSON does not raise"""
+        data = notebook([code_cell("x = 1\n")])
+        self.assertEqual(self.count(data[:len(data) // 2]), (0, 0, 0, 0))
+        self.assertEqual(self.count(b'[1, 2, "x"]}}]'), (0, 0, 0, 0))
+
+    def test_file_counting(self):
+        """.ipynb files are Jupyter Notebook and are streamed from disk"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'analysis.ipynb'
+            path.write_bytes(notebook([code_cell(["import os\n", "# done"], [{"text": ["x\n"] * 1000}])]))
+            counter = nxlc.LineCounter()
+            counter.READ_CHUNK_SIZE = 64
+            self.assertEqual(counter.detect_language(path), 'Jupyter Notebook')
+            self.assertEqual(counter.count_lines_in_file(path), (2, 1, 1))
+            results = counter.analyze_directory(Path(temp_dir), no_git=True)
+            self.assertEqual(results['languages']['Jupyter Notebook']['code_lines'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
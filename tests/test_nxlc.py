@@ -132,6 +132,33 @@ if __name__ == "__main__":
         # README.md gets detected as 'README', not 'Markdown' 
         self.assertIn('README', languages)
 
+    def test_classify_file_record(self):
+        """Test that classify_file returns a single FileRecord per file"""
+        counter = nxlc.LineCounter()
+        
+        test_file = self.temp_path / "test.py"
+        test_file.write_text("# comment\n\nx = 1\n")
+        
+        record = counter.classify_file(test_file)
+        self.assertIsInstance(record, nxlc.FileRecord)
+        self.assertEqual(record.language, 'Python')
+        self.assertEqual((record.total, record.code, record.comment, record.blank), (3, 1, 1, 1))
+        self.assertEqual(record.size, test_file.stat().st_size)
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_analyze_directory_records_files(self):
+        """Test that analyze_directory keeps one record per counted file"""
+        counter = nxlc.LineCounter()
+        
+        (self.temp_path / "sub").mkdir()
+        (self.temp_path / "a.py").write_text("x = 1\n")
+        (self.temp_path / "sub" / "b.js").write_text("let y = 2;\n")
+        
+        counter.analyze_directory(self.temp_path, no_git=True)
+        
+        self.assertEqual(set(counter.file_line_counts), {'a.py', str(Path('sub') / 'b.js')})
+        self.assertEqual(counter.file_line_counts['a.py'].language, 'Python')
+
     def test_security_validation(self):
         """Test security validation functions"""
         # Test linguist path validation
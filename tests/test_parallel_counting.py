@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for piecewise scanning and parallel counting of large files
+"""
+
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import nxlc
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+C_SOURCE = '''/* header
+ * still header */
+int a = 1; /* trailing */
+char *s = "/* not a comment */ \\
+   // still the string";
+/* open
+   across lines
+*/ int b;
+
+// line comment
+'''
+
+PYTHON_SOURCE = '''def f():
+    """Docstring
+    across lines
+    """
+    s = """data
+    # not a comment
+    """
+    return s  # comment
+'''
+
+FRAGMENTS = ['/*', '*/', '"', "'", '"""', "'''", '`', '\\', '\n', '\n', '\n', ' ', 'x', '//', '#',
+             '--', '{-', '-}', '(*', '*)', '=begin', '=end', '<!--', '-->']
+
+
+class TestPiecewiseScanning(unittest.TestCase):
+    """Test that line-aligned pieces entered in the previous exit state add up"""
+
+    def setUp(self):
+        """Use the built-in definitions"""
+        self.defs = nxlc.LanguageDefinitions()
+
+    def count_pieces(self, language, text, cuts):
+        classifier = self.defs.comment_classifier(language)
+        state, code, comment = None, 0, 0
+        for start, end in zip([0] + cuts, cuts + [len(text)]):
+            piece_code, piece_comment, state = classifier.classify_piece(text[start:end], state)
+            code += piece_code
+            comment += piece_comment
+        return (code, comment)
+
+    def safe_cuts(self, text):
+        return [i + 1 for i, char in enumerate(text) if char == '\n' and not (i and text[i - 1] == '\\')]
+
+    def test_every_cut(self):
+        """Any safe cut of the samples gives the whole-buffer counts"""
+        for language, text in (('C', C_SOURCE), ('Python', PYTHON_SOURCE)):
+            expected = self.defs.comment_classifier(language).classify(text)
+            for cut in self.safe_cuts(text):
+                with self.subTest(language=language, cut=cut):
+                    self.assertEqual(self.count_pieces(language, text, [cut]), expected)
+
+    def test_random_pieces(self):
+        """Random marker soup splits consistently in languages with different block syntax"""
+        rnd = random.Random(7)
+        for language in ('C', 'Python', 'JavaScript', 'Haskell', 'Ruby', 'HTML', 'Lua', 'Pascal'):
+            classifier = self.defs.comment_classifier(language)
+            for _ in range(200):
+                text = ''.join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(0, 60)))
+                cuts = self.safe_cuts(text)
+                cuts = sorted(rnd.sample(cuts, min(len(cuts), 4)))
+                with self.subTest(language=language, text=text, cuts=cuts):
+                    self.assertEqual(self.count_pieces(language, text, cuts), classifier.classify(text))
+
+    def test_exit_states(self):
+        """Open constructs report their state; nested comments carry their depth"""
+        haskell = self.defs.comment_classifier('Haskell')
+        spans, state = haskell.scan('x = 1 {- a {- b\n')
+        self.assertEqual(state[1], 2)
+        self.assertEqual(haskell.scan('-} c\n', state)[1][1], 1)
+        self.assertIsNone(haskell.scan('-} -} y\n', state)[1])
+        python = self.defs.comment_classifier('Python')
+        self.assertEqual(python.scan('    """doc\n')[1][1], 1)
+        self.assertEqual(python.scan('s = """data\n')[1][1], 0)
+        self.assertIsNone(python.scan('x = 1  # c\n')[1])
+
+    def test_last_safe_cut(self):
+        """Cuts avoid newlines escaped by a backslash"""
+        cut = nxlc.CommentClassifier.last_safe_cut
+        self.assertEqual(cut('a\nb\\\nc'), 2)
+        self.assertEqual(cut('a\\\n'), 0)
+        self.assertEqual(cut('no newline'), 0)
+
+
+class TestParallelFileCounter(unittest.TestCase):
+    """Test chunked counting on worker processes"""
+
+    def setUp(self):
+        """Create a temporary directory"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+        self.defs = nxlc.LanguageDefinitions()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_split(self):
+        """Chunks end after newlines that no backslash escapes, even in CRLF files"""
+        path = self.temp_path / 'a.c'
+        path.write_bytes(b'ab\\\r\ncd\\\nef\ngh\r\nij')
+        counter = nxlc.ParallelFileCounter(2, self.defs, 1)
+        self.assertEqual(counter.split(path, path.stat().st_size), [(0, 12), (12, 16), (16, 18)])
+
+    def test_matches_serial_count(self):
+        """Counts on workers equal the serial count at any chunk size"""
+        for name, text in (('a.c', C_SOURCE * 20), ('a.py', PYTHON_SOURCE * 20)):
+            path = self.temp_path / name
+            path.write_bytes(text.replace('\n', '\r\n').encode('utf-8'))
+            language = nxlc.LineCounter().detect_language(path)
+            expected = nxlc.LineCounter().count_lines_in_file(path)
+            for chunk_size in (1, 37, 300):
+                with self.subTest(name=name, chunk_size=chunk_size):
+                    counter = nxlc.ParallelFileCounter(3, self.defs, chunk_size)
+                    self.assertEqual(counter.count(path, language, 'utf-8'), expected)
+
+    def test_unsplittable_encodings(self):
+        """Encodings where a newline byte may not be a newline are counted serially"""
+        splittable = nxlc.ParallelFileCounter.splittable
+        self.assertTrue(splittable('utf-8'))
+        self.assertTrue(splittable('cp1252'))
+        self.assertFalse(splittable('utf-16'))
+        self.assertFalse(splittable('iso2022_jp'))
+        self.assertFalse(splittable('no-such-codec'))
+
+    def test_line_counter_file_jobs(self):
+        """file_jobs enables parallel counting above the size threshold"""
+        path = self.temp_path / 'big.c'
+        path.write_text(C_SOURCE * 50)
+        expected = nxlc.LineCounter().count_lines_in_file(path)
+        counter = nxlc.LineCounter(file_jobs=2)
+        counter.PARALLEL_FILE_SIZE, counter.PARALLEL_CHUNK_SIZE = 1024, 512
+        self.assertEqual(counter.count_lines_in_file(path), expected)
+        with self.assertRaises(ValueError):
+            nxlc.LineCounter(file_jobs=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for vendored-tree detection and pruning
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import nxlc
+
+
+class TestVendoredTrees(unittest.TestCase):
+    """Test directory-level vendored-tree heuristics in the walker"""
+
+    def setUp(self):
+        """Set up test environment with temp directory."""
+        self.test_dir = tempfile.mkdtemp(prefix="nxlc_vendored_test_")
+        self.test_path = Path(self.test_dir)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def create_file(self, relative_path: str, content: str = "x = 1\n") -> Path:
+        """Create a file with given content."""
+        full_path = self.test_path / relative_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+        return full_path
+
+    def create_package(self, relative_dir: str, name: str, license_file: bool = True):
+        """Create an npm package directory with a manifest and one source file."""
+        self.create_file(f"{relative_dir}/package.json", json.dumps({'name': name}))
+        if license_file:
+            self.create_file(f"{relative_dir}/LICENSE", "MIT\n")
+        self.create_file(f"{relative_dir}/index.js", "module.exports = 1;\n")
+
+    def analyze(self, **kwargs):
+        counter = nxlc.LineCounter(**kwargs)
+        return counter, counter.analyze_directory(self.test_path, no_git=True)
+
+    def test_builtin_directory_names(self):
+        """vendor/, third_party/, Pods/ ... are pruned without being listed"""
+        self.create_file("src/main.py")
+        for name in ("vendor", "third_party", "Pods", "bower_components", "external"):
+            self.create_file(f"{name}/lib/dep.py")
+
+        counter = nxlc.LineCounter()
+        listed = []
+        original = counter.is_copied_upstream
+        counter.is_copied_upstream = lambda d, names: listed.append(d.name) or original(d, names)
+        results = counter.analyze_directory(self.test_path, no_git=True)
+
+        self.assertEqual(listed, ['src'])
+        self.assertEqual(results['languages']['Python']['files'], 1)
+        self.assertEqual(results['vendored_dirs'], 5)
+        self.assertIn("5 vendored directories skipped",
+                      nxlc.format_results(results, nxlc.Colors(enabled=False)))
+
+    def test_copied_upstream_package(self):
+        """A nested license + manifest outside the root namespace is vendored"""
+        self.create_file("package.json", json.dumps({'name': '@acme/app'}))
+        self.create_file("src/app.js", "let a = 1;\n")
+        self.create_package("src/lib/leftpad", "left-pad")
+        self.create_package("packages/core", "@acme/core")
+        self.create_package("packages/no-license", "other", license_file=False)
+
+        counter, results = self.analyze()
+        self.assertEqual(results['vendored_dirs'], 1)
+        counted = set(counter.file_line_counts)
+        self.assertNotIn(str(Path('src/lib/leftpad/index.js')), counted)
+        self.assertIn(str(Path('packages/core/index.js')), counted)
+        self.assertIn(str(Path('packages/no-license/index.js')), counted)
+
+    def test_scoped_members_of_unscoped_root(self):
+        """@acme/ui belongs to a root named acme; workspace members are first-party"""
+        self.create_file("package.json", json.dumps({'name': 'acme', 'workspaces': ['apps/*']}))
+        self.create_package("packages/ui", "@acme/ui")
+        self.create_package("apps/web", "storefront")
+        self.create_package("lib/leftpad", "left-pad")
+
+        counter, results = self.analyze()
+        self.assertEqual(results['vendored_dirs'], 1)
+        self.assertIn(str(Path('packages/ui/index.js')), counter.file_line_counts)
+        self.assertIn(str(Path('apps/web/index.js')), counter.file_line_counts)
+        self.assertNotIn(str(Path('lib/leftpad/index.js')), counter.file_line_counts)
+
+    def test_cargo_and_go_workspaces(self):
+        """Cargo [workspace] members and go.work modules are never vendored"""
+        self.create_file("Cargo.toml", '[package]\nname = "acme"\n\n[workspace]\nmembers = [\n  "crates/*",\n]\n')
+        self.create_file("go.work", "go 1.22\n\nuse (\n\t./svc // service\n)\n")
+        self.create_file("crates/parser/Cargo.toml", '[package]\nname = "fastparse"\n')
+        self.create_file("crates/parser/LICENSE", "MIT\n")
+        self.create_file("crates/parser/lib.rs", "fn main() {}\n")
+        self.create_file("svc/go.mod", "module example.com/svc\n")
+        self.create_file("svc/LICENSE", "MIT\n")
+        self.create_file("svc/main.go", "package main\n")
+
+        counter, results = self.analyze()
+        self.assertEqual(results['vendored_dirs'], 0)
+        self.assertIn(str(Path('crates/parser/lib.rs')), counter.file_line_counts)
+        self.assertIn(str(Path('svc/main.go')), counter.file_line_counts)
+
+    def test_manifest_name_comes_from_package_table(self):
+        """Names in [[bin]] or dependency tables are not the package name"""
+        manifest = self.create_file("Cargo.toml", '[[bin]]\nname = "tool"\n\n[dependencies.serde]\n'
+                                                  'version = "1"\n\n[package]\nname = "acme-core"\n')
+        self.assertEqual(nxlc.LineCounter()._manifest_package_name(manifest), 'acme-core')
+
+    def test_go_module_namespace(self):
+        """Go modules under the root module's owner are not vendored"""
+        self.create_file("go.mod", "module github.com/acme/service\n\ngo 1.22\n")
+        for relative, module in (("tools/gen", "github.com/acme/gen"), ("copied/yaml", "gopkg.in/yaml.v3")):
+            self.create_file(f"{relative}/go.mod", f"module {module}\n")
+            self.create_file(f"{relative}/LICENSE", "BSD\n")
+            self.create_file(f"{relative}/main.go", "package main\n")
+
+        counter, results = self.analyze()
+        self.assertIn(str(Path('tools/gen/main.go')), counter.file_line_counts)
+        self.assertNotIn(str(Path('copied/yaml/main.go')), counter.file_line_counts)
+
+    def test_no_root_manifest_disables_manifest_heuristic(self):
+        """Without a root namespace nested packages cannot be judged foreign"""
+        self.create_package("lib/leftpad", "left-pad")
+        _, results = self.analyze()
+        self.assertEqual(results['languages']['JavaScript']['files'], 1)
+
+    def test_count_mode_buckets_lines_only(self):
+        """--vendored count adds a Vendored entry without classifying lines"""
+        self.create_file("main.py", "# comment\nx = 1\n")
+        self.create_file("vendor/dep.py", "# comment\n\ny = 2\n")
+        self.create_file("vendor/data.bin", "\x00\x01\n")
+
+        counter, results = self.analyze(vendored='count')
+        vendored = results['languages']['Vendored']
+        self.assertEqual((vendored['files'], vendored['total_lines'], vendored['code_lines']), (1, 3, 0))
+        self.assertEqual(results['total_lines'], 5)
+
+    def test_count_mode_follows_walk_rules(self):
+        """Vendored trees counted lines-only still honour ignore files and max_depth"""
+        (self.test_path / ".git").mkdir()
+        self.create_file(".gitignore", "vendor/lib/build/\n")
+        self.create_file("vendor/.nxlcignore", "*.gen.py\n")
+        self.create_file("vendor/dep.py", "a = 1\n")
+        self.create_file("vendor/dep.gen.py", "a = 1\n")
+        self.create_file("vendor/lib/build/out.py", "a = 1\n")
+        self.create_file("vendor/lib/deep/more.py", "a = 1\nb = 2\n")
+
+        counter = nxlc.LineCounter(vendored='count')
+        results = counter.analyze_directory(self.test_path)
+        vendored = sorted(path for path, record in counter.file_line_counts.items() if record.language == 'Vendored')
+        self.assertEqual(vendored, [str(Path('vendor/dep.py')), str(Path('vendor/lib/deep/more.py'))])
+        self.assertEqual(results['languages']['Vendored']['total_lines'], 3)
+
+        counter = nxlc.LineCounter(vendored='count')
+        counter.analyze_directory(self.test_path, max_depth=1)
+        vendored = sorted(path for path, record in counter.file_line_counts.items() if record.language == 'Vendored')
+        self.assertEqual(vendored, [str(Path('vendor/dep.py'))])
+
+    def test_include_mode(self):
+        """--vendored include restores normal counting"""
+        self.create_file("vendor/dep.py")
+        _, results = self.analyze(vendored='include')
+        self.assertEqual(results['languages']['Python']['files'], 1)
+        self.assertEqual(results['vendored_dirs'], 0)
+
+    def test_gitattributes_override_name_heuristic(self):
+        """An explicit -linguist-vendored keeps a vendor/ directory counted"""
+        (self.test_path / ".git").mkdir()
+        self.create_file(".gitattributes", "vendor/** -linguist-vendored\n")
+        self.create_file("vendor/ours.py")
+        results = nxlc.LineCounter().analyze_directory(self.test_path)
+        self.assertEqual(results['languages']['Python']['files'], 1)
+
+    def test_project_specific_names_removed(self):
+        """IGNORE_DIRS no longer carries project-specific entries"""
+        self.assertNotIn('mock_vitest', nxlc.LanguageDefinitions.IGNORE_DIRS)
+
+
+if __name__ == '__main__':
+    unittest.main()